@@ -141,8 +141,7 @@ export default function ApplicationDetail({ params }: { params: Promise<{ id: st
         }
       )
       
-      // Also keep polling as backup
-      const interval = setInterval(async () => {
+      const refresh = async () => {
         try {
           const updated = await api.getApplication(resolvedParams.id)
           setAppData(updated)
@@ -154,10 +153,23 @@ export default function ApplicationDetail({ params }: { params: Promise<{ id: st
         } catch (e) {
           console.error('Polling failed:', e)
         }
-      }, 5000) // Slower polling since we have streaming
-      
+      }
+
+      // Refetch once the pushed status leaves Processing/Analyzing (the snapshot covers
+      // an application that finished before the stream connected)
+      const unsubscribeStatus = api.subscribeStatus([resolvedParams.id], (event) => {
+        if (event.application_id !== resolvedParams.id) return
+        if (event.event === 'deleted' || !['Processing','Analyzing'].includes(String(event.status))) {
+          void refresh()
+        }
+      })
+
+      // Slow fallback poll in case the stream drops or the job runs in another API worker
+      const interval = setInterval(() => void refresh(), 30000)
+
       return () => {
         clearInterval(interval)
+        unsubscribeStatus()
         unsubscribe()
       }
     } else {
@@ -39,11 +39,25 @@ export default function Dashboard() {
     void (async () => {
       await loadApplications()
     })()
-    // Poll for updates every 5 seconds
+    // Reload when the server pushes a status change; a burst of changes (e.g. a batch
+    // finishing) is coalesced into one reload
+    let pending: ReturnType<typeof setTimeout> | null = null
+    const unsubscribe = api.subscribeStatus('all', () => {
+      if (pending) return
+      pending = setTimeout(() => {
+        pending = null
+        void loadApplications()
+      }, 1000)
+    })
+    // Slow fallback poll in case the stream drops or a change happens in another API worker
     const interval = setInterval(() => {
       void loadApplications()
-    }, 5000)
-    return () => clearInterval(interval)
+    }, 30000)
+    return () => {
+      unsubscribe()
+      if (pending) clearTimeout(pending)
+      clearInterval(interval)
+    }
   }, [loadApplications])
 
   return (
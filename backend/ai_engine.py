@@ -1,13 +1,14 @@
 """
 AI Engine for document analysis using Google Gemini
 """
+import asyncio
 import json
 import re
-import time
 from typing import Dict, Any
 import google.generativeai as genai
-from google.api_core import exceptions
 from prompts_optimized import build_prompt
+from analysis_cache import analysis_cache
+from llm_client import llm_client
 import pypdfium2 as pdfium
 from PIL import Image
 import io
@@ -19,9 +20,14 @@ class AIEngine:
         genai.configure(api_key=api_key)
         # Using gemini-2.0-flash (stable, fast, balanced - successor to 1.5-flash)
         self.model_name = "models/gemini-2.0-flash"
-        self.max_retries = 3
+        self.generation_config = {
+            "response_mime_type": "application/json",
+            "temperature": 0.0,  # CRITICAL: Set to 0 for deterministic/consistent outputs
+            "top_p": 1.0,         # No nucleus sampling randomness
+            "top_k": 1            # Always pick the most likely token
+        }
     
-    def analyze_application(self, application_form_text: str, raw_text: str, bank_text: str = "", essay_text: str = "", payslip_text: str = "", application_id: str = "", application_form_path: str = None, supporting_docs_texts: list[str] = []) -> Dict[str, Any]:
+    async def analyze_application(self, application_form_text: str, raw_text: str, bank_text: str = "", essay_text: str = "", payslip_text: str = "", application_id: str = "", application_form_path: str = None, supporting_docs_texts: list[str] = []) -> Dict[str, Any]:
         """
         Analyze loan application using Gemini AI with XML-structured prompts for zero hallucination.
         
@@ -57,34 +63,45 @@ class AIEngine:
             )
             print(f"[AI ENGINE] XML prompt built, length: {len(prompt)} characters")
             
-            # Call Gemini API with retry logic for rate limits
+            document_texts = {
+                'bank_statement': bank_text,
+                'essay': essay_text,
+                'payslip': payslip_text,
+                'application_form': application_form_text,
+                'supporting_docs': supporting_docs_texts
+            }
+            
+            # Content-addressed cache: the key prompt uses a placeholder ID so the
+            # same documents re-uploaded under a new application ID still hit
+            cache_key = None
+            try:
+                cache_prompt = build_prompt(
+                    application_form_text=application_form_text,
+                    payslip_text=payslip_text,
+                    bank_statement_text=bank_text,
+                    essay_text=essay_text,
+                    application_id="{id}",
+                    supporting_docs_texts=supporting_docs_texts
+                )
+                cache_key = analysis_cache.make_key(cache_prompt, self.model_name, self.generation_config)
+                cached = await asyncio.to_thread(analysis_cache.get, cache_key)
+                if cached is not None:
+                    print(f"[AI ENGINE] Analysis cache hit ({cache_key[:12]}) - skipping Gemini call")
+                    cached['document_texts'] = document_texts
+                    return cached
+            except Exception as cache_err:
+                print(f"[AI ENGINE] Analysis cache unavailable: {cache_err}")
+            
+            # Call Gemini API - concurrency, rate limits and retries are handled by llm_client
             print(f"[AI ENGINE] Initializing Gemini model: {self.model_name}")
             model = genai.GenerativeModel(
                 self.model_name,
-                generation_config={
-                    "response_mime_type": "application/json",
-                    "temperature": 0.0,  # CRITICAL: Set to 0 for deterministic/consistent outputs
-                    "top_p": 1.0,         # No nucleus sampling randomness
-                    "top_k": 1            # Always pick the most likely token
-                }
+                generation_config=self.generation_config
             )
             
-            # Retry loop for rate limit handling
-            response = None
-            for attempt in range(self.max_retries):
-                try:
-                    print(f"[AI ENGINE] Calling Gemini API (attempt {attempt + 1}/{self.max_retries})...")
-                    response = model.generate_content(prompt)
-                    print(f"[AI ENGINE] Gemini API call completed successfully")
-                    break
-                except exceptions.ResourceExhausted as e:
-                    if attempt < self.max_retries - 1:
-                        wait_time = 10 * (attempt + 1)  # Exponential backoff: 10s, 20s, 30s
-                        print(f"[AI ENGINE] Rate limit hit. Waiting {wait_time} seconds before retry...")
-                        time.sleep(wait_time)
-                    else:
-                        print(f"[AI ENGINE] Max retries reached. Rate limit still active.")
-                        raise
+            print(f"[AI ENGINE] Calling Gemini API...")
+            response = await llm_client.generate(model, prompt)
+            print(f"[AI ENGINE] Gemini API call completed successfully")
             
             # Extract JSON from response
             result_text = response.text.strip()
@@ -282,14 +299,14 @@ class AIEngine:
             else:
                 print(f"[FORENSIC EVIDENCE OK] AI provided {len(claim_vs_reality)} items - minimum requirement met")
             
+            if cache_key:
+                try:
+                    await asyncio.to_thread(analysis_cache.put, cache_key, result, self.model_name, application_id)
+                except Exception as cache_err:
+                    print(f"[AI ENGINE] Failed to cache analysis: {cache_err}")
+            
             # Attach original document texts for frontend display
-            result['document_texts'] = {
-                'bank_statement': bank_text,
-                'essay': essay_text,
-                'payslip': payslip_text,
-                'application_form': application_form_text,
-                'supporting_docs': supporting_docs_texts
-            }
+            result['document_texts'] = document_texts
             
             return result
             
@@ -340,7 +357,7 @@ class AIEngine:
                 print(f"Raw AI response (first 500 chars): {result_text[:500]}")
             raise
         
-    def analyze_application_with_vision(self, application_form_path: str, bank_text: str, essay_text: str, payslip_text: str, application_id: str, supporting_docs_texts: list[str] = []) -> Dict[str, Any]:
+    async def analyze_application_with_vision(self, application_form_path: str, bank_text: str, essay_text: str, payslip_text: str, application_id: str, supporting_docs_texts: list[str] = []) -> Dict[str, Any]:
         """
         Multimodal analysis:
         1. Convert Application Form PDF (Page 1) -> Image
@@ -349,16 +366,19 @@ class AIEngine:
         print(f"[AI ENGINE] Starting Multimodal Vision Analysis for {application_id}")
         
         # 1. Convert PDF Page 1 to Image
-        try:
+        def render_first_page():
             pdf = pdfium.PdfDocument(application_form_path)
             page = pdf[0]  # Load first page
             bitmap = page.render(scale=2.0)  # Render at 2x scale for better quality
-            pil_image = bitmap.to_pil()
+            return bitmap.to_pil()
+        
+        try:
+            pil_image = await asyncio.to_thread(render_first_page)
             print(f"[AI ENGINE] Converted Application Form Page 1 to Image: {pil_image.size}")
         except Exception as e:
             print(f"[ERROR] Failed to convert PDF to Image: {e}")
             # Fallback to text-only if image conversion fails
-            return self.analyze_application("", "", bank_text, essay_text, payslip_text, application_id, supporting_docs_texts=supporting_docs_texts)
+            return await self.analyze_application("", "", bank_text, essay_text, payslip_text, application_id, supporting_docs_texts=supporting_docs_texts)
 
         # 2. Build Prompt (Text Part)
         # We pass empty application_form_text because the image replaces it
@@ -375,29 +395,13 @@ class AIEngine:
         print(f"[AI ENGINE] Initializing Gemini model: {self.model_name}")
         model = genai.GenerativeModel(
             self.model_name,
-            generation_config={
-                "response_mime_type": "application/json",
-                "temperature": 0.0,  # CRITICAL: Deterministic outputs
-                "top_p": 1.0,
-                "top_k": 1
-            }
+            generation_config=self.generation_config
         )
         
-        response = None
-        for attempt in range(self.max_retries):
-            try:
-                print(f"[AI ENGINE] Calling Gemini API with Vision (attempt {attempt + 1}/{self.max_retries})...")
-                # Pass list: [prompt_text, image]
-                response = model.generate_content([prompt_text, pil_image])
-                print(f"[AI ENGINE] Gemini API call completed successfully")
-                break
-            except exceptions.ResourceExhausted as e:
-                if attempt < self.max_retries - 1:
-                    wait_time = 10 * (attempt + 1)
-                    print(f"[AI ENGINE] Rate limit hit. Waiting {wait_time} seconds...")
-                    time.sleep(wait_time)
-                else:
-                    raise
+        print(f"[AI ENGINE] Calling Gemini API with Vision...")
+        # Pass list: [prompt_text, image]
+        response = await llm_client.generate(model, [prompt_text, pil_image])
+        print(f"[AI ENGINE] Gemini API call completed successfully")
 
         # 4. Process Response (Same as text-only)
         result_text = response.text.strip()
@@ -563,6 +567,34 @@ class AIEngine:
             
         return result
     
+    def apply_statement_cash_flow(self, result: Dict[str, Any], cash_flow: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace the bank-statement figures the LLM read from raw text with those computed
+        from the parsed transaction table (statement_parser), then recalculate the metrics.
+        The LLM's original values are kept under bank_statement_analysis.llm_values.
+        """
+        data = result.setdefault('financial_data_extraction', {})
+        llm_values = {}
+
+        def replace(field: str, value):
+            llm_values[field] = data.get(field)
+            data[field] = value
+
+        if cash_flow.get('closing_balance') is not None:
+            replace('monthly_closing_balance', cash_flow['closing_balance'])
+        if cash_flow.get('monthly_debt_repayments'):
+            replace('total_monthly_debt', cash_flow['monthly_debt_repayments'])
+        if not float(data.get('monthly_net_income') or 0) and cash_flow.get('monthly_salary'):
+            replace('monthly_net_income', cash_flow['monthly_salary'])
+
+        result['bank_statement_analysis'] = {**cash_flow, 'llm_values': llm_values}
+        ai_score = result.get('risk_score_analysis', {}).get('ai_original_score')
+        result = self.recalculate_financial_metrics(result)
+        if ai_score is not None:
+            result['risk_score_analysis']['ai_original_score'] = ai_score  # Still the LLM's own score
+        print(f"[AI ENGINE] Statement cash flow applied: {', '.join(llm_values) or 'no figures replaced'}")
+        return result
+
     def recalculate_risk_score(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """
         Recalculate final_score from score_breakdown array.
@@ -621,7 +653,7 @@ class AIEngine:
         
         return result
 
-    def analyze_application_streaming(self, application_form_text: str, raw_text: str, bank_text: str = "", essay_text: str = "", payslip_text: str = "", application_id: str = "", supporting_docs_texts: list[str] = []):
+    async def analyze_application_streaming(self, application_form_text: str, raw_text: str, bank_text: str = "", essay_text: str = "", payslip_text: str = "", application_id: str = "", supporting_docs_texts: list[str] = []):
         """
         Streaming version of analyze_application - yields chunks of text as they're generated.
         This provides faster perceived response time for the user.
@@ -646,22 +678,14 @@ class AIEngine:
             print(f"[AI ENGINE STREAMING] Initializing Gemini model with streaming: {self.model_name}")
             model = genai.GenerativeModel(
                 self.model_name,
-                generation_config={
-                    "response_mime_type": "application/json",
-                    "temperature": 0.0,  # CRITICAL: Deterministic outputs
-                    "top_p": 1.0,
-                    "top_k": 1
-                }
+                generation_config=self.generation_config
             )
             
             # Use streaming response
-            response = model.generate_content(prompt, stream=True)
-            
             accumulated_text = ""
-            for chunk in response:
-                if chunk.text:
-                    accumulated_text += chunk.text
-                    yield chunk.text
+            async for text in llm_client.stream(model, prompt):
+                accumulated_text += text
+                yield text
             
             print(f"[AI ENGINE STREAMING] Streaming complete, total length: {len(accumulated_text)}")
             
@@ -0,0 +1,139 @@
+"""
+Content-addressed cache for Gemini analysis results
+Results are keyed by a hash of the built prompt, model name and generation config,
+so re-uploads of the same documents under a new application ID reuse one Gemini call.
+"""
+import copy
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from database import get_session
+from models import AnalysisCache
+from prompts_optimized import PROMPT_VERSION
+
+
+class AnalysisCacheStore:
+    """TTL + LRU bounded store of analysis results in the analysiscache table"""
+
+    def __init__(self):
+        self.config = Config()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, generation_config: Dict[str, Any]) -> str:
+        """SHA-256 over everything that determines the model output"""
+        material = json.dumps({
+            "prompt_version": PROMPT_VERSION,
+            "model": model_name,
+            "generation_config": generation_config,
+            "prompt": prompt,
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the cached result, or None if missing or expired
+
+        Args:
+            cache_key: Key from make_key()
+        """
+        now = datetime.utcnow()
+        with get_session() as session:
+            entry = session.query(AnalysisCache).filter(AnalysisCache.cache_key == cache_key).first()
+            if entry is None or (entry.expires_at and entry.expires_at <= now):
+                self.misses += 1
+                return None
+            result = copy.deepcopy(entry.result_json)
+            session.execute(
+                update(AnalysisCache)
+                .where(AnalysisCache.id == entry.id)
+                .values(hit_count=AnalysisCache.hit_count + 1, last_accessed_at=now)
+            )
+        self.hits += 1
+        return result
+
+    def put(self, cache_key: str, result: Dict[str, Any], model_name: str, application_id: str = None):
+        """Store a result (without document texts) and enforce TTL/size limits"""
+        now = datetime.utcnow()
+        stored = {k: v for k, v in result.items() if k != "document_texts"}
+        try:
+            with get_session() as session:
+                session.add(AnalysisCache(
+                    cache_key=cache_key,
+                    prompt_version=PROMPT_VERSION,
+                    llm_model=model_name,
+                    application_id=application_id,
+                    result_json=stored,
+                    created_at=now,
+                    last_accessed_at=now,
+                    expires_at=now + timedelta(hours=self.config.ANALYSIS_CACHE_TTL_HOURS),
+                ))
+        except IntegrityError:
+            return  # Same prompt analysed concurrently - keep the first result
+        self.evict()
+
+    def evict(self) -> int:
+        """Drop expired entries, then least-recently-used ones above ANALYSIS_CACHE_MAX_ENTRIES"""
+        now = datetime.utcnow()
+        with get_session() as session:
+            removed = session.query(AnalysisCache).filter(
+                AnalysisCache.expires_at.isnot(None), AnalysisCache.expires_at <= now
+            ).delete(synchronize_session=False)
+            overflow = session.query(func.count(AnalysisCache.id)).scalar() - self.config.ANALYSIS_CACHE_MAX_ENTRIES
+            if overflow > 0:
+                lru_ids = [
+                    row[0] for row in session.query(AnalysisCache.id).order_by(
+                        AnalysisCache.last_accessed_at.asc(), AnalysisCache.id.asc()
+                    ).limit(overflow).all()
+                ]
+                removed += session.query(AnalysisCache).filter(
+                    AnalysisCache.id.in_(lru_ids)
+                ).delete(synchronize_session=False)
+        return removed
+
+    def invalidate(self, prompt_version: Optional[str] = None) -> int:
+        """
+        Delete cached results for a prompt version
+
+        Args:
+            prompt_version: Version to drop; None drops everything not produced by the current PROMPT_VERSION
+
+        Returns:
+            Number of entries deleted
+        """
+        with get_session() as session:
+            query = session.query(AnalysisCache)
+            if prompt_version is None:
+                query = query.filter(
+                    (AnalysisCache.prompt_version.is_(None)) | (AnalysisCache.prompt_version != PROMPT_VERSION)
+                )
+            else:
+                query = query.filter(AnalysisCache.prompt_version == prompt_version)
+            return query.delete(synchronize_session=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts per prompt version and hit/miss counters for this process"""
+        with get_session() as session:
+            by_version = session.query(AnalysisCache.prompt_version, func.count(AnalysisCache.id)).group_by(
+                AnalysisCache.prompt_version
+            ).all()
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(count for _, count in by_version),
+            "by_prompt_version": {version or "legacy": count for version, count in by_version},
+            "current_prompt_version": PROMPT_VERSION,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0,
+        }
+
+
+# Singleton instance
+analysis_cache = AnalysisCacheStore()
@@ -0,0 +1,100 @@
+"""
+Hot analysis_result fields promoted to indexed columns
+Loan type, DSR, net income / NDI and the risk flags are copied out of the
+analysis JSON when an analysis is stored, so list filters, sorting and analytics
+use indexes instead of scanning JSON. backfill() fills rows analysed before the
+columns existed (or with an older HOT_FIELDS_VERSION).
+"""
+from typing import Any, Dict, List, Optional
+
+from database import get_session
+from models import Application, ApplicationRiskFlag
+
+# Bump when the extraction below changes so existing rows are backfilled again
+HOT_FIELDS_VERSION = 1
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+def _get(data: Any, *path: str) -> Any:
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+def hot_fields(analysis: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Column values for an analysis result (all None when there is no result)"""
+    analysis = analysis or {}
+    loan_type = _get(analysis, "applicant_profile", "loan_type")
+    return {
+        "loan_type_label": loan_type if isinstance(loan_type, str) and loan_type else None,
+        "debt_service_ratio": _number(_get(analysis, "financial_metrics", "debt_service_ratio", "value")),
+        "net_income": _number(_get(analysis, "financial_metrics", "net_disposable_income", "calculation", "net_income")),
+        "net_disposable_income": _number(_get(analysis, "financial_metrics", "net_disposable_income", "value")),
+    }
+
+
+def risk_flags(analysis: Optional[Dict[str, Any]]) -> List[Dict[str, Optional[str]]]:
+    """key_risk_flags reduced to the indexed side-table fields"""
+    flags = (analysis or {}).get("key_risk_flags") or []
+    return [
+        {
+            "flag": (flag or {}).get("flag") or "Unknown",
+            "severity": (flag or {}).get("severity"),
+            "document_source": (flag or {}).get("document_source"),
+        }
+        for flag in flags
+    ]
+
+
+class AnalysisFieldIndex:
+    """Keeps the promoted columns and ApplicationRiskFlag rows in step with analysis_result"""
+
+    def apply(self, session, app: Application):
+        """Copy hot fields of app.analysis_result into columns and the risk flag table (caller commits)"""
+        for column, value in hot_fields(app.analysis_result).items():
+            setattr(app, column, value)
+        app.hot_fields_version = HOT_FIELDS_VERSION
+        self.delete(session, app.application_id)
+        for flag in risk_flags(app.analysis_result):
+            session.add(ApplicationRiskFlag(application_id=app.application_id, **flag))
+
+    @staticmethod
+    def delete(session, application_id: str):
+        session.query(ApplicationRiskFlag).filter(
+            ApplicationRiskFlag.application_id == application_id
+        ).delete(synchronize_session=False)
+
+    def backfill(self, batch_size: int = 200) -> int:
+        """
+        Fill the columns for analysed applications written by an older version
+
+        Returns:
+            Number of applications updated
+        """
+        updated = 0
+        while True:
+            with get_session() as session:
+                apps = session.query(Application).filter(
+                    Application.analysis_result.isnot(None),
+                    Application.hot_fields_version < HOT_FIELDS_VERSION,
+                ).limit(batch_size).all()
+                if not apps:
+                    break
+                for app in apps:
+                    self.apply(session, app)
+                    session.add(app)
+                updated += len(apps)
+        if updated:
+            print(f"✓ Backfilled indexed analysis fields for {updated} applications")
+        return updated
+
+
+# Singleton instance
+analysis_field_index = AnalysisFieldIndex()
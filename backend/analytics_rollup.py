@@ -0,0 +1,269 @@
+"""
+Incrementally maintained analytics rollups
+Every flush that inserts, changes or deletes an Application applies the difference
+between its old and new contribution to the AnalyticsRollup / RiskFlagRollup tables
+inside the same transaction, so the dashboard reads O(days) pre-aggregated rows
+instead of scanning applications. rebuild() recomputes everything from scratch.
+"""
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, event, func, select
+from sqlalchemy.orm import Session
+
+from database import get_session
+from models import (
+    AnalyticsRollup, Application, ApplicationRollupState, ApplicationStatus, ReviewStatus, RiskFlagRollup
+)
+
+DIMENSIONS = ("day", "loan_type", "risk_level", "final_decision")
+MEASURES = (
+    "applications", "requested_amount_sum", "risk_score_sum", "risk_score_count",
+    "processing_time_sum", "processing_time_count", "reviewed", "agreements",
+    "review_required", "in_progress",
+    "score_0_20", "score_21_40", "score_41_60", "score_61_80", "score_81_100",
+    "time_under_30", "time_30_45", "time_45_60", "time_over_60",
+)
+SCORE_COLUMNS = [("score_0_20", 20), ("score_21_40", 40), ("score_41_60", 60), ("score_61_80", 80), ("score_81_100", 100)]
+
+
+def _enum_value(value) -> str:
+    if value is None:
+        return ""
+    return value.value if hasattr(value, "value") else str(value)
+
+
+def loan_type_of(app: Application) -> str:
+    """AI-extracted loan type (loan_type_label), falling back to the loan_type column"""
+    return app.loan_type_label or _enum_value(app.loan_type) or "Unknown"
+
+
+def risk_flags_of(app: Application) -> List[str]:
+    analysis = app.analysis_result or {}
+    return [(flag or {}).get("flag") or "Unknown" for flag in analysis.get("key_risk_flags") or []]
+
+
+def contribution(app: Application) -> Dict[str, Any]:
+    """Dimensions and measures one application adds to AnalyticsRollup"""
+    row = {
+        "day": app.created_at.strftime("%Y-%m-%d") if app.created_at else "",
+        "loan_type": loan_type_of(app),
+        "risk_level": _enum_value(app.risk_level),
+        "final_decision": app.final_decision or "",
+    }
+    row.update({measure: 0 for measure in MEASURES})
+    row["applications"] = 1
+    row["requested_amount_sum"] = app.requested_amount or 0.0
+
+    if app.risk_score is not None:
+        row["risk_score_sum"] = app.risk_score
+        row["risk_score_count"] = 1
+        for column, upper in SCORE_COLUMNS:
+            if app.risk_score <= upper:
+                row[column] = 1
+                break
+
+    if app.processing_time:
+        row["processing_time_sum"] = app.processing_time
+        row["processing_time_count"] = 1
+        if app.processing_time < 30:
+            row["time_under_30"] = 1
+        elif app.processing_time < 45:
+            row["time_30_45"] = 1
+        elif app.processing_time < 60:
+            row["time_45_60"] = 1
+        else:
+            row["time_over_60"] = 1
+
+    if app.review_status in (ReviewStatus.HUMAN_VERIFIED, ReviewStatus.MANUAL_OVERRIDE):
+        row["reviewed"] = 1
+        row["agreements"] = 1 if app.ai_decision == app.human_decision else 0
+    row["review_required"] = 1 if app.status == ApplicationStatus.REVIEW_REQUIRED else 0
+    row["in_progress"] = 1 if app.status in (ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING) else 0
+    return row
+
+
+def _insert(conn):
+    if conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+class AnalyticsRollups:
+    """Applies application changes to the rollup tables and rebuilds them"""
+
+    rollup = AnalyticsRollup.__table__
+    flags = RiskFlagRollup.__table__
+    state = ApplicationRollupState.__table__
+
+    def _add(self, conn, rows: List[Dict[str, Any]]):
+        """Add measure deltas to their rollup rows (one upsert executed for all rows)"""
+        if not rows:
+            return
+        insert = _insert(conn)
+        stmt = insert(self.rollup)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=list(DIMENSIONS),
+            set_={m: self.rollup.c[m] + stmt.excluded[m] for m in MEASURES},
+        ), rows)
+        for row in rows:
+            if row["applications"] < 0:
+                conn.execute(delete(self.rollup).where(
+                    *[self.rollup.c[d] == row[d] for d in DIMENSIONS], self.rollup.c.applications <= 0
+                ))
+
+    def _add_flags(self, conn, flag_counts: Dict[str, int]):
+        rows = [{"flag": flag, "occurrences": delta} for flag, delta in flag_counts.items() if delta != 0]
+        if not rows:
+            return
+        insert = _insert(conn)
+        stmt = insert(self.flags)
+        conn.execute(stmt.on_conflict_do_update(
+            index_elements=["flag"],
+            set_={"occurrences": self.flags.c.occurrences + stmt.excluded.occurrences},
+        ), rows)
+        for row in rows:
+            if row["occurrences"] < 0:
+                conn.execute(delete(self.flags).where(self.flags.c.flag == row["flag"], self.flags.c.occurrences <= 0))
+
+    def apply_many(self, conn, changes: List[Tuple[str, Optional[Application]]]):
+        """
+        Replace the stored contributions of many applications (app None = deleted)
+
+        Deltas are merged per rollup row first, so a flush of a thousand new
+        applications costs a handful of statements rather than several per application.
+        """
+        ids = [application_id for application_id, _ in changes]
+        if conn.dialect.name == "postgresql":
+            # Under READ COMMITTED two writers of the same application (e.g. a reviewer's
+            # verify racing the job's final write) could both read the same old state and
+            # apply overlapping deltas. Lock the application rows first, in a fixed order so
+            # concurrent flushes cannot deadlock, then read the state the last writer left.
+            ordered = sorted(ids)
+            for offset in range(0, len(ordered), 500):
+                conn.execute(
+                    select(Application.id)
+                    .where(Application.application_id.in_(ordered[offset:offset + 500]))
+                    .order_by(Application.application_id)
+                    .with_for_update()
+                )
+        previous = {}
+        for offset in range(0, len(ids), 500):
+            for row in conn.execute(
+                select(self.state.c.application_id, self.state.c.contribution, self.state.c.risk_flags)
+                .where(self.state.c.application_id.in_(ids[offset:offset + 500]))
+            ):
+                previous[row.application_id] = row
+
+        deltas: Dict[Tuple, Dict[str, Any]] = {}
+        flag_counts: Dict[str, int] = defaultdict(int)
+        inserts, updates, deletes = [], [], []
+
+        def add(row: Dict[str, Any], sign: int):
+            key = tuple(row[d] for d in DIMENSIONS)
+            delta = deltas.setdefault(key, {**{d: row[d] for d in DIMENSIONS}, **{m: 0 for m in MEASURES}})
+            for m in MEASURES:
+                delta[m] += sign * row[m]
+
+        for application_id, app in changes:
+            stored = previous.get(application_id)
+            new_row = contribution(app) if app is not None else None
+            new_flags = risk_flags_of(app) if app is not None else []
+            old_row, old_flags = (stored.contribution, stored.risk_flags or []) if stored else (None, [])
+            if stored and new_row == old_row and new_flags == old_flags:
+                continue
+
+            if old_row:
+                add(old_row, -1)
+            if new_row:
+                add(new_row, +1)
+            for flag in old_flags:
+                flag_counts[flag] -= 1
+            for flag in new_flags:
+                flag_counts[flag] += 1
+
+            if new_row is None:
+                deletes.append(application_id)
+            elif stored:
+                updates.append({"key": application_id, "contribution": new_row, "risk_flags": new_flags})
+            else:
+                inserts.append({"application_id": application_id, "contribution": new_row, "risk_flags": new_flags})
+
+        self._add(conn, [delta for delta in deltas.values() if any(delta[m] for m in MEASURES)])
+        self._add_flags(conn, flag_counts)
+        if deletes:
+            conn.execute(delete(self.state).where(self.state.c.application_id.in_(deletes)))
+        if updates:
+            conn.execute(self.state.update().where(self.state.c.application_id == bindparam("key")).values(
+                contribution=bindparam("contribution"), risk_flags=bindparam("risk_flags")
+            ), updates)
+        if inserts:
+            conn.execute(self.state.insert(), inserts)
+
+    def rebuild(self) -> Tuple[int, int]:
+        """
+        Recompute all rollups from the application table in one transaction
+
+        Returns:
+            (applications counted, rollup rows written)
+        """
+        rows: Dict[Tuple, Dict[str, Any]] = {}
+        flag_counts: Dict[str, int] = defaultdict(int)
+        states = []
+        with get_session() as session:
+            for app in session.execute(select(Application).execution_options(yield_per=500)).scalars():
+                row = contribution(app)
+                flags = risk_flags_of(app)
+                key = tuple(row[d] for d in DIMENSIONS)
+                if key in rows:
+                    for m in MEASURES:
+                        rows[key][m] += row[m]
+                else:
+                    rows[key] = dict(row)
+                for flag in flags:
+                    flag_counts[flag] += 1
+                states.append({"application_id": app.application_id, "contribution": row, "risk_flags": flags})
+
+            conn = session.connection()
+            for table in (self.rollup, self.flags, self.state):
+                conn.execute(delete(table))
+            if rows:
+                conn.execute(self.rollup.insert(), list(rows.values()))
+            if flag_counts:
+                conn.execute(self.flags.insert(), [{"flag": f, "occurrences": n} for f, n in flag_counts.items()])
+            if states:
+                conn.execute(self.state.insert(), states)
+        return len(states), len(rows)
+
+    def ensure_built(self):
+        """Rebuild when the rollups do not cover exactly the current applications (first start, bulk deletes)"""
+        with get_session() as session:
+            applications = session.query(func.count(Application.id)).scalar()
+            tracked = session.query(func.count()).select_from(ApplicationRollupState).scalar()
+        if applications != tracked:
+            counted, written = self.rebuild()
+            print(f"✓ Analytics rollups rebuilt: {counted} applications -> {written} rollup rows")
+
+
+# Singleton instance
+analytics_rollups = AnalyticsRollups()
+
+
+@event.listens_for(Session, "before_flush")
+def _track_application_changes(session, flush_context, instances):
+    """Keep rollups in step with every Application insert/update/delete in the same transaction"""
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Application):
+            changes.append((obj.application_id, obj))
+    for obj in session.dirty:
+        if isinstance(obj, Application) and session.is_modified(obj):
+            changes.append((obj.application_id, obj))
+    for obj in session.deleted:
+        if isinstance(obj, Application):
+            changes.append((obj.application_id, None))
+    if not changes:
+        return
+    analytics_rollups.apply_many(session.connection(), changes)
@@ -0,0 +1,423 @@
+"""
+Portfolio analytics computed in SQL
+The dashboard is served from the AnalyticsRollup / RiskFlagRollup tables that
+analytics_rollup keeps up to date, so a request reads O(days) pre-aggregated rows.
+live_summary() computes the same payload with aggregate queries (GROUP BY, CASE
+buckets, date truncation) directly over the application table, using the indexed
+columns and ApplicationRiskFlag rows that analysis_fields copies out of
+analysis_result. Neither path loads an Application row or JSON document into Python.
+"""
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import and_, case, func, literal
+
+from config import Config
+from database import get_session
+from models import AnalyticsRollup, Application, ApplicationRiskFlag, ApplicationStatus, ReviewStatus, RiskFlagRollup
+
+# (label, upper bound, rollup column) - a value falls in the first bucket whose bound it does not exceed
+SCORE_BUCKETS = [
+    ("0-20", 20, "score_0_20"), ("21-40", 40, "score_21_40"), ("41-60", 60, "score_41_60"),
+    ("61-80", 80, "score_61_80"), ("81-100", 100, "score_81_100"),
+]
+# (label, exclusive upper bound, rollup column) - None is open-ended
+PROCESSING_TIME_BUCKETS = [
+    ("< 30s", 30, "time_under_30"), ("30-45s", 45, "time_30_45"), ("45-60s", 60, "time_45_60"), ("> 60s", None, "time_over_60"),
+]
+RISK_LEVELS = ["Low", "Medium", "High"]
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _sum(column):
+    return func.coalesce(func.sum(column), 0)
+
+
+class AnalyticsService:
+    """Builds the /api/analytics/summary payload with aggregate queries"""
+
+    @staticmethod
+    def empty_summary() -> Dict[str, Any]:
+        return {
+            "kpi": {
+                "total_applications": 0,
+                "total_exposure": 0,
+                "avg_risk_score": 0,
+                "approval_rate": 0,
+                "avg_processing_time": "0s",
+                "ai_human_agreement": 0
+            },
+            "charts": {
+                "score_distribution": [],
+                "loan_composition": [],
+                "top_risk_flags": [],
+                "status_breakdown": []
+            },
+            "overrides": [],
+            "advanced": {
+                "financial_scatter": [],
+                "application_trends": [],
+                "risk_level_analysis": {
+                    "breakdown": [],
+                    "processing_time": []
+                }
+            }
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregated analytics data for the portfolio dashboard, read from the rollup tables"""
+        with get_session() as session:
+            kpi = self._rollup_kpis(session)
+            if kpi["total"] == 0:
+                return self.empty_summary()
+            return self._assemble(
+                session,
+                kpi,
+                score_counts=self._rollup_histogram(session, SCORE_BUCKETS),
+                loan_types=self._rollup_loan_types(session),
+                top_risk_flags=self._rollup_top_risk_flags(session),
+                trend_rows=self._rollup_trends(session),
+                risk_rows=self._rollup_risk_levels(session),
+                time_counts=self._rollup_histogram(session, PROCESSING_TIME_BUCKETS),
+            )
+
+    def live_summary(self) -> Dict[str, Any]:
+        """Same payload as summary(), aggregated directly from the application table"""
+        with get_session() as session:
+            kpi = self._kpis(session)
+            if kpi["total"] == 0:
+                return self.empty_summary()
+            return self._assemble(
+                session,
+                kpi,
+                score_counts=self._score_distribution(session),
+                loan_types=self._loan_composition(session),
+                top_risk_flags=self._top_risk_flags(session),
+                trend_rows=self._application_trends(session),
+                risk_rows=self._risk_breakdown(session),
+                time_counts=self._processing_time_distribution(session),
+            )
+
+    def _assemble(self, session, kpi, score_counts, loan_types, top_risk_flags, trend_rows, risk_rows, time_counts) -> Dict[str, Any]:
+        """Shape aggregates from either source into the dashboard payload"""
+        total = kpi["total"]
+        avg_time = kpi["avg_processing_time"] or 0
+        reviewed = kpi["reviewed"]
+
+        status_breakdown = {
+            "Approved": kpi["approved"],
+            "Rejected": kpi["rejected"],
+            "Pending Review": kpi["pending_review"],
+            "Processing": kpi["processing"],
+        }
+
+        trends = [
+            {
+                "date": day or "Unknown",
+                "total": day_total,
+                "approved": approved,
+                "rejected": rejected,
+                "approval_rate": round((approved / day_total * 100), 1) if day_total > 0 else 0
+            }
+            for day, day_total, approved, rejected in trend_rows
+        ]
+
+        risk_breakdown = []
+        for level in RISK_LEVELS:
+            level_total, approved, rejected = risk_rows.get(level, (0, 0, 0))
+            if level_total == 0:
+                continue
+            risk_breakdown.append({
+                "risk_level": level,
+                "approved": approved,
+                "rejected": rejected,
+                "pending": level_total - approved - rejected,
+                "approval_rate": round((approved / level_total * 100), 1)
+            })
+
+        return {
+            "kpi": {
+                "total_applications": total,
+                "total_exposure": kpi["total_exposure"],
+                "avg_risk_score": round(kpi["avg_risk_score"], 1) if kpi["avg_risk_score"] is not None else 0,
+                "approval_rate": round((kpi["approved"] / total * 100), 1),
+                "avg_processing_time": f"{avg_time:.1f}s" if avg_time < 60 else f"{avg_time/60:.1f}m",
+                "ai_human_agreement": round((kpi["agreements"] / reviewed * 100), 1) if reviewed else 100
+            },
+            "charts": {
+                "score_distribution": [{"range": label, "count": score_counts.get(label, 0)} for label, _, _ in SCORE_BUCKETS],
+                "loan_composition": [
+                    {"name": k, "value": v} for k, v in sorted(loan_types.items(), key=lambda item: (-item[1], item[0]))
+                ],
+                "top_risk_flags": top_risk_flags,
+                "status_breakdown": [{"name": k, "count": v} for k, v in status_breakdown.items() if v > 0]
+            },
+            "overrides": self._recent_overrides(session),
+            "advanced": {
+                "financial_scatter": self._financial_scatter(session),
+                "application_trends": sorted(trends, key=lambda x: x["date"]),
+                "risk_level_analysis": {
+                    "breakdown": risk_breakdown,
+                    "processing_time": [{"range": label, "count": time_counts.get(label, 0)} for label, _, _ in PROCESSING_TIME_BUCKETS]
+                }
+            }
+        }
+
+    # --- Rollup source ---
+
+    @staticmethod
+    def _rollup_kpis(session) -> Dict[str, Any]:
+        r = AnalyticsRollup
+        approved = r.final_decision == "Approved"
+        row = session.query(
+            _sum(r.applications).label("total"),
+            _sum(case((approved, r.applications), else_=0)).label("approved"),
+            _sum(case((r.final_decision == "Rejected", r.applications), else_=0)).label("rejected"),
+            _sum(case((approved, r.requested_amount_sum), else_=0)).label("total_exposure"),
+            _sum(r.risk_score_sum).label("risk_score_sum"),
+            _sum(r.risk_score_count).label("risk_score_count"),
+            _sum(r.processing_time_sum).label("processing_time_sum"),
+            _sum(r.processing_time_count).label("processing_time_count"),
+            _sum(r.reviewed).label("reviewed"),
+            _sum(r.agreements).label("agreements"),
+            _sum(r.review_required).label("pending_review"),
+            _sum(r.in_progress).label("processing"),
+        ).one()
+        kpi = dict(row._mapping)
+        kpi["avg_risk_score"] = kpi["risk_score_sum"] / kpi["risk_score_count"] if kpi["risk_score_count"] else None
+        kpi["avg_processing_time"] = kpi["processing_time_sum"] / kpi["processing_time_count"] if kpi["processing_time_count"] else None
+        return kpi
+
+    @staticmethod
+    def _rollup_histogram(session, buckets) -> Dict[str, int]:
+        row = session.query(*[
+            func.coalesce(func.sum(getattr(AnalyticsRollup, column)), 0) for _, _, column in buckets
+        ]).one()
+        return {label: count for (label, _, _), count in zip(buckets, row)}
+
+    @staticmethod
+    def _rollup_loan_types(session) -> Dict[str, int]:
+        rows = (
+            session.query(AnalyticsRollup.loan_type, func.sum(AnalyticsRollup.applications))
+            .group_by(AnalyticsRollup.loan_type)
+            .order_by(AnalyticsRollup.loan_type)
+            .all()
+        )
+        return {loan_type or "Unknown": count for loan_type, count in rows}
+
+    @staticmethod
+    def _rollup_top_risk_flags(session, limit: int = 5) -> List[Dict[str, Any]]:
+        rows = (
+            session.query(RiskFlagRollup.flag, RiskFlagRollup.occurrences)
+            .order_by(RiskFlagRollup.occurrences.desc(), RiskFlagRollup.flag)
+            .limit(limit)
+            .all()
+        )
+        return [{"name": flag, "count": count} for flag, count in rows]
+
+    @staticmethod
+    def _rollup_trends(session) -> List[Tuple]:
+        r = AnalyticsRollup
+        return (
+            session.query(
+                r.day,
+                func.sum(r.applications),
+                func.sum(case((r.final_decision == "Approved", r.applications), else_=0)),
+                func.sum(case((r.final_decision == "Rejected", r.applications), else_=0)),
+            )
+            .group_by(r.day)
+            .all()
+        )
+
+    @staticmethod
+    def _rollup_risk_levels(session) -> Dict[str, Tuple[int, int, int]]:
+        r = AnalyticsRollup
+        rows = (
+            session.query(
+                r.risk_level,
+                func.sum(r.applications),
+                func.sum(case((r.final_decision == "Approved", r.applications), else_=0)),
+                func.sum(case((r.final_decision == "Rejected", r.applications), else_=0)),
+            )
+            .filter(r.risk_level != "")
+            .group_by(r.risk_level)
+            .all()
+        )
+        return {level: (level_total, approved, rejected) for level, level_total, approved, rejected in rows}
+
+    # --- Live source (application table) ---
+
+    @staticmethod
+    def _kpis(session) -> Dict[str, Any]:
+        approved = Application.final_decision == "Approved"
+        reviewed = Application.review_status.in_([ReviewStatus.HUMAN_VERIFIED, ReviewStatus.MANUAL_OVERRIDE])
+        timed = and_(Application.processing_time.isnot(None), Application.processing_time != 0)
+        row = session.query(
+            func.count(Application.id).label("total"),
+            _count_if(approved).label("approved"),
+            _count_if(Application.final_decision == "Rejected").label("rejected"),
+            func.coalesce(func.sum(case((approved, Application.requested_amount), else_=None)), 0).label("total_exposure"),
+            func.avg(Application.risk_score).label("avg_risk_score"),
+            func.avg(case((timed, Application.processing_time), else_=None)).label("avg_processing_time"),
+            _count_if(reviewed).label("reviewed"),
+            _count_if(and_(reviewed, Application.ai_decision.is_not_distinct_from(Application.human_decision))).label("agreements"),
+            _count_if(Application.status == ApplicationStatus.REVIEW_REQUIRED).label("pending_review"),
+            _count_if(Application.status.in_([ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING])).label("processing"),
+        ).one()
+        return dict(row._mapping)
+
+    @staticmethod
+    def _score_distribution(session) -> Dict[str, int]:
+        bucket = case(
+            *[(Application.risk_score <= upper, literal(label)) for label, upper, _ in SCORE_BUCKETS],
+            else_=None,
+        ).label("bucket")
+        return dict(
+            session.query(bucket, func.count(Application.id))
+            .filter(Application.risk_score.isnot(None))
+            .group_by(bucket)
+            .all()
+        )
+
+    @staticmethod
+    def _loan_composition(session) -> Dict[str, int]:
+        # The AI-extracted loan type wins; the loan_type column is the fallback
+        rows = (
+            session.query(Application.loan_type_label, Application.loan_type, func.count(Application.id))
+            .group_by(Application.loan_type_label, Application.loan_type)
+            .all()
+        )
+        loan_types: Dict[str, int] = {}
+        for label, column_value, count in rows:
+            if label:
+                name = label
+            elif column_value:
+                name = column_value.value if hasattr(column_value, "value") else str(column_value)
+            else:
+                name = "Unknown"
+            loan_types[name] = loan_types.get(name, 0) + count
+        return loan_types
+
+    @staticmethod
+    def _top_risk_flags(session, limit: int = 5) -> List[Dict[str, Any]]:
+        count = func.count(ApplicationRiskFlag.id).label("count")
+        rows = (
+            session.query(ApplicationRiskFlag.flag.label("name"), count)
+            .group_by(ApplicationRiskFlag.flag)
+            .order_by(count.desc(), ApplicationRiskFlag.flag)
+            .limit(limit)
+            .all()
+        )
+        return [{"name": row.name, "count": row.count} for row in rows]
+
+    @staticmethod
+    def _recent_overrides(session, limit: int = 5) -> List[Dict[str, Any]]:
+        rows = (
+            session.query(
+                Application.application_id,
+                Application.applicant_name,
+                Application.ai_decision,
+                Application.human_decision,
+                Application.override_reason,
+                Application.reviewed_at,
+                Application.updated_at,
+            )
+            .filter(Application.review_status == ReviewStatus.MANUAL_OVERRIDE)
+            .order_by(func.coalesce(Application.reviewed_at, Application.updated_at).desc())
+            .limit(limit)
+            .all()
+        )
+        return [
+            {
+                "id": row.application_id,
+                "name": row.applicant_name or "Unknown",
+                "ai_decision": row.ai_decision or "N/A",
+                "human_decision": row.human_decision or "N/A",
+                "reason": row.override_reason or "No reason provided",
+                "date": (row.reviewed_at or row.updated_at).strftime("%Y-%m-%d")
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _financial_scatter(session) -> List[Dict[str, Any]]:
+        """Income vs DSR of analysed applications, sampled in SQL to at most ANALYTICS_SCATTER_MAX_POINTS"""
+        has_point = and_(Application.net_income > 0, Application.debt_service_ratio > 0)
+        max_points = max(1, Config().ANALYTICS_SCATTER_MAX_POINTS)
+        total = session.query(func.count(Application.id)).filter(has_point).scalar()
+        # Number only the applications that have a point (rn = 1..total, oldest first)
+        numbered = session.query(
+            Application.net_income,
+            Application.debt_service_ratio,
+            Application.final_decision,
+            Application.applicant_name,
+            Application.application_id,
+            func.row_number().over(order_by=Application.id).label("rn"),
+        ).filter(has_point).subquery()
+        query = session.query(numbered)
+        if total > max_points:
+            # Exactly max_points rows evenly spaced over the whole history, always ending
+            # with the newest: keep rn where floor(rn * max_points / total) steps up
+            query = query.filter(
+                numbered.c.rn * max_points // total > (numbered.c.rn - 1) * max_points // total
+            )
+        rows = query.order_by(numbered.c.rn).all()
+        return [
+            {
+                "income": row.net_income,
+                "dsr": row.debt_service_ratio,
+                "status": row.final_decision or "Pending",
+                "name": row.applicant_name or "Unknown",
+                "id": row.application_id
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def _application_trends(session) -> List[Tuple]:
+        day = func.date(Application.created_at).label("day")
+        rows = (
+            session.query(
+                day,
+                func.count(Application.id).label("total"),
+                _count_if(Application.final_decision == "Approved").label("approved"),
+                _count_if(Application.final_decision == "Rejected").label("rejected"),
+            )
+            .group_by(day)
+            .all()
+        )
+        return [(str(row.day) if row.day is not None else None, row.total, row.approved, row.rejected) for row in rows]
+
+    @staticmethod
+    def _risk_breakdown(session) -> Dict[str, Tuple[int, int, int]]:
+        rows = (
+            session.query(
+                Application.risk_level,
+                func.count(Application.id).label("total"),
+                _count_if(Application.final_decision == "Approved").label("approved"),
+                _count_if(Application.final_decision == "Rejected").label("rejected"),
+            )
+            .filter(Application.risk_level.isnot(None))
+            .group_by(Application.risk_level)
+            .all()
+        )
+        return {row.risk_level.value: (row.total, row.approved, row.rejected) for row in rows}
+
+    @staticmethod
+    def _processing_time_distribution(session) -> Dict[str, int]:
+        bucket = case(
+            *[(Application.processing_time < upper, literal(label)) for label, upper, _ in PROCESSING_TIME_BUCKETS if upper],
+            else_=literal(PROCESSING_TIME_BUCKETS[-1][0]),
+        ).label("bucket")
+        return dict(
+            session.query(bucket, func.count(Application.id))
+            .filter(Application.processing_time.isnot(None), Application.processing_time != 0)
+            .group_by(bucket)
+            .all()
+        )
+
+
+# Singleton instance
+analytics_service = AnalyticsService()
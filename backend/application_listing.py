@@ -0,0 +1,201 @@
+"""
+Application list queries with keyset pagination
+GET /api/applications selects only the columns the list view shows and pages with
+an opaque cursor on (sort column, id) instead of OFFSET, so page 500 costs the
+same index range scan as page one. Filters map to indexed columns.
+"""
+import base64
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from sqlalchemy import and_, exists, or_, tuple_
+
+from database import get_session
+from models import Application, ApplicationRiskFlag, ApplicationStatus, LoanType, ReviewStatus, RiskLevel
+
+SORT_COLUMNS = {
+    "date": Application.created_at,
+    "dsr": Application.debt_service_ratio,
+    "income": Application.net_income,
+    "ndi": Application.net_disposable_income,
+    "score": Application.risk_score,
+}
+
+# Columns the list view needs - analysis_result and other JSON stay on disk
+LIST_COLUMNS = (
+    Application.id,
+    Application.application_id,
+    Application.applicant_name,
+    Application.loan_type_label,
+    Application.loan_type,
+    Application.requested_amount,
+    Application.risk_score,
+    Application.status,
+    Application.final_decision,
+    Application.created_at,
+    Application.review_status,
+    Application.ai_decision,
+    Application.human_decision,
+    Application.highlighted,
+    Application.debt_service_ratio,
+    Application.net_income,
+)
+
+
+def _enum_values(enum_cls: Type[Enum], raw: Optional[str], name: str) -> List[Enum]:
+    """Parse a comma-separated filter of enum values ("Approved,Rejected")"""
+    if not raw:
+        return []
+    values = []
+    for part in raw.split(","):
+        part = part.strip()
+        if part not in enum_cls._value2member_map_:
+            allowed = ", ".join(member.value for member in enum_cls)
+            raise ValueError(f"Unknown {name} '{part}' (expected one of: {allowed})")
+        values.append(enum_cls(part))
+    return values
+
+
+class ApplicationListing:
+    """Builds the filtered, projected, keyset-paginated application list"""
+
+    @staticmethod
+    def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([sort, order, value, row_id]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, cursor_order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise ValueError("Cursor belongs to a different sort order")
+        if sort == "date":
+            value = datetime.fromisoformat(value)
+        return value, int(row_id)
+
+    def list(
+        self,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "date",
+        order: str = "desc",
+        status: Optional[str] = None,
+        review_status: Optional[str] = None,
+        loan_type: Optional[str] = None,
+        risk_level: Optional[str] = None,
+        highlighted: Optional[bool] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        min_dsr: Optional[float] = None,
+        max_dsr: Optional[float] = None,
+        min_income: Optional[float] = None,
+        max_income: Optional[float] = None,
+        risk_flag: Optional[str] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of the application list
+
+        Raises:
+            ValueError: Unknown sort/order/filter value or a malformed cursor
+
+        Returns:
+            (rows for the list view, cursor of the next page or None on the last page)
+        """
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        column = SORT_COLUMNS[sort]
+
+        conditions = []
+        statuses = _enum_values(ApplicationStatus, status, "status")
+        if statuses:
+            conditions.append(Application.status.in_(statuses))
+        review_statuses = _enum_values(ReviewStatus, review_status, "review_status")
+        if review_statuses:
+            conditions.append(Application.review_status.in_(review_statuses))
+        risk_levels = _enum_values(RiskLevel, risk_level, "risk_level")
+        if risk_levels:
+            conditions.append(Application.risk_level.in_(risk_levels))
+        if loan_type:
+            # Matches the displayed type: AI-extracted label, else the loan_type column
+            label_match = Application.loan_type_label == loan_type
+            if loan_type in LoanType._value2member_map_:
+                label_match = or_(label_match, and_(
+                    Application.loan_type_label.is_(None), Application.loan_type == LoanType(loan_type)
+                ))
+            conditions.append(label_match)
+        if highlighted is not None:
+            conditions.append(Application.highlighted == highlighted)
+        if date_from is not None:
+            conditions.append(Application.created_at >= date_from)
+        if date_to is not None:
+            conditions.append(Application.created_at < date_to)
+        if min_dsr is not None:
+            conditions.append(Application.debt_service_ratio >= min_dsr)
+        if max_dsr is not None:
+            conditions.append(Application.debt_service_ratio <= max_dsr)
+        if min_income is not None:
+            conditions.append(Application.net_income >= min_income)
+        if max_income is not None:
+            conditions.append(Application.net_income <= max_income)
+        if sort != "date":
+            # Keyset order needs a value; rows without the metric are not ranked by it
+            conditions.append(column.isnot(None))
+
+        with get_session() as session:
+            if risk_flag:
+                # Correlated EXISTS: walk the sort index and probe (flag, application_id) per row
+                conditions.append(exists().where(
+                    ApplicationRiskFlag.flag == risk_flag, ApplicationRiskFlag.application_id == Application.application_id
+                ))
+            if cursor:
+                value, row_id = self.decode_cursor(cursor, sort, order)
+                key = tuple_(column, Application.id)
+                conditions.append(key > tuple_(value, row_id) if order == "asc" else key < tuple_(value, row_id))
+
+            ordering = (column.asc(), Application.id.asc()) if order == "asc" else (column.desc(), Application.id.desc())
+            rows = (
+                session.query(*LIST_COLUMNS)
+                .filter(*conditions)
+                .order_by(*ordering)
+                .limit(limit + 1)
+                .all()
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]._mapping
+            next_cursor = self.encode_cursor(sort, order, last[column.key], last["id"])
+        return [self._to_item(row) for row in rows], next_cursor
+
+    @staticmethod
+    def _to_item(row) -> Dict[str, Any]:
+        return {
+            "id": row.application_id,
+            "name": row.applicant_name or "Unknown",
+            "type": row.loan_type_label or (row.loan_type.value if hasattr(row.loan_type, 'value') else row.loan_type) or "N/A",
+            "dsr": row.debt_service_ratio,
+            "net_income": row.net_income,
+            "amount": f"RM {row.requested_amount:,.0f}" if row.requested_amount else "N/A",
+            "score": row.risk_score or 0,
+            "status": row.final_decision if row.status == ApplicationStatus.APPROVED else row.status,
+            "date": row.created_at.isoformat(),
+            "review_status": row.review_status.value if row.review_status else "AI Pending",
+            "ai_decision": row.ai_decision,
+            "human_decision": row.human_decision,
+            "highlighted": row.highlighted or False,
+        }
+
+
+# Singleton instance
+application_listing = ApplicationListing()
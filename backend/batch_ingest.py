@@ -0,0 +1,133 @@
+"""
+Streaming ZIP batch ingestion
+Reads the archive's central directory, groups members by applicant folder and
+streams each member straight from the upload into its final application folder -
+no extractall() into a temp tree, no os.walk and no second move. Final paths are
+known from the central directory alone, so the whole batch can be registered up
+front; folders come back in archive order and each applicant is enqueued as soon
+as its files are written, while later folders are still being unpacked. Members
+are SHA-256 hashed while they are copied, for duplicate detection.
+"""
+import hashlib
+import posixpath
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+COPY_BUFFER = 1024 * 1024
+
+# Filename keywords per document slot, checked in this order (first match wins)
+DOCUMENT_KEYWORDS = [
+    ("payslip", ["payslip", "pay slip", "salary", "gaji", "income", "wages", "slip", "pay"]),
+    ("bank", ["bank", "statement", "account", "transaction", "history", "penyata", "txn"]),
+    ("form", ["form", "application", "borang", "apply", "app"]),
+    ("essay", ["essay", "purpose", "reason", "letter", "proposal", "explanation", "tujuan"]),
+]
+MAX_SUPPORTING_DOCS = 3
+
+
+def classify_document(filename: str) -> Optional[str]:
+    """Document slot (payslip/bank/form/essay) for a filename, or None for a supporting doc"""
+    lower_name = filename.lower()
+    for slot, keywords in DOCUMENT_KEYWORDS:
+        if any(k in lower_name for k in keywords):
+            return slot
+    return None
+
+
+@dataclass
+class ApplicantFolder:
+    """Members of one applicant folder in the archive, by document slot"""
+    name: str
+    form: Optional[zipfile.ZipInfo] = None
+    bank: Optional[zipfile.ZipInfo] = None
+    essay: Optional[zipfile.ZipInfo] = None
+    payslip: Optional[zipfile.ZipInfo] = None
+    supporting: List[zipfile.ZipInfo] = field(default_factory=list)
+    first_offset: int = 0  # Position in the archive, for sequential reads
+
+
+class ZipBatchIngestor:
+    """Plans and streams the applicant folders of a batch ZIP"""
+
+    @staticmethod
+    def plan(archive: zipfile.ZipFile) -> List[ApplicantFolder]:
+        """
+        Group archive members by their parent folder using only the central directory
+
+        Files at the archive root, directories, macOS metadata (__MACOSX/, ._*) are skipped.
+
+        Returns:
+            Applicant folders ordered by their position in the archive
+        """
+        folders: Dict[str, ApplicantFolder] = {}
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            parent, filename = posixpath.split(info.filename)
+            if not parent or not filename or filename.startswith("._"):
+                continue
+            if "__MACOSX" in parent.split("/"):
+                continue
+            folder = folders.get(parent)
+            if folder is None:
+                folder = folders[parent] = ApplicantFolder(name=posixpath.basename(parent), first_offset=info.header_offset)
+            folder.first_offset = min(folder.first_offset, info.header_offset)
+
+            slot = classify_document(filename)
+            if slot:
+                setattr(folder, slot, info)  # A later match replaces an earlier one
+            elif len(folder.supporting) < MAX_SUPPORTING_DOCS:
+                folder.supporting.append(info)
+        return sorted(folders.values(), key=lambda f: f.first_offset)
+
+    @staticmethod
+    def target_paths(folder: ApplicantFolder, destination: Path) -> Dict[str, object]:
+        """
+        Final path of each of a folder's members under destination (nothing is written)
+
+        Returns:
+            {"form", "bank", "essay", "payslip": path or None, "supporting": [paths]}
+        """
+        def target(info: Optional[zipfile.ZipInfo]) -> Optional[str]:
+            # Basename only - no path traversal
+            return str(destination / posixpath.basename(info.filename)) if info is not None else None
+
+        return {
+            "form": target(folder.form),
+            "bank": target(folder.bank),
+            "essay": target(folder.essay),
+            "payslip": target(folder.payslip),
+            "supporting": [target(info) for info in folder.supporting],
+        }
+
+    def write_folder(self, archive: zipfile.ZipFile, folder: ApplicantFolder, destination: Path) -> Dict[str, str]:
+        """
+        Stream one folder's members into destination (created if needed), hashing them on the way
+
+        Returns:
+            SHA-256 per document label (application_form, bank_statement, essay, payslip, supporting_doc_N)
+        """
+        destination.mkdir(parents=True, exist_ok=True)
+        paths = self.target_paths(folder, destination)
+        documents = [
+            ("application_form", folder.form, paths["form"]),
+            ("bank_statement", folder.bank, paths["bank"]),
+            ("essay", folder.essay, paths["essay"]),
+            ("payslip", folder.payslip, paths["payslip"]),
+        ] + [(f"supporting_doc_{i + 1}", info, path) for i, (info, path) in enumerate(zip(folder.supporting, paths["supporting"]))]
+        hashes = {}
+        for label, info, target in documents:
+            if info is None:
+                continue
+            digest = hashlib.sha256()
+            with archive.open(info) as source, open(target, "wb") as out:
+                for chunk in iter(lambda: source.read(COPY_BUFFER), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+            hashes[label] = digest.hexdigest()
+        return hashes
+
+# Singleton instance
+zip_ingestor = ZipBatchIngestor()
@@ -0,0 +1,87 @@
+"""
+Bulk status lookups for many applications or a whole upload batch
+One indexed query (application_id IN (...) or batch_id = ?) selects only the status
+columns; per-stage progress and batch completion counters are aggregated from
+the same rows, so a batch of hundreds costs one round trip instead of one per ID.
+"""
+from typing import Any, Dict, List, Optional
+
+from database import get_session
+from event_bus import STATUS_COLUMNS, status_snapshot
+from models import Application, ApplicationStatus, ProcessingStage
+
+MAX_IDS = 1000  # Per request; larger sets should be looked up by batch ID
+DONE_STATUSES = {ApplicationStatus.APPROVED, ApplicationStatus.REJECTED, ApplicationStatus.REVIEW_REQUIRED}
+
+
+def _outcome(row) -> str:
+    """completed | failed | in_progress for batch counters"""
+    if row.status == ApplicationStatus.FAILED or row.processing_stage == ProcessingStage.FAILED:
+        return "failed"
+    if row.processing_stage == ProcessingStage.COMPLETED or row.status in DONE_STATUSES:
+        return "completed"
+    return "in_progress"
+
+
+class BatchStatusService:
+    """Status of a set of applications plus aggregated progress"""
+
+    def lookup(self, application_ids: Optional[List[str]] = None, batch_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Status of the given applications, or of every application in a batch
+
+        Raises:
+            ValueError: Neither / both selectors given, or too many IDs
+
+        Returns:
+            {"batch_id", "applications": [...], "missing": [...], "summary": {...}}
+        """
+        if bool(application_ids) == bool(batch_id):
+            raise ValueError("Provide either application_ids or batch_id")
+        if application_ids and len(application_ids) > MAX_IDS:
+            raise ValueError(f"At most {MAX_IDS} application IDs per request")
+
+        with get_session() as session:
+            query = session.query(*STATUS_COLUMNS)
+            if batch_id:
+                query = query.filter(Application.batch_id == batch_id)
+            else:
+                query = query.filter(Application.application_id.in_(set(application_ids)))
+            rows = query.order_by(Application.id).all()
+
+        missing = []
+        if application_ids:
+            found = {row.application_id for row in rows}
+            missing = [application_id for application_id in dict.fromkeys(application_ids) if application_id not in found]
+        return {
+            "batch_id": batch_id,
+            "applications": [status_snapshot(row) for row in rows],
+            "missing": missing,
+            "summary": self.summarize(rows),
+        }
+
+    @staticmethod
+    def summarize(rows) -> Dict[str, Any]:
+        by_stage = {stage.value: 0 for stage in ProcessingStage}
+        by_status: Dict[str, int] = {}
+        outcomes = {"completed": 0, "failed": 0, "in_progress": 0}
+        for row in rows:
+            if row.processing_stage is not None:
+                by_stage[row.processing_stage.value] += 1
+            status = row.status.value if row.status else "Unknown"
+            by_status[status] = by_status.get(status, 0) + 1
+            outcomes[_outcome(row)] += 1
+        total = len(rows)
+        finished = outcomes["completed"] + outcomes["failed"]
+        return {
+            "total": total,
+            **outcomes,
+            "percent_complete": round(finished / total * 100, 1) if total else 0,
+            "done": total > 0 and finished == total,
+            "by_stage": by_stage,
+            "by_status": by_status,
+        }
+
+
+# Singleton instance
+batch_status = BatchStatusService()
@@ -0,0 +1,88 @@
+"""
+Benchmark batch registration: one transaction per applicant vs bulk registration.
+Builds a throwaway SQLite database and registers the same synthetic batch twice:
+first the way /api/upload/batch used to (a session, commit and enqueue per
+applicant), then through batch_registry.register + job_queue.enqueue_many.
+
+Usage: python benchmark_batch_registration.py [--applicants 1000] [--keep]
+  --applicants  applications per batch
+  --keep        keep the generated database file
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix="trustlens_bench_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"  # Never touch the real database
+
+from database import engine, get_session, init_db  # noqa: E402
+from models import Application, ApplicationStatus, LoanType  # noqa: E402
+from batch_registration import batch_registry  # noqa: E402
+from job_queue import job_queue  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def applications(prefix: str, batch_id: str, count: int):
+    return [
+        Application(
+            application_id=f"APP-{prefix}{i:06d}",
+            applicant_name=f"Applicant {i}",
+            loan_type=LoanType.PERSONAL,
+            requested_amount=50000.0,
+            status=ApplicationStatus.PROCESSING,
+            batch_id=batch_id,
+            bank_statement_path=f"uploads/APP-{prefix}{i:06d}/bank_statement.pdf",
+        )
+        for i in range(count)
+    ]
+
+
+def per_applicant(count: int) -> float:
+    """Previous behaviour: a session + commit, then an enqueue commit, per applicant"""
+    start = time.perf_counter()
+    for app in applications("A", "BATCH-PER-ROW", count):
+        app_id = app.application_id
+        with get_session() as session:
+            session.add(app)
+            session.commit()
+        job_queue.enqueue(app_id)
+    return time.perf_counter() - start
+
+
+def bulk(count: int) -> float:
+    """Chunked bulk registration plus one enqueue transaction per chunk"""
+    chunk = Config().BATCH_INSERT_CHUNK
+    apps = applications("B", "BATCH-BULK", count)
+    app_ids = [app.application_id for app in apps]
+    start = time.perf_counter()
+    batch_registry.register("BATCH-BULK", "benchmark.zip", "zip", apps)
+    for offset in range(0, len(app_ids), chunk):
+        job_queue.enqueue_many(app_ids[offset:offset + chunk])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch application registration")
+    parser.add_argument("--applicants", type=int, default=1000)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    init_db()
+    before = per_applicant(args.applicants)
+    after = bulk(args.applicants)
+
+    print(f"\n=== Registering {args.applicants} applicants ({_db_path}) ===")
+    print(f"{'per-applicant commits':<24} {before * 1000:>10.1f} ms")
+    print(f"{'bulk registration':<24} {after * 1000:>10.1f} ms   ({before / max(after, 1e-6):.1f}x)")
+
+    engine.dispose()
+    if not args.keep:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_db_path + suffix):
+                os.remove(_db_path + suffix)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
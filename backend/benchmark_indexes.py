@@ -0,0 +1,213 @@
+"""
+Benchmark the application/audit-log indexes on a synthetic dataset.
+Builds a throwaway SQLite database, runs the queries behind the list, navigation,
+stats and analytics endpoints with only the original indexes (application_id,
+auditlog.timestamp), then again with the full index set, and prints the query
+plan and median latency of each.
+
+Usage: python benchmark_indexes.py [--rows 100000] [--repeat 20] [--keep]
+  --rows    synthetic applications to generate (audit logs: 2 per application)
+  --repeat  runs per query; the median is reported
+  --keep    keep the generated database file
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+_db_path = os.path.join(tempfile.mkdtemp(prefix="trustlens_bench_"), "bench.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_path}"  # Never touch the real database
+
+from sqlalchemy import exists, func, select, text, tuple_  # noqa: E402
+
+from database import engine, init_db  # noqa: E402
+from models import (  # noqa: E402
+    Application, ApplicationRiskFlag, ApplicationStatus, AuditLog, LoanType, ReviewStatus, RiskLevel
+)
+from application_listing import LIST_COLUMNS  # noqa: E402
+
+BENCHMARK_TABLES = ("application", "auditlog", "applicationriskflag")
+# Indexes kept in the "before" run: the original application/audit-log indexes, plus the
+# risk flag side table's own single-column indexes (it never existed without them)
+BASELINE_INDEXES = {
+    "ix_application_application_id", "ix_auditlog_timestamp",
+    "ix_applicationriskflag_application_id", "ix_applicationriskflag_flag",
+}
+FLAGS = ["High DSR", "Irregular Income", "Gambling Activity", "Cash Deposits", "Overdraft", "Crypto Activity"]
+
+
+def generate(rows: int):
+    """Insert synthetic applications, audit logs and risk flags with Core bulk inserts"""
+    rng = random.Random(42)
+    start_date = datetime(2024, 1, 1)
+    decisions = {
+        ApplicationStatus.APPROVED: "Approved",
+        ApplicationStatus.REJECTED: "Rejected",
+        ApplicationStatus.REVIEW_REQUIRED: "Review Required",
+    }
+    statuses = list(decisions) * 6 + [ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING, ApplicationStatus.FAILED]
+    padding = "x" * 400  # Keep rows roughly the size of a real analysis summary
+
+    apps, logs, flags = [], [], []
+    for i in range(rows):
+        application_id = f"APP-{i:08d}"
+        created_at = start_date + timedelta(seconds=rng.randint(0, 730 * 86400))
+        status = rng.choice(statuses)
+        apps.append({
+            "application_id": application_id,
+            "applicant_name": f"Applicant {i}",
+            "loan_type": rng.choice(list(LoanType)),
+            "requested_amount": float(rng.randint(5, 500) * 1000),
+            "status": status,
+            "risk_score": rng.randint(0, 100),
+            "risk_level": rng.choice(list(RiskLevel)),
+            "final_decision": decisions.get(status),
+            "review_status": rng.choice(list(ReviewStatus)),
+            "highlighted": rng.random() < 0.05,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "processing_time": rng.uniform(10, 90),
+            "debt_service_ratio": rng.uniform(5, 90),
+            "net_income": rng.uniform(1500, 25000),
+            "analysis_result": {"summary": padding},
+            "decision_history": [],
+            "hot_fields_version": 1,
+        })
+        for n in range(2):
+            logs.append({
+                "timestamp": created_at + timedelta(minutes=n * 5),
+                "user": "System",
+                "action": "Analysed" if n == 0 else "Reviewed",
+                "details": f"Synthetic event {n}",
+                "application_id": application_id,
+            })
+        for flag in rng.sample(FLAGS, rng.randint(0, 2)):
+            flags.append({"application_id": application_id, "flag": flag, "severity": "High"})
+
+    with engine.begin() as conn:
+        for table, data in ((Application.__table__, apps), (AuditLog.__table__, logs), (ApplicationRiskFlag.__table__, flags)):
+            for offset in range(0, len(data), 5000):
+                conn.execute(table.insert(), data[offset:offset + 5000])
+
+
+def benchmark_queries():
+    """(name, statement) pairs mirroring the endpoints' queries"""
+    with engine.connect() as conn:
+        total = conn.execute(select(func.count()).select_from(Application)).scalar()
+        deep = conn.execute(
+            select(Application.created_at, Application.id, Application.application_id)
+            .order_by(Application.created_at.desc(), Application.id.desc())
+            .offset(int(total * 0.9)).limit(1)
+        ).first()
+
+    newest_first = (Application.created_at.desc(), Application.id.desc())
+    return [
+        ("list: first page", select(*LIST_COLUMNS).order_by(*newest_first).limit(51)),
+        ("list: page at 90% depth (keyset)", select(*LIST_COLUMNS).where(
+            tuple_(Application.created_at, Application.id) < tuple_(deep.created_at, deep.id)
+        ).order_by(*newest_first).limit(51)),
+        ("list: status filter", select(*LIST_COLUMNS).where(
+            Application.status == ApplicationStatus.REVIEW_REQUIRED
+        ).order_by(*newest_first).limit(51)),
+        ("list: review_status filter", select(*LIST_COLUMNS).where(
+            Application.review_status == ReviewStatus.MANUAL_OVERRIDE
+        ).order_by(*newest_first).limit(51)),
+        ("list: highlighted", select(*LIST_COLUMNS).where(
+            Application.highlighted == True  # noqa: E712
+        ).order_by(*newest_first).limit(51)),
+        ("list: risk flag filter", select(*LIST_COLUMNS).where(exists().where(
+            ApplicationRiskFlag.flag == "Gambling Activity", ApplicationRiskFlag.application_id == Application.application_id
+        )).order_by(*newest_first).limit(51)),
+        ("navigate: next", select(Application.application_id).where(
+            Application.created_at < deep.created_at
+        ).order_by(Application.created_at.desc()).limit(1)),
+        ("stats: count by status", select(func.count(Application.id)).where(
+            Application.status == ApplicationStatus.APPROVED
+        )),
+        ("analytics: risk level breakdown", select(
+            Application.risk_level, Application.final_decision, func.count(Application.id)
+        ).where(Application.risk_level.isnot(None)).group_by(Application.risk_level, Application.final_decision)),
+        ("analytics: review status counts", select(Application.review_status, func.count(Application.id))
+            .group_by(Application.review_status)),
+        ("audit log: by application", select(AuditLog).where(
+            AuditLog.application_id == deep.application_id
+        ).order_by(AuditLog.timestamp.desc())),
+    ]
+
+
+def query_plan(conn, statement) -> str:
+    compiled = statement.compile(engine, compile_kwargs={"literal_binds": True})
+    rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+
+def run(label: str, queries, repeat: int):
+    results = {}
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        for name, statement in queries:
+            conn.execute(statement).fetchall()  # Warm the page cache
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                conn.execute(statement).fetchall()
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = (statistics.median(timings), query_plan(conn, statement))
+    print(f"\n=== {label} ===")
+    for name, (ms, plan) in results.items():
+        print(f"{name:<34} {ms:>9.2f} ms   {plan}")
+    return results
+
+
+def index_definitions():
+    """name -> CREATE INDEX statement of every explicit index on the benchmarked tables"""
+    tables = ", ".join(f"'{table}'" for table in BENCHMARK_TABLES)
+    with engine.connect() as conn:
+        rows = conn.execute(text(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({tables})"
+        )).fetchall()
+    return {name: sql for name, sql in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark application indexes on synthetic data")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    init_db()
+    start = time.perf_counter()
+    generate(args.rows)
+    print(f"✓ Generated {args.rows} applications in {time.perf_counter() - start:.1f}s ({_db_path})")
+
+    definitions = index_definitions()
+    added = {name: sql for name, sql in definitions.items() if name not in BASELINE_INDEXES}
+    with engine.begin() as conn:
+        for name in added:
+            conn.execute(text(f"DROP INDEX {name}"))
+    queries = benchmark_queries()
+    before = run("Before: original indexes only", queries, args.repeat)
+
+    with engine.begin() as conn:
+        for sql in added.values():
+            conn.execute(text(sql))
+    after = run(f"After: {len(added)} added indexes", queries, args.repeat)
+
+    print("\n=== Speed-up ===")
+    for name in before:
+        print(f"{name:<34} {before[name][0]:>9.2f} ms -> {after[name][0]:>8.2f} ms  ({before[name][0] / max(after[name][0], 1e-6):.1f}x)")
+
+    engine.dispose()
+    if not args.keep:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(_db_path + suffix):
+                os.remove(_db_path + suffix)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -20,15 +20,59 @@ class Config:
     # Database
     DB_URL: str = 'sqlite:///trustlens.db'
     DB_ECHO: bool = False
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))  # Persistent connections per process
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))  # Extra connections under burst load
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # PostgreSQL: reconnect connections older than this (s)
+    DB_LOCK_RETRIES: int = int(os.getenv("DB_LOCK_RETRIES", "5"))  # Retries of a unit of work on "database is locked"
+    DB_LOCK_RETRY_BACKOFF: float = float(os.getenv("DB_LOCK_RETRY_BACKOFF", "0.05"))  # Seconds, doubled per attempt
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))  # Wait for a lock before failing
+    SQLITE_CACHE_SIZE_MB: int = int(os.getenv("SQLITE_CACHE_SIZE_MB", "64"))  # Page cache per connection
+    SQLITE_MMAP_SIZE_MB: int = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))  # Memory-mapped I/O window
     
     # File Upload
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_EXTENSIONS: tuple = ('.pdf', '.txt', '.doc', '.docx')
+    UPLOAD_STAGING_DIR: str = os.getenv("UPLOAD_STAGING_DIR", "./upload_staging")  # Resumable batch uploads being assembled
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))  # Bytes per resumable upload chunk
+    MAX_BATCH_UPLOAD_SIZE: int = int(os.getenv("MAX_BATCH_UPLOAD_SIZE", str(2 * 1024 ** 3)))  # 2GB per batch archive
+    DUPLICATE_REUSE_ANALYSIS: bool = os.getenv("DUPLICATE_REUSE_ANALYSIS", "true").lower() == "true"  # Identical resubmissions reuse the original's analysis
+    UPLOAD_SESSION_TTL_HOURS: int = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24"))  # Unfinished sessions are removed after this
     
+    # Background Processing (durable job queue)
+    WORKER_COUNT: int = int(os.getenv("WORKER_COUNT", "4"))  # Concurrent jobs per API process
+    EXTRACTION_CONCURRENCY: int = int(os.getenv("EXTRACTION_CONCURRENCY", "2"))  # Jobs extracting PDFs at once
+    EXTRACTION_THREADS: int = int(os.getenv("EXTRACTION_THREADS", "8"))  # Documents extracted in parallel
+    PDF_PROCESS_WORKERS: int = int(os.getenv("PDF_PROCESS_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))  # 0 = extract in threads
+    OCR_THREADS: int = int(os.getenv("OCR_THREADS", "4"))  # Pages OCR'd at once when not using the process pool
+    OCR_MIN_DPI: int = int(os.getenv("OCR_MIN_DPI", "200"))  # Scanned pages are never rendered below this
+    OCR_MAX_DPI: int = int(os.getenv("OCR_MAX_DPI", "300"))  # ...or above this
+    OCR_MAX_MEGAPIXELS: int = int(os.getenv("OCR_MAX_MEGAPIXELS", "25"))  # Caps DPI for oversized pages
+    EXTRACTION_CACHE_MAX_MB: int = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "256"))  # LRU-evicted above this size
+    ANALYSIS_CACHE_TTL_HOURS: int = int(os.getenv("ANALYSIS_CACHE_TTL_HOURS", "168"))  # Cached Gemini results expire after 7 days
+    ANALYSIS_CACHE_MAX_ENTRIES: int = int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "5000"))  # LRU-evicted above this count
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))  # Gemini calls in flight across the process
+    LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))  # Request token bucket
+    LLM_TOKENS_PER_MINUTE: int = int(os.getenv("LLM_TOKENS_PER_MINUTE", "1000000"))  # Input + output token bucket
+    LLM_OUTPUT_TOKEN_RESERVE: int = int(os.getenv("LLM_OUTPUT_TOKEN_RESERVE", "8192"))  # Reserved per call, settled from usage
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "6"))  # Retries on 429/5xx/timeouts per call
+    LLM_BACKOFF_BASE: float = float(os.getenv("LLM_BACKOFF_BASE", "2.0"))  # Seconds, doubled per attempt (full jitter)
+    LLM_BACKOFF_MAX: float = float(os.getenv("LLM_BACKOFF_MAX", "60.0"))  # Backoff cap in seconds
+    JOB_LEASE_SECONDS: int = int(os.getenv("JOB_LEASE_SECONDS", "120"))  # Lease is renewed while a job runs
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # Claims before a job is marked failed
+    JOB_RETRY_BACKOFF: float = float(os.getenv("JOB_RETRY_BACKOFF", "30.0"))  # Seconds before a failed job is retried, doubled per attempt
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "2.0"))  # Idle worker poll interval (seconds)
+    BATCH_INSERT_CHUNK: int = int(os.getenv("BATCH_INSERT_CHUNK", "500"))  # Applications per registration transaction
+    BATCH_ENQUEUE_INTERVAL: float = float(os.getenv("BATCH_ENQUEUE_INTERVAL", "0.5"))  # Streamed ZIP folders are enqueued in groups at most this often
+
+    # Analytics
+    ANALYTICS_SCATTER_MAX_POINTS: int = int(os.getenv("ANALYTICS_SCATTER_MAX_POINTS", "500"))  # Income vs DSR points sampled per request
+
     # API Configuration
     CORS_ORIGINS: List[str] = field(default_factory=lambda: ["http://localhost:3000", "http://127.0.0.1:3000"])
     REQUEST_TIMEOUT: int = 30
+    SSE_KEEPALIVE_SECONDS: int = 15  # Idle SSE streams get a comment line this often
     
     # Default Values
     DEFAULT_REVIEWER: str = "Credit Officer"
@@ -0,0 +1,96 @@
+"""
+Compressed store for extracted document texts
+The full texts of an application's documents (hundreds of KB) live in the
+ApplicationDocumentTexts table instead of inside Application.analysis_result,
+so list views, status polls and analytics never load them. Only the endpoints
+that show or reason over the texts (application detail, copilot, analyze-stream)
+read them, by application ID.
+"""
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm.attributes import flag_modified
+
+from database import get_session, json_has_key
+from models import Application, ApplicationDocumentTexts
+
+COMPRESSION_LEVEL = 6
+
+
+class DocumentTextStore:
+    """Save/load/delete document texts keyed by application ID"""
+
+    @staticmethod
+    def _pack(texts: Dict[str, Any]):
+        raw = json.dumps(texts, ensure_ascii=False).encode("utf-8")
+        return zlib.compress(raw, COMPRESSION_LEVEL), len(raw)
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def save(self, session, application_id: str, texts: Optional[Dict[str, Any]]):
+        """
+        Store (or replace) an application's texts inside the caller's transaction
+
+        Args:
+            session: Open session that also writes the analysis result
+            application_id: Application the texts belong to
+            texts: Mapping as produced by AIEngine (bank_statement, essay, payslip, ...)
+        """
+        if texts is None:
+            return
+        compressed, raw_bytes = self._pack(texts)
+        row = session.query(ApplicationDocumentTexts).filter(
+            ApplicationDocumentTexts.application_id == application_id
+        ).first()
+        if row is None:
+            row = ApplicationDocumentTexts(application_id=application_id, compressed=compressed)
+        row.compressed = compressed
+        row.raw_bytes = raw_bytes
+        row.compressed_bytes = len(compressed)
+        row.updated_at = datetime.utcnow()
+        session.add(row)
+
+    def load(self, application_id: str) -> Optional[Dict[str, Any]]:
+        """Texts of one application, or None if none were stored"""
+        with get_session() as session:
+            blob = session.query(ApplicationDocumentTexts.compressed).filter(
+                ApplicationDocumentTexts.application_id == application_id
+            ).scalar()
+        return self._unpack(blob) if blob is not None else None
+
+    def delete(self, session, application_id: str):
+        session.query(ApplicationDocumentTexts).filter(
+            ApplicationDocumentTexts.application_id == application_id
+        ).delete(synchronize_session=False)
+
+    def migrate_legacy(self, batch_size: int = 100) -> int:
+        """
+        Move document_texts embedded in existing analysis_result rows into the store
+
+        Returns:
+            Number of applications migrated
+        """
+        has_texts = json_has_key(Application.analysis_result, "document_texts")
+        migrated = 0
+        while True:
+            with get_session() as session:
+                apps = session.query(Application).filter(has_texts).limit(batch_size).all()
+                if not apps:
+                    break
+                for app in apps:
+                    texts = app.analysis_result.pop("document_texts", None)
+                    self.save(session, app.application_id, texts)
+                    flag_modified(app, "analysis_result")
+                    session.add(app)
+                migrated += len(apps)
+        if migrated:
+            print(f"✓ Moved document texts of {migrated} applications out of analysis_result")
+        return migrated
+
+
+# Singleton instance
+document_store = DocumentTextStore()
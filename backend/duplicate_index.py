@@ -0,0 +1,257 @@
+"""
+Duplicate document and duplicate applicant detection
+Every uploaded document's SHA-256 is recorded in DocumentFingerprint and every
+applicant IC is stored normalized (digits only) in Application.applicant_ic_normalized,
+at upload time and again after extraction/analysis. Detection is a pair of indexed
+lookups per application - never a scan:
+  - documents whose hash already belongs to another application (same bank
+    statement, payslip, ... submitted again, possibly under another name)
+  - other applications with the same normalized IC
+Matches are stored on the application (duplicate_matches) for reviewers and
+fraud checks. A resubmission whose whole document set is identical to an
+already-analysed application is linked to it (duplicate_of), and the job reuses
+that analysis instead of paying for extraction and the LLM again.
+"""
+import copy
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import bindparam, func, update
+
+from analysis_fields import analysis_field_index
+from config import Config
+from database import get_session, retry_on_lock
+from document_store import document_store
+from models import Application, ApplicationStatus, DocumentFingerprint, ProcessingStage
+from transaction_store import transaction_store
+
+MIN_IC_DIGITS = 6  # Shorter values are placeholders ("N/A", "-") or OCR noise
+ANALYSED_STATUSES = (ApplicationStatus.APPROVED, ApplicationStatus.REJECTED, ApplicationStatus.REVIEW_REQUIRED)
+# Analysis outputs copied from the original of an exact duplicate
+# (the decision is rebuilt from ai_decision so a reviewer's override is never inherited)
+REUSED_FIELDS = (
+    "applicant_name", "applicant_ic", "applicant_ic_normalized", "loan_type", "requested_amount",
+    "risk_score", "risk_level", "loan_type_label", "debt_service_ratio",
+    "net_income", "net_disposable_income", "hot_fields_version",
+)
+# Status an analysis run gives each AI decision
+DECISION_STATUS = {
+    "Approved": ApplicationStatus.APPROVED,
+    "Rejected": ApplicationStatus.REJECTED,
+    "Review Required": ApplicationStatus.REVIEW_REQUIRED,
+}
+
+
+def normalize_ic(value: Optional[str]) -> Optional[str]:
+    """Digits of an IC number ("900101-01-1234" -> "900101011234"), or None for placeholders"""
+    digits = re.sub(r"\D", "", value or "")
+    return digits if len(digits) >= MIN_IC_DIGITS else None
+
+
+class DuplicateIndex:
+    """Records fingerprints / normalized ICs and finds duplicates by indexed lookup"""
+
+    def __init__(self):
+        self.config = Config()
+
+    @staticmethod
+    def record_documents(session, application_id: str, hashes: Dict[str, Optional[str]]):
+        """Add fingerprints for documents of an application that are not recorded yet (caller commits)"""
+        hashes = {label: digest for label, digest in hashes.items() if digest}
+        if not hashes:
+            return
+        known = {
+            row.label for row in session.query(DocumentFingerprint.label).filter(
+                DocumentFingerprint.application_id == application_id
+            ).all()
+        }
+        for label, digest in hashes.items():
+            if label not in known:
+                session.add(DocumentFingerprint(application_id=application_id, label=label, content_hash=digest))
+
+    @staticmethod
+    def find_matches(session, application_id: str, hashes: Dict[str, Optional[str]], ic_normalized: Optional[str]) -> List[Dict[str, Any]]:
+        """Other applications sharing a document hash or the normalized IC"""
+        matches = []
+        by_hash = {digest: label for label, digest in hashes.items() if digest}
+        if by_hash:
+            rows = session.query(
+                DocumentFingerprint.content_hash, DocumentFingerprint.application_id, DocumentFingerprint.label
+            ).filter(
+                DocumentFingerprint.content_hash.in_(list(by_hash)),
+                DocumentFingerprint.application_id != application_id,
+            ).order_by(DocumentFingerprint.id).all()
+            for row in rows:
+                matches.append({
+                    "type": "document",
+                    "document": by_hash[row.content_hash],
+                    "application_id": row.application_id,
+                    "matched_document": row.label,
+                })
+        if ic_normalized:
+            rows = session.query(Application.application_id).filter(
+                Application.applicant_ic_normalized == ic_normalized,
+                Application.application_id != application_id,
+            ).order_by(Application.id).all()
+            matches.extend({"type": "ic", "application_id": row.application_id} for row in rows)
+        return matches
+
+    @staticmethod
+    def exact_duplicate_of(session, application_id: str, hashes: Dict[str, Optional[str]]) -> Optional[str]:
+        """Earliest analysed application whose fingerprints are exactly this document set"""
+        digests = sorted({digest for digest in hashes.values() if digest})
+        if not digests:
+            return None
+        candidates = session.query(DocumentFingerprint.application_id).filter(
+            DocumentFingerprint.content_hash.in_(digests),
+            DocumentFingerprint.application_id != application_id,
+        ).group_by(DocumentFingerprint.application_id).having(
+            func.count(func.distinct(DocumentFingerprint.content_hash)) == len(digests)
+        ).all()
+        if not candidates:
+            return None
+        for row in session.query(Application.application_id).filter(
+            Application.application_id.in_([c.application_id for c in candidates]),
+            Application.status.in_(ANALYSED_STATUSES),
+            Application.duplicate_of.is_(None),
+        ).order_by(Application.id).all():
+            fingerprints = session.query(DocumentFingerprint.content_hash).filter(
+                DocumentFingerprint.application_id == row.application_id
+            ).all()
+            if sorted({f.content_hash for f in fingerprints}) == digests:
+                return row.application_id
+        return None
+
+    def check(self, session, app: Application, hashes: Dict[str, Optional[str]]) -> List[Dict[str, Any]]:
+        """
+        Record an application's fingerprints / normalized IC and refresh its duplicate findings (caller commits)
+
+        Returns:
+            duplicate_matches of the application
+        """
+        app.applicant_ic_normalized = normalize_ic(app.applicant_ic)
+        self.record_documents(session, app.application_id, hashes)
+        matches = self.find_matches(session, app.application_id, hashes, app.applicant_ic_normalized)
+        app.duplicate_matches = matches or None
+        if app.duplicate_of is None and app.status in (ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING):
+            app.duplicate_of = self.exact_duplicate_of(session, app.application_id, hashes)
+        session.add(app)
+        if matches:
+            print(f"⚠ {app.application_id}: {len(matches)} duplicate match(es)"
+                  + (f", exact resubmission of {app.duplicate_of}" if app.duplicate_of else ""))
+        return matches
+
+    @retry_on_lock
+    def check_many(self, entries: Dict[str, Dict[str, Optional[str]]]):
+        """
+        check() for many freshly registered applications in one transaction (batch uploads)
+
+        Args:
+            entries: application_id -> document hashes (streamed ZIP members are hashed only
+                     after registration, so they are stored as document_hashes here too)
+        """
+        if not entries:
+            return
+        with get_session() as session:
+            apps = session.query(Application).filter(Application.application_id.in_(list(entries))).all()
+            for app in apps:
+                hashes = entries[app.application_id]
+                if hashes and not app.document_hashes:
+                    app.document_hashes = hashes
+                self.check(session, app, hashes)
+            session.commit()
+
+    def reuse_analysis(self, application_id: str) -> bool:
+        """
+        Complete an exact duplicate from its original's analysis
+
+        Returns:
+            True if the analysis was reused (the job is done), False to process normally
+        """
+        if not self.config.DUPLICATE_REUSE_ANALYSIS:
+            return False
+        with get_session() as session:
+            app = session.query(Application).filter(Application.application_id == application_id).first()
+            if app is None or not app.duplicate_of:
+                return False
+            original = session.query(Application).filter(Application.application_id == app.duplicate_of).first()
+            if original is None or original.analysis_result is None or original.status not in ANALYSED_STATUSES:
+                return False
+            original_id = original.application_id
+        texts = document_store.load(original_id)
+        statement = transaction_store.load(original_id)
+
+        with get_session() as session:
+            app = session.query(Application).filter(Application.application_id == application_id).first()
+            original = session.query(Application).filter(Application.application_id == original_id).first()
+            if app is None or original is None:
+                return False
+            for field in REUSED_FIELDS:
+                setattr(app, field, getattr(original, field))
+            decision = original.ai_decision or "Review Required"
+            app.ai_decision = app.final_decision = decision
+            app.status = DECISION_STATUS.get(decision, ApplicationStatus.REVIEW_REQUIRED)
+            app.analysis_result = copy.deepcopy(original.analysis_result)
+            app.analysis_result["reused_from"] = original_id
+            document_store.save(session, application_id, texts)
+            transaction_store.save(session, application_id, statement, (app.document_hashes or {}).get("bank_statement"))
+            analysis_field_index.apply(session, app)
+            app.processing_time = 0.0
+            app.updated_at = datetime.utcnow()
+            app.processing_stage = ProcessingStage.COMPLETED
+            app.stage_updated_at = app.updated_at
+            app.decision_history = [{
+                "timestamp": app.updated_at.isoformat(),
+                "actor": "AI System",
+                "action": f"Recommended '{app.final_decision}'",
+                "details": f"Identical documents to {original_id}; its analysis was reused (Risk Score: {app.risk_score})",
+                "reason": None,
+            }]
+            session.add(app)
+            session.commit()
+        print(f"♻ {application_id}: reused analysis of identical submission {original_id}")
+        return True
+
+    @staticmethod
+    def delete(session, application_id: str):
+        session.query(DocumentFingerprint).filter(
+            DocumentFingerprint.application_id == application_id
+        ).delete(synchronize_session=False)
+
+    def backfill(self, batch_size: int = 1000) -> int:
+        """
+        Fill applicant_ic_normalized for applications written before the index existed
+
+        Returns:
+            Number of applications updated
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            with get_session() as session:
+                rows = session.query(Application.id, Application.applicant_ic).filter(
+                    Application.id > last_id,
+                    Application.applicant_ic.isnot(None),
+                    Application.applicant_ic_normalized.is_(None),
+                ).order_by(Application.id).limit(batch_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                values = [{"row_id": row.id, "ic": normalize_ic(row.applicant_ic)} for row in rows]
+                values = [v for v in values if v["ic"]]
+                if values:
+                    session.connection().execute(
+                        update(Application.__table__)
+                        .where(Application.__table__.c.id == bindparam("row_id"))
+                        .values(applicant_ic_normalized=bindparam("ic")),
+                        values,
+                    )
+                    updated += len(values)
+                session.commit()
+        if updated:
+            print(f"✓ Duplicate index: normalized IC of {updated} application(s)")
+        return updated
+
+# Singleton instance
+duplicate_index = DuplicateIndex()
@@ -0,0 +1,149 @@
+"""
+In-process event bus for application status transitions
+Every committed change to an Application's status/decision fields is published
+once, after commit, to subscribers of that application ID (or of "all"). The SSE
+endpoint /api/events/status fans these out to clients, replacing per-application
+polling of /api/status. Publishing is thread-safe: commits made in worker threads
+are handed to the event loop that owns the subscriber queues.
+Events are not shared between processes; each API process pushes the transitions
+its own job workers and request handlers commit.
+"""
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models import Application
+
+# Fields whose change is pushed to subscribers
+TRACKED_FIELDS = (
+    "status", "processing_stage", "risk_score", "risk_level", "final_decision", "review_status", "ai_decision", "human_decision",
+)
+# Columns behind a status payload - status reads select these instead of loading the full row
+STATUS_COLUMNS = (
+    Application.application_id, Application.status, Application.processing_stage, Application.stage_updated_at,
+    Application.batch_id, Application.risk_score, Application.risk_level, Application.final_decision,
+    Application.ai_decision, Application.review_status,
+)
+QUEUE_SIZE = 1000  # Per subscriber; the oldest events are dropped when a client falls behind
+
+
+def _value(value):
+    return value.value if hasattr(value, "value") else value
+
+
+def status_snapshot(app) -> Dict[str, Any]:
+    """Status payload of one application (an Application or a row with the same columns)"""
+    return {
+        "application_id": app.application_id,
+        "status": _value(app.status),
+        "stage": _value(app.processing_stage),
+        "stage_updated_at": app.stage_updated_at.isoformat() if app.stage_updated_at else None,
+        "batch_id": app.batch_id,
+        "risk_score": app.risk_score or 0,
+        "risk_level": _value(app.risk_level),
+        "final_decision": app.final_decision or app.ai_decision or "Pending",
+        "review_status": _value(app.review_status),
+    }
+
+
+class Subscription:
+    """Queue of events for one client, filtered to a set of application IDs (None = all)"""
+
+    def __init__(self, application_ids: Optional[Set[str]]):
+        self.application_ids = application_ids
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = 0
+
+    def wants(self, application_id: str) -> bool:
+        return self.application_ids is None or application_id in self.application_ids
+
+    def put(self, payload: Dict[str, Any]):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(payload)
+
+
+class EventBus:
+    """Fan-out of status events to asyncio subscribers"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscriptions: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self, application_ids: Optional[Iterable[str]] = None) -> Subscription:
+        """Register a subscriber (must be called from the event loop)"""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(set(application_ids) if application_ids is not None else None)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscriptions.discard(subscription)
+
+    def publish(self, payload: Dict[str, Any]):
+        """Deliver an event to matching subscribers; safe to call from any thread"""
+        loop = self._loop
+        if loop is None or not self._subscriptions or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(payload)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, payload)
+
+    def _dispatch(self, payload: Dict[str, Any]):
+        self.published += 1
+        for subscription in list(self._subscriptions):
+            if subscription.wants(payload["application_id"]):
+                subscription.put(payload)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in self._subscriptions),
+        }
+
+
+# Singleton instance
+event_bus = EventBus()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_status_changes(session, flush_context):
+    """Remember status transitions of this transaction; they are published only if it commits"""
+    pending = session.info.setdefault("status_events", {})
+    for obj in session.new:
+        if isinstance(obj, Application):
+            pending[obj.application_id] = {"event": "created", **status_snapshot(obj)}
+    for obj in session.dirty:
+        if isinstance(obj, Application):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in TRACKED_FIELDS):
+                pending[obj.application_id] = {"event": "status", **status_snapshot(obj)}
+    for obj in session.deleted:
+        if isinstance(obj, Application):
+            pending[obj.application_id] = {"event": "deleted", "application_id": obj.application_id}
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_status_changes(session):
+    pending = session.info.pop("status_events", None)
+    if not pending:
+        return
+    timestamp = datetime.utcnow().isoformat()
+    for payload in pending.values():
+        event_bus.publish({**payload, "timestamp": timestamp})
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_status_changes(session):
+    session.info.pop("status_events", None)
@@ -0,0 +1,141 @@
+"""
+Persistent extraction cache keyed by file content hash
+Retries, reprocessing and duplicate uploads reuse earlier PDFProcessor output
+instead of re-running PyMuPDF/OCR. Entries are evicted least-recently-used
+once the cache grows past Config.EXTRACTION_CACHE_MAX_MB.
+"""
+import hashlib
+import json
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from database import get_session
+from models import ExtractionCacheEntry
+from pdf_processor import EXTRACTOR_VERSION, PLACEHOLDER_MARKERS
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ExtractionCache:
+    """Size-bounded LRU cache of extraction output, stored in the database"""
+
+    def __init__(self):
+        self.config = Config()
+        self.max_bytes = self.config.EXTRACTION_CACHE_MAX_MB * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()  # Counters are updated from executor threads
+
+    @staticmethod
+    def make_key(content_hash: str, kind: str) -> str:
+        return f"{content_hash}:{EXTRACTOR_VERSION}:{kind}"
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, content_hash: str, kind: str) -> Optional[Any]:
+        """
+        Look up cached output and mark it recently used
+
+        Args:
+            content_hash: SHA-256 of the file
+            kind: 'text' or 'coordinates'
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        key = self.make_key(content_hash, kind)
+        with get_session() as session:
+            entry = session.query(ExtractionCacheEntry).filter(ExtractionCacheEntry.cache_key == key).first()
+            if entry is None:
+                self._count(False)
+                return None
+            value = entry.payload.get("value")
+            session.execute(
+                update(ExtractionCacheEntry)
+                .where(ExtractionCacheEntry.id == entry.id)
+                .values(hit_count=ExtractionCacheEntry.hit_count + 1, last_accessed_at=datetime.utcnow())
+            )
+        self._count(True)
+        return value
+
+    def put(self, content_hash: str, kind: str, value: Any):
+        """Store extraction output, then evict old entries if over budget"""
+        # Error/OCR placeholders produced by PDFProcessor must never be cached
+        if isinstance(value, str) and any(marker in value for marker in PLACEHOLDER_MARKERS):
+            return
+        payload = {"value": value}
+        size_bytes = len(json.dumps(payload).encode("utf-8"))
+        if size_bytes > self.max_bytes:
+            return
+        try:
+            with get_session() as session:
+                session.add(ExtractionCacheEntry(
+                    cache_key=self.make_key(content_hash, kind),
+                    content_hash=content_hash,
+                    extractor_version=EXTRACTOR_VERSION,
+                    kind=kind,
+                    payload=payload,
+                    size_bytes=size_bytes,
+                ))
+        except IntegrityError:
+            return  # Another worker stored the same file first
+        self._evict()
+
+    def _evict(self):
+        """Delete least-recently-used entries until the cache fits in max_bytes"""
+        with get_session() as session:
+            total = session.query(func.coalesce(func.sum(ExtractionCacheEntry.size_bytes), 0)).scalar()
+            if total <= self.max_bytes:
+                return
+            oldest = session.query(ExtractionCacheEntry.id, ExtractionCacheEntry.size_bytes).order_by(
+                ExtractionCacheEntry.last_accessed_at.asc()
+            ).all()
+            evict_ids = []
+            for entry_id, size in oldest:
+                if total <= self.max_bytes:
+                    break
+                evict_ids.append(entry_id)
+                total -= size
+            session.query(ExtractionCacheEntry).filter(
+                ExtractionCacheEntry.id.in_(evict_ids)
+            ).delete(synchronize_session=False)
+        print(f"✓ Extraction cache evicted {len(evict_ids)} entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, size and hit/miss counters for this process"""
+        with get_session() as session:
+            entries, total = session.query(
+                func.count(ExtractionCacheEntry.id),
+                func.coalesce(func.sum(ExtractionCacheEntry.size_bytes), 0),
+            ).one()
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_mb": round(total / (1024 * 1024), 2),
+            "max_size_mb": self.config.EXTRACTION_CACHE_MAX_MB,
+            "extractor_version": EXTRACTOR_VERSION,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0,
+        }
+
+
+# Singleton instance
+extraction_cache = ExtractionCache()
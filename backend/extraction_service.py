@@ -0,0 +1,226 @@
+"""
+Document extraction service
+Extracts all documents of an application concurrently and reports per-document timing.
+PDF text layers are read in a dedicated process pool and only image-only pages are
+OCR'd, one page per worker process, so CPU-bound PyMuPDF/Tesseract work uses every
+core instead of contending for the GIL with the API threads.
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import Config
+from extraction_cache import extraction_cache, file_sha256
+from pdf_processor import PROCESSING_ERROR_PREFIX, PDFProcessor, TextProcessor
+
+
+def _init_worker(tesseract_cmd: Optional[str]):
+    """Process pool initializer - import heavy modules once and mirror the parent's OCR setup"""
+    import fitz  # noqa: F401
+    import pytesseract
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _warm_up() -> int:
+    return os.getpid()
+
+
+@dataclass
+class ExtractedDocument:
+    """Result of extracting a single document"""
+    label: str
+    path: str
+    text: str = ""
+    seconds: float = 0.0
+    error: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 of the file, None if unreadable
+    cached: bool = False  # Served from the extraction cache
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ExtractionService:
+    """Runs per-document extraction in parallel; scanned PDF pages fan out to a process pool"""
+
+    def __init__(self):
+        self.config = Config()
+        # Dedicated threads for text files and PDF metadata, never Starlette's request threads
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, self.config.EXTRACTION_THREADS),
+            thread_name_prefix="extract",
+        )
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        """Create the process pool and spawn all workers up front so the first upload is not slowed down"""
+        if self.process_pool is not None or self.config.PDF_PROCESS_WORKERS <= 0:
+            return
+        try:
+            import pytesseract
+            tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        except ImportError:
+            tesseract_cmd = None
+        workers = self.config.PDF_PROCESS_WORKERS
+        self.process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(tesseract_cmd,),
+        )
+        pids = {f.result() for f in [self.process_pool.submit(_warm_up) for _ in range(workers * 2)]}
+        print(f"✓ PDF extraction pool started: {len(pids)} warm worker processes")
+
+    def shutdown(self):
+        """Stop the process pool, cancelling pages that have not started"""
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+
+    @staticmethod
+    def extract_file(path: str) -> Tuple[str, bool]:
+        """Extract text from a single PDF or text file (blocking, in-process). Returns (text, complete)."""
+        if path.endswith('.pdf'):
+            return PDFProcessor.extract_text_with_status(path)
+        return TextProcessor.extract_text(path), True
+
+    async def _extract_pdf_pages(self, path: str) -> Tuple[str, bool]:
+        """Read the text layer in one pass, then OCR image-only pages in parallel, one page per task"""
+        loop = asyncio.get_running_loop()
+        try:
+            page_lines = await loop.run_in_executor(self.process_pool, PDFProcessor.scan_pages, path)
+        except Exception as e:
+            print(f"❌ PDF Processing Error: {str(e)}")
+            return f"{PROCESSING_ERROR_PREFIX}: {str(e)}", False
+
+        complete = True
+        ocr_pages = PDFProcessor.pages_needing_ocr(page_lines)
+        if ocr_pages:
+            print(f"🔍 OCR required for {len(ocr_pages)}/{len(page_lines)} pages of {os.path.basename(path)}")
+            futures: List[Future] = [
+                self.process_pool.submit(PDFProcessor.ocr_page, path, page_num)
+                for page_num in ocr_pages
+            ]
+            try:
+                ocr_lines = await asyncio.gather(*[asyncio.wrap_future(f) for f in futures])
+            except BaseException:
+                # Covers task cancellation (job shutdown) and a failed page alike
+                for f in futures:
+                    f.cancel()
+                raise
+            for page_num, (lines, ocr_ok) in zip(ocr_pages, ocr_lines):
+                page_lines[page_num] = lines
+                complete = complete and ocr_ok
+
+        text_content = []
+        for lines in page_lines:
+            text_content.extend(lines)
+        return PDFProcessor.join_pages(text_content), complete
+
+    @staticmethod
+    def _cache_lookup(path: str, kind: str, content_hash: Optional[str] = None) -> Tuple[Optional[str], Optional[object]]:
+        """Hash the file (unless the hash is already known) and look it up. Returns (content_hash, cached value or None)."""
+        if content_hash is None or not os.path.exists(path):
+            try:
+                content_hash = file_sha256(path)
+            except OSError:
+                return None, None  # Let the extractor report the missing file
+        try:
+            return content_hash, extraction_cache.get(content_hash, kind)
+        except Exception as e:
+            print(f"⚠ Extraction cache lookup failed: {e}")
+            return content_hash, None
+
+    @staticmethod
+    def _cache_store(content_hash: Optional[str], kind: str, value):
+        if not content_hash:
+            return
+        try:
+            extraction_cache.put(content_hash, kind, value)
+        except Exception as e:
+            print(f"⚠ Extraction cache store failed: {e}")
+
+    async def _timed_extract(self, label: str, path: str, content_hash: Optional[str] = None) -> ExtractedDocument:
+        start = time.perf_counter()
+        doc = ExtractedDocument(label=label, path=path)
+        loop = asyncio.get_running_loop()
+        try:
+            doc.content_hash, cached_text = await loop.run_in_executor(self.executor, self._cache_lookup, path, "text", content_hash)
+            if cached_text is not None:
+                doc.text = cached_text
+                doc.cached = True
+            else:
+                if path.endswith('.pdf') and self.process_pool is not None:
+                    doc.text, complete = await self._extract_pdf_pages(path)
+                else:
+                    doc.text, complete = await loop.run_in_executor(self.executor, self.extract_file, path)
+                # Placeholders for pages OCR could not read are analyzed now but never cached,
+                # so the document is extracted again once OCR works
+                if complete:
+                    await loop.run_in_executor(self.executor, self._cache_store, doc.content_hash, "text", doc.text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            doc.error = str(e)
+        doc.seconds = time.perf_counter() - start
+        return doc
+
+    async def extract_documents(self, documents: Dict[str, str], content_hashes: Optional[Dict[str, str]] = None) -> Dict[str, ExtractedDocument]:
+        """
+        Extract several documents concurrently
+
+        Args:
+            documents: Mapping of document label -> file path (order is preserved)
+            content_hashes: Optional label -> SHA-256 computed at upload, so files are not hashed again
+
+        Returns:
+            Mapping of document label -> ExtractedDocument
+        """
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._timed_extract(label, path, (content_hashes or {}).get(label)) for label, path in documents.items()
+        ])
+        wall_time = time.perf_counter() - start
+
+        for doc in results:
+            if doc.ok:
+                source = " (cache hit)" if doc.cached else ""
+                print(f"✓ {doc.label} extracted{source}: {len(doc.text)} characters in {doc.seconds:.2f}s")
+            else:
+                print(f"⚠ Error extracting {doc.label} after {doc.seconds:.2f}s: {doc.error}")
+        serial_time = sum(doc.seconds for doc in results)
+        print(f"⏱️  Extracted {len(results)} documents in {wall_time:.2f}s (sequential would be ~{serial_time:.2f}s)")
+
+        return {doc.label: doc for doc in results}
+
+    async def extract_coordinates(self, path: str) -> List[Dict]:
+        """
+        Text blocks with page coordinates for a PDF, served from the cache when possible
+
+        Args:
+            path: Path to PDF file
+
+        Returns:
+            List of text blocks as produced by PDFProcessor.extract_with_coordinates
+        """
+        loop = asyncio.get_running_loop()
+        content_hash, cached = await loop.run_in_executor(self.executor, self._cache_lookup, path, "coordinates")
+        if cached is not None:
+            return cached
+        pool = self.process_pool or self.executor
+        blocks = await loop.run_in_executor(pool, PDFProcessor.extract_with_coordinates, path)
+        await loop.run_in_executor(self.executor, self._cache_store, content_hash, "coordinates", blocks)
+        return blocks
+
+    @staticmethod
+    def timing_report(extracted: Dict[str, ExtractedDocument]) -> Dict[str, float]:
+        """Per-document extraction time in seconds, for storing alongside results"""
+        return {label: round(doc.seconds, 3) for label, doc in extracted.items()}
+
+
+# Singleton instance
+extraction_service = ExtractionService()
@@ -0,0 +1,81 @@
+"""
+Collision-free, time-ordered IDs for applications and upload batches
+IDs are ULIDs (48-bit millisecond timestamp + 80 random bits, Crockford base32)
+behind the usual prefix, e.g. APP-01JAZ3K6Q4V8N2W5X7Y9B0C1D2. They sort by creation
+time as plain strings. Within a process, IDs generated in the same millisecond
+increment the random part, so they stay strictly increasing; across workers and
+processes the 80 random bits make collisions practically impossible. The random
+base is re-seeded in forked children so they never continue the parent's sequence.
+"""
+import os
+import threading
+import time
+
+CROCKFORD_BASE32 = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+ULID_LENGTH = 26
+RANDOM_BITS = 80
+
+
+def _encode(value: int) -> str:
+    chars = []
+    for _ in range(ULID_LENGTH):
+        chars.append(CROCKFORD_BASE32[value & 0x1F])
+        value >>= 5
+    return "".join(reversed(chars))
+
+
+def _random() -> int:
+    return int.from_bytes(os.urandom(RANDOM_BITS // 8), "big")
+
+
+class IdGenerator:
+    """Thread-safe monotonic ULID generator"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def reset(self):
+        """Forget the last ID (used in forked children so each process starts its own sequence)"""
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def ulid(self) -> str:
+        with self._lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms <= self._last_ms:
+                # Same millisecond (or the clock stepped back): continue the sequence
+                now_ms = self._last_ms
+                self._last_random += 1
+                if self._last_random >> RANDOM_BITS:
+                    now_ms += 1
+                    self._last_random = _random()
+            else:
+                self._last_random = _random()
+            self._last_ms = now_ms
+            value = (now_ms << RANDOM_BITS) | self._last_random
+        return _encode(value)
+
+    def application_id(self) -> str:
+        return f"APP-{self.ulid()}"
+
+    def batch_id(self) -> str:
+        return f"BATCH-{self.ulid()}"
+
+    @staticmethod
+    def timestamp_ms(identifier: str) -> int:
+        """Creation time (Unix ms) encoded in an ID produced by this generator"""
+        encoded = identifier.rsplit("-", 1)[-1].upper()
+        value = 0
+        for char in encoded:
+            value = (value << 5) | CROCKFORD_BASE32.index(char)
+        return value >> RANDOM_BITS
+
+
+# Singleton instance
+id_generator = IdGenerator()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=id_generator.reset)
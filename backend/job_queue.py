@@ -0,0 +1,302 @@
+"""
+Durable job queue and worker pool for background application processing
+Jobs are persisted in the processingjob table and claimed with time-limited leases,
+so a restart or crashed worker never strands an application in PROCESSING/ANALYZING.
+A handler raises only for transient errors; the job is then re-queued with exponential
+backoff until JOB_MAX_ATTEMPTS claims, after which the application is marked FAILED.
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, List, Optional
+
+from sqlalchemy import and_, or_, update
+
+from config import Config
+from database import get_session, retry_on_lock
+from models import Application, ApplicationStatus, JobStatus, ProcessingJob, ProcessingStage
+
+
+class JobQueue:
+    """Persistent job queue with a bounded in-process worker pool"""
+
+    def __init__(self):
+        self.config = Config()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Extraction limit shared by every job in this process (Gemini calls are
+        # bounded by llm_client's LLM_MAX_CONCURRENCY across all callers)
+        self.extraction_slot = asyncio.Semaphore(max(1, self.config.EXTRACTION_CONCURRENCY))
+        self._handler: Optional[Callable[[str], Awaitable[None]]] = None
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @retry_on_lock
+    def enqueue(self, application_id: str) -> int:
+        """
+        Persist a job for an application and wake an idle worker
+
+        Args:
+            application_id: Application to (re)process
+
+        Returns:
+            ID of the queued job
+        """
+        with get_session() as session:
+            job = ProcessingJob(application_id=application_id)
+            session.add(job)
+            self._mark_queued(session, [application_id])
+            session.commit()
+            session.refresh(job)
+            job_id = job.id
+        self._wake()
+        return job_id
+
+    @retry_on_lock
+    def enqueue_many(self, application_ids: List[str]) -> int:
+        """
+        Persist jobs for many applications in one transaction and wake the workers
+
+        Returns:
+            Number of jobs queued
+        """
+        if not application_ids:
+            return 0
+        with get_session() as session:
+            session.add_all([ProcessingJob(application_id=application_id) for application_id in application_ids])
+            self._mark_queued(session, application_ids)
+            session.commit()
+        self._wake()
+        return len(application_ids)
+
+    def _wake(self):
+        """Wake an idle worker; enqueue runs in a threadpool, so the event is set on its loop"""
+        if self._wakeup is None or self._loop is None or self._loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._wakeup.set()
+        else:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    @staticmethod
+    def _mark_queued(session, application_ids: List[str]):
+        """Reset the pipeline stage of (re)queued applications inside the enqueuing transaction"""
+        if not application_ids:
+            return
+        now = datetime.utcnow()
+        for app in session.query(Application).filter(Application.application_id.in_(application_ids)).all():
+            app.processing_stage = ProcessingStage.QUEUED
+            app.stage_updated_at = now
+            session.add(app)
+
+    @retry_on_lock
+    def recover_stranded(self) -> int:
+        """
+        Re-queue applications left in PROCESSING/ANALYZING without a live job.
+        Jobs whose lease expired are picked up by the normal claim path.
+
+        Returns:
+            Number of applications re-queued
+        """
+        now = datetime.utcnow()
+        with get_session() as session:
+            in_flight = [
+                row[0] for row in session.query(Application.application_id).filter(
+                    Application.status.in_([ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING])
+                ).all()
+            ]
+            if not in_flight:
+                return 0
+            covered = {
+                row[0] for row in session.query(ProcessingJob.application_id).filter(
+                    ProcessingJob.application_id.in_(in_flight),
+                    or_(
+                        ProcessingJob.status == JobStatus.QUEUED,
+                        and_(ProcessingJob.status == JobStatus.RUNNING, ProcessingJob.lease_expires_at > now),
+                    )
+                ).all()
+            }
+            requeued = [application_id for application_id in in_flight if application_id not in covered]
+            for application_id in requeued:
+                session.add(ProcessingJob(application_id=application_id))
+            self._mark_queued(session, requeued)
+            session.commit()
+        recovered = len(in_flight) - len(covered)
+        if recovered:
+            print(f"✓ Re-queued {recovered} stranded application(s)")
+        return recovered
+
+    def _claimable(self, now: datetime):
+        return or_(
+            and_(ProcessingJob.status == JobStatus.QUEUED,
+                 or_(ProcessingJob.run_after.is_(None), ProcessingJob.run_after <= now)),
+            and_(ProcessingJob.status == JobStatus.RUNNING, ProcessingJob.lease_expires_at < now),
+        )
+
+    @retry_on_lock
+    def _claim(self) -> Optional[tuple]:
+        """Atomically lease the oldest claimable job. Returns (job_id, application_id, attempts)."""
+        now = datetime.utcnow()
+        with get_session() as session:
+            candidates = session.query(ProcessingJob.id).filter(
+                self._claimable(now)
+            ).order_by(ProcessingJob.id).limit(self.config.WORKER_COUNT).all()
+            for (job_id,) in candidates:
+                # Compare-and-set: only one worker (in any process) wins the row
+                result = session.execute(
+                    update(ProcessingJob)
+                    .where(ProcessingJob.id == job_id, self._claimable(now))
+                    .values(
+                        status=JobStatus.RUNNING,
+                        lease_owner=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=self.config.JOB_LEASE_SECONDS),
+                        attempts=ProcessingJob.attempts + 1,
+                        updated_at=now,
+                    )
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    job = session.get(ProcessingJob, job_id)
+                    return job.id, job.application_id, job.attempts
+        return None
+
+    @retry_on_lock
+    def _renew_lease(self, job_id: int):
+        with get_session() as session:
+            session.execute(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == job_id, ProcessingJob.lease_owner == self.worker_id)
+                .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=self.config.JOB_LEASE_SECONDS))
+            )
+
+    @retry_on_lock
+    def _finish(self, job_id: int, status: JobStatus, error: Optional[str] = None):
+        with get_session() as session:
+            session.execute(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == job_id)
+                .values(status=status, lease_owner=None, lease_expires_at=None,
+                        last_error=error, updated_at=datetime.utcnow())
+            )
+
+    @retry_on_lock
+    def _release(self, job_id: int):
+        with get_session() as session:
+            session.execute(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == job_id, ProcessingJob.lease_owner == self.worker_id)
+                .values(status=JobStatus.QUEUED, lease_owner=None, lease_expires_at=None,
+                        attempts=ProcessingJob.attempts - 1, updated_at=datetime.utcnow())
+            )
+
+    @retry_on_lock
+    def _retry_later(self, job_id: int, application_id: str, delay: float, error: str):
+        """Hand a failed attempt back to the queue; it becomes claimable after the backoff delay"""
+        now = datetime.utcnow()
+        with get_session() as session:
+            session.execute(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == job_id)
+                .values(status=JobStatus.QUEUED, lease_owner=None, lease_expires_at=None,
+                        run_after=now + timedelta(seconds=delay), last_error=error, updated_at=now)
+            )
+            self._mark_queued(session, [application_id])
+            session.commit()
+
+    @retry_on_lock
+    def _mark_application_failed(self, application_id: str):
+        with get_session() as session:
+            app = session.query(Application).filter(Application.application_id == application_id).first()
+            if app:
+                app.status = ApplicationStatus.FAILED
+                app.processing_stage = ProcessingStage.FAILED
+                app.updated_at = app.stage_updated_at = datetime.utcnow()
+                session.add(app)
+
+    async def _heartbeat(self, job_id: int):
+        interval = max(1, self.config.JOB_LEASE_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self._renew_lease, job_id)
+
+    async def _run_job(self, job_id: int, application_id: str, attempts: int):
+        if attempts > self.config.JOB_MAX_ATTEMPTS:
+            print(f"❌ Job {job_id} for {application_id} exceeded {self.config.JOB_MAX_ATTEMPTS} attempts")
+            await asyncio.to_thread(self._finish, job_id, JobStatus.FAILED, "Max attempts exceeded")
+            await asyncio.to_thread(self._mark_application_failed, application_id)
+            return
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await self._handler(application_id)
+            await asyncio.to_thread(self._finish, job_id, JobStatus.DONE)
+        except asyncio.CancelledError:
+            # Shutdown: hand the job back so the next worker can pick it up immediately
+            # (shielded so the release still runs in its thread while this task is cancelled)
+            await asyncio.shield(asyncio.to_thread(self._release, job_id))
+            raise
+        except Exception as e:
+            if attempts < self.config.JOB_MAX_ATTEMPTS:
+                delay = self.config.JOB_RETRY_BACKOFF * (2 ** (attempts - 1))
+                print(f"⚠ Job {job_id} for {application_id} failed (attempt {attempts}/{self.config.JOB_MAX_ATTEMPTS}), "
+                      f"retrying in {delay:.1f}s: {e}")
+                await asyncio.to_thread(self._retry_later, job_id, application_id, delay, str(e))
+            else:
+                print(f"❌ Job {job_id} for {application_id} failed after {attempts} attempts: {e}")
+                await asyncio.to_thread(self._finish, job_id, JobStatus.FAILED, str(e))
+                await asyncio.to_thread(self._mark_application_failed, application_id)
+        finally:
+            heartbeat.cancel()
+
+    async def _worker(self, index: int):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                print(f"⚠ Worker {index} could not claim job: {e}")
+                claimed = None
+
+            if claimed is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.config.JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(*claimed)
+
+    def start(self, handler: Callable[[str], Awaitable[None]]):
+        """
+        Start the worker pool on the running event loop
+
+        Args:
+            handler: Coroutine function that processes one application_id
+        """
+        if self._workers:
+            return
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._workers = [
+            asyncio.create_task(self._worker(i)) for i in range(max(1, self.config.WORKER_COUNT))
+        ]
+        print(f"✓ Job queue started: {len(self._workers)} workers "
+              f"(extraction={self.config.EXTRACTION_CONCURRENCY}, llm={self.config.LLM_MAX_CONCURRENCY})")
+
+    async def stop(self):
+        """Cancel workers; running jobs are released back to the queue"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+# Singleton instance
+job_queue = JobQueue()
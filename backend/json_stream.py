@@ -0,0 +1,78 @@
+"""
+Incremental parser for a streamed JSON object
+Scans model output as it arrives and reports each top-level member
+(e.g. applicant_profile, key_risk_flags) as soon as its value is complete,
+without re-parsing the whole buffer on every chunk.
+"""
+import json
+from typing import Any, List, Tuple
+
+
+class JSONSectionStream:
+    """Feed text chunks of one JSON object; get back (key, value) pairs of completed top-level members"""
+
+    def __init__(self):
+        self.text = ""
+        self.done = False  # Root object closed
+        self._pos = 0  # Next character to scan
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._key_start = None  # Index of the opening quote of the current top-level key
+        self._key = None
+        self._value_start = None  # Index just after the ':' of the current top-level member
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """
+        Add a chunk of streamed text
+
+        Args:
+            chunk: Next piece of model output (markdown fences before the object are ignored)
+
+        Returns:
+            Top-level members completed by this chunk, in document order
+        """
+        self.text += chunk
+        sections = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == '\\':
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if self._key_start is not None and self._key is None:
+                        self._key = json.loads(text[self._key_start:i + 1])
+                continue
+
+            if c == '"':
+                self._in_string = True
+                if self._depth == 1 and self._key is None:
+                    self._key_start = i
+            elif c in '{[':
+                self._depth += 1
+            elif c in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._close_member(text, i, sections)
+                    self.done = True
+            elif self._depth == 1:
+                if c == ':' and self._key is not None and self._value_start is None:
+                    self._value_start = i + 1
+                elif c == ',':
+                    self._close_member(text, i, sections)
+        self._pos = len(text)
+        return sections
+
+    def _close_member(self, text: str, end: int, sections: List[Tuple[str, Any]]):
+        if self._key is not None and self._value_start is not None:
+            try:
+                sections.append((self._key, json.loads(text[self._value_start:end])))
+            except ValueError:
+                pass  # Malformed member - the final full parse will report it
+        self._key_start = self._key = self._value_start = None
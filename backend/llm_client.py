@@ -0,0 +1,227 @@
+"""
+Shared asyncio client for Gemini calls
+Every Gemini request in the process (background analysis, streaming analysis, copilot)
+goes through one scheduler: a global concurrency limit, token buckets for requests
+and tokens per minute, and jittered exponential backoff on retryable errors. A 429
+pauses the whole scheduler for the delay the API asks for, so a batch backs off once
+instead of every application retrying on its own.
+"""
+import asyncio
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from google.api_core import exceptions
+
+from config import Config
+
+# Errors worth retrying; anything else (bad request, auth, safety block) fails immediately
+_RETRYABLE = (
+    exceptions.ResourceExhausted,
+    exceptions.TooManyRequests,
+    exceptions.ServiceUnavailable,
+    exceptions.InternalServerError,
+    exceptions.DeadlineExceeded,
+)
+_RATE_LIMITED = (exceptions.ResourceExhausted, exceptions.TooManyRequests)
+
+# Gemini bills every image part as a fixed number of tokens
+_IMAGE_TOKENS = 258
+
+
+class TokenBucket:
+    """Async token bucket holding up to per_minute tokens, refilled continuously"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()  # Waiters are served in arrival order
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` tokens are available and take them"""
+        amount = min(amount, self.capacity)  # An oversized request still gets through on a full bucket
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount: float):
+        """Take (positive) or refund (negative) tokens after the fact; may go into debt"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+def estimate_tokens(contents: Any) -> int:
+    """Rough input token count (~4 characters per token) used to reserve budget before a call"""
+    if isinstance(contents, str):
+        return len(contents) // 4 + 1
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    return _IMAGE_TOKENS
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True for transient Gemini errors (rate limit, 5xx, timeout) - still worth retrying later"""
+    return isinstance(error, _RETRYABLE)
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Server-requested delay in seconds from a 429 (RetryInfo detail or message text), if any"""
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None and hasattr(delay, "seconds"):
+            return delay.seconds + getattr(delay, "nanos", 0) / 1e9
+    message = str(error)
+    match = re.search(r"retry in ([\d.]+)\s*s", message, re.IGNORECASE) or re.search(
+        r"retry_delay\s*\{\s*seconds:\s*(\d+)", message
+    )
+    return float(match.group(1)) if match else None
+
+
+class LLMClient:
+    """Global scheduler for Gemini requests"""
+
+    def __init__(self):
+        self.config = Config()
+        self._semaphore = asyncio.Semaphore(max(1, self.config.LLM_MAX_CONCURRENCY))
+        self.request_bucket = TokenBucket(self.config.LLM_REQUESTS_PER_MINUTE)
+        self.token_bucket = TokenBucket(self.config.LLM_TOKENS_PER_MINUTE)
+        self._paused_until = 0.0  # time.monotonic() before which no request is sent (after a 429)
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.tokens_used = 0
+
+    async def _wait_for_pause(self):
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def _admit(self, reserved_tokens: int):
+        """Block until the scheduler allows one more request"""
+        await self._wait_for_pause()
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(reserved_tokens)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Full-jitter exponential backoff; a 429 waits at least as long as the API asked and pauses everyone"""
+        delay = random.uniform(0, min(self.config.LLM_BACKOFF_MAX, self.config.LLM_BACKOFF_BASE * (2 ** attempt)))
+        if isinstance(error, _RATE_LIMITED):
+            self.rate_limited += 1
+            requested = retry_after(error)
+            if requested is not None:
+                delay = max(delay, requested + random.uniform(0, 1))
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def _settle(self, reserved_tokens: int, response: Any):
+        """Replace the reservation with the real token usage once the response reports it"""
+        usage = getattr(response, "usage_metadata", None)
+        used = getattr(usage, "total_token_count", 0) or 0
+        if used:
+            self.token_bucket.adjust(used - reserved_tokens)
+            self.tokens_used += used
+        else:
+            self.tokens_used += reserved_tokens
+
+    async def generate(self, model, contents: Any, **kwargs) -> Any:
+        """
+        Call model.generate_content_async under the global limits, retrying transient errors
+
+        Args:
+            model: google.generativeai.GenerativeModel
+            contents: Prompt text or list of parts
+            **kwargs: Passed through to generate_content_async
+
+        Returns:
+            The GenerateContentResponse
+        """
+        reserved = estimate_tokens(contents) + self.config.LLM_OUTPUT_TOKEN_RESERVE
+        for attempt in range(self.config.LLM_MAX_RETRIES + 1):
+            await self._admit(reserved)
+            try:
+                async with self._semaphore:
+                    self.in_flight += 1
+                    self.requests += 1
+                    try:
+                        response = await model.generate_content_async(contents, **kwargs)
+                    finally:
+                        self.in_flight -= 1
+            except _RETRYABLE as e:
+                self.token_bucket.adjust(-reserved)  # Nothing was generated
+                if attempt >= self.config.LLM_MAX_RETRIES:
+                    print(f"[LLM] Giving up after {attempt + 1} attempts: {e}")
+                    raise
+                self.retries += 1
+                delay = self._backoff(attempt, e)
+                print(f"[LLM] {type(e).__name__} (attempt {attempt + 1}/{self.config.LLM_MAX_RETRIES + 1}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            self._settle(reserved, response)
+            return response
+
+    async def stream(self, model, contents: Any, **kwargs) -> AsyncIterator[str]:
+        """
+        Stream response text chunks under the global limits
+
+        Opening the stream is retried like generate(); once text has been
+        yielded, errors propagate to the caller.
+        """
+        reserved = estimate_tokens(contents) + self.config.LLM_OUTPUT_TOKEN_RESERVE
+        async with self._semaphore:
+            response = None
+            for attempt in range(self.config.LLM_MAX_RETRIES + 1):
+                await self._admit(reserved)
+                try:
+                    self.requests += 1
+                    response = await model.generate_content_async(contents, stream=True, **kwargs)
+                    break
+                except _RETRYABLE as e:
+                    self.token_bucket.adjust(-reserved)
+                    if attempt >= self.config.LLM_MAX_RETRIES:
+                        raise
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff(attempt, e))
+
+            self.in_flight += 1
+            last_chunk = None
+            try:
+                async for chunk in response:
+                    last_chunk = chunk
+                    if chunk.text:
+                        yield chunk.text
+            finally:
+                self.in_flight -= 1
+                self._settle(reserved, last_chunk)
+
+    def stats(self) -> Dict[str, Any]:
+        """Scheduler counters for this process"""
+        return {
+            "in_flight": self.in_flight,
+            "max_concurrency": self.config.LLM_MAX_CONCURRENCY,
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "tokens_used": self.tokens_used,
+            "requests_per_minute": self.config.LLM_REQUESTS_PER_MINUTE,
+            "tokens_per_minute": self.config.LLM_TOKENS_PER_MINUTE,
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 1),
+        }
+
+
+# Singleton instance
+llm_client = LLMClient()
@@ -1,7 +1,7 @@
 """
 FastAPI Backend for TrustLens AI
 """
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Query, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, StreamingResponse
@@ -9,6 +9,8 @@ from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional, List
 import os
+import re
+import json
 import shutil
 import time
 from datetime import datetime
@@ -18,13 +20,32 @@ from dotenv import load_dotenv
 import pytesseract
 from sqlalchemy.orm.attributes import flag_modified
 
-from models import Application, ApplicationStatus, LoanType, RiskLevel, ReviewStatus, AnalysisCache
-from database import init_db, get_session
+from models import Application, ApplicationStatus, LoanType, ProcessingStage, RiskLevel, ReviewStatus
+from database import init_db, get_session, retry_on_lock, database_size_bytes, is_lock_error
 from pdf_processor import PDFProcessor, TextProcessor
 from ai_engine import AIEngine
 from config import Config, RiskConfig, LoanConfig, AIConfig
 from email_service import email_service
 from report_generator import ReportGenerator
+from job_queue import job_queue
+from extraction_service import extraction_service
+from llm_client import is_retryable, llm_client
+from json_stream import JSONSectionStream
+from analytics_service import analytics_service
+from analytics_rollup import analytics_rollups
+from document_store import document_store
+from analysis_fields import analysis_field_index
+from application_listing import application_listing
+from event_bus import STATUS_COLUMNS, event_bus, status_snapshot
+from batch_status import batch_status
+from batch_ingest import zip_ingestor
+from batch_registration import batch_registry
+from id_generator import id_generator
+from upload_writer import UploadRejected, upload_writer
+from resumable_upload import resumable_uploads
+from duplicate_index import duplicate_index
+from statement_parser import statement_parser
+from transaction_store import transaction_store
 
 # Configure Tesseract OCR path (D: drive installation)
 if os.path.exists(r'D:\Tesseract\tesseract.exe'):
@@ -47,6 +68,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Create upload directory
@@ -84,6 +106,28 @@ async def startup_event():
     """Initialize database on startup"""
     init_db()
     print("✓ Database initialized")
+    # Texts from before the document store existed are moved out of analysis_result once
+    await run_in_threadpool(document_store.migrate_legacy)
+    # Copy loan type / DSR / income / risk flags of older analyses into their indexed columns
+    await run_in_threadpool(analysis_field_index.backfill)
+    # Normalized ICs of applications from before the duplicate index
+    await run_in_threadpool(duplicate_index.backfill)
+    # Rollups are maintained on every write; rebuild if they do not cover the current applications
+    await run_in_threadpool(analytics_rollups.ensure_built)
+    # Drop resumable batch uploads that were abandoned
+    await run_in_threadpool(resumable_uploads.cleanup_expired)
+    # Spawn warm PDF extraction processes before any job needs them
+    await run_in_threadpool(extraction_service.start)
+    # Resume anything a previous run left in PROCESSING/ANALYZING, then start workers
+    await run_in_threadpool(job_queue.recover_stranded)
+    job_queue.start(run_application_job)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers; in-flight jobs are handed back to the queue"""
+    await job_queue.stop()
+    extraction_service.shutdown()
 
 
 @app.get("/")
@@ -93,278 +137,53 @@ async def root():
 
 
 @app.get("/api/applications")
-async def get_applications(limit: int = 50):
-    """Get all applications"""
-    with get_session() as session:
-        applications = session.query(Application).order_by(Application.created_at.desc()).limit(limit).all()
-        return [
-            {
-                "id": app.application_id,
-                "name": app.applicant_name or "Unknown",
-                "type": (
-                    app.analysis_result.get("applicant_profile", {}).get("loan_type") 
-                    if app.analysis_result else None
-                ) or (app.loan_type.value if hasattr(app.loan_type, 'value') else app.loan_type) or "N/A",
-                "amount": f"RM {app.requested_amount:,.0f}" if app.requested_amount else "N/A",
-                "score": app.risk_score or 0,
-                "status": app.final_decision if app.status == ApplicationStatus.APPROVED else app.status,
-                "date": app.created_at.isoformat(),
-                "review_status": app.review_status.value if app.review_status else "AI Pending",
-                "ai_decision": app.ai_decision,
-                "human_decision": app.human_decision,
-                "highlighted": app.highlighted or False,
-            }
-            for app in applications
-        ]
+async def get_applications(
+    response: Response,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    sort: str = "date",
+    order: str = "desc",
+    status: Optional[str] = None,
+    review_status: Optional[str] = None,
+    loan_type: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    highlighted: Optional[bool] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    min_dsr: Optional[float] = None,
+    max_dsr: Optional[float] = None,
+    min_income: Optional[float] = None,
+    max_income: Optional[float] = None,
+    risk_flag: Optional[str] = None,
+):
+    """
+    Get applications, newest first by default
+
+    Keyset-paginated: pass the X-Next-Cursor response header back as ?cursor= for
+    the next page (absent on the last page). sort: date | dsr | income | ndi | score,
+    order: asc | desc. status / review_status / risk_level / loan_type accept
+    comma-separated values; date_from is inclusive, date_to exclusive.
+    """
+    try:
+        items, next_cursor = await run_in_threadpool(
+            application_listing.list,
+            limit=limit, cursor=cursor, sort=sort, order=order,
+            status=status, review_status=review_status, loan_type=loan_type, risk_level=risk_level,
+            highlighted=highlighted, date_from=date_from, date_to=date_to,
+            min_dsr=min_dsr, max_dsr=max_dsr, min_income=min_income, max_income=max_income,
+            risk_flag=risk_flag,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @app.get("/api/analytics/summary")
 async def get_analytics_summary():
-    """Get aggregated analytics data for portfolio dashboard"""
-    with get_session() as session:
-        apps = session.query(Application).all()
-        
-        total = len(apps)
-        if total == 0:
-            return {
-                "kpi": {
-                    "total_applications": 0,
-                    "total_exposure": 0,
-                    "avg_risk_score": 0,
-                    "approval_rate": 0,
-                    "avg_processing_time": "0s",
-                    "ai_human_agreement": 0
-                },
-                "charts": {
-                    "score_distribution": [],
-                    "loan_composition": [],
-                    "top_risk_flags": [],
-                    "status_breakdown": []
-                },
-                "overrides": [],
-                "advanced": {
-                    "financial_scatter": [],
-                    "application_trends": [],
-                    "risk_level_analysis": {
-                        "breakdown": [],
-                        "processing_time": []
-                    }
-                }
-            }
-        
-        # KPI Calculations
-        approved = [a for a in apps if a.final_decision == "Approved"]
-        rejected = [a for a in apps if a.final_decision == "Rejected"]
-        
-        # Total Exposure (sum of approved loan amounts)
-        total_exposure = sum([a.requested_amount for a in approved if a.requested_amount])
-        
-        # Average Risk Score
-        scores = [a.risk_score for a in apps if a.risk_score is not None]
-        avg_score = round(sum(scores) / len(scores), 1) if scores else 0
-        
-        # Approval Rate
-        approval_rate = round((len(approved) / total * 100), 1) if total > 0 else 0
-        
-        # Average Processing Time
-        processing_times = [a.processing_time for a in apps if a.processing_time]
-        avg_time = sum(processing_times) / len(processing_times) if processing_times else 0
-        avg_time_str = f"{avg_time:.1f}s" if avg_time < 60 else f"{avg_time/60:.1f}m"
-        
-        # AI-Human Agreement Rate
-        reviewed = [a for a in apps if a.review_status in [ReviewStatus.HUMAN_VERIFIED, ReviewStatus.MANUAL_OVERRIDE]]
-        agreements = [a for a in reviewed if a.ai_decision == a.human_decision]
-        ai_agreement = round((len(agreements) / len(reviewed) * 100), 1) if reviewed else 100
-        
-        # Risk Score Distribution
-        score_dist = [
-            {"range": "0-20", "count": len([s for s in scores if s <= 20])},
-            {"range": "21-40", "count": len([s for s in scores if 20 < s <= 40])},
-            {"range": "41-60", "count": len([s for s in scores if 40 < s <= 60])},
-            {"range": "61-80", "count": len([s for s in scores if 60 < s <= 80])},
-            {"range": "81-100", "count": len([s for s in scores if 80 < s <= 100])},
-        ]
-        
-        # Loan Type Composition - Extract from analysis_result
-        loan_types = {}
-        for a in apps:
-            l_type = "Unknown"
-            # First try to get from analysis_result (where AI stores it)
-            if a.analysis_result and "applicant_profile" in a.analysis_result:
-                l_type = a.analysis_result["applicant_profile"].get("loan_type", "Unknown")
-            # Fallback to loan_type field if exists
-            elif a.loan_type:
-                l_type = a.loan_type.value if hasattr(a.loan_type, 'value') else str(a.loan_type)
-            loan_types[l_type] = loan_types.get(l_type, 0) + 1
-        loan_composition = [{"name": k, "value": v} for k, v in loan_types.items()]
-        
-        # Top Risk Flags from analysis results
-        risk_flags_count = {}
-        for a in apps:
-            if a.analysis_result and "key_risk_flags" in a.analysis_result:
-                for flag in a.analysis_result["key_risk_flags"]:
-                    flag_name = flag.get("flag", "Unknown")
-                    risk_flags_count[flag_name] = risk_flags_count.get(flag_name, 0) + 1
-        
-        top_risk_flags = sorted(
-            [{"name": k, "count": v} for k, v in risk_flags_count.items()],
-            key=lambda x: x["count"],
-            reverse=True
-        )[:5]
-        
-        # Application Status Breakdown
-        status_breakdown = {
-            "Approved": len([a for a in apps if a.final_decision == "Approved"]),
-            "Rejected": len([a for a in apps if a.final_decision == "Rejected"]),
-            "Pending Review": len([a for a in apps if a.status == ApplicationStatus.REVIEW_REQUIRED]),
-            "Processing": len([a for a in apps if a.status == ApplicationStatus.PROCESSING or a.status == ApplicationStatus.ANALYZING]),
-        }
-        status_chart = [{"name": k, "count": v} for k, v in status_breakdown.items() if v > 0]
-        
-        # Human Override Log
-        overrides = []
-        for a in apps:
-            if a.review_status == ReviewStatus.MANUAL_OVERRIDE:
-                overrides.append({
-                    "id": a.application_id,
-                    "name": a.applicant_name or "Unknown",
-                    "ai_decision": a.ai_decision or "N/A",
-                    "human_decision": a.human_decision or "N/A",
-                    "reason": a.override_reason or "No reason provided",
-                    "date": a.reviewed_at.strftime("%Y-%m-%d") if a.reviewed_at else a.updated_at.strftime("%Y-%m-%d")
-                })
-        
-        # === ADVANCED ANALYTICS ===
-        
-        # 1. Financial Health Scatter Data (Income vs DSR)
-        scatter_data = []
-        for a in apps:
-            if a.analysis_result and "financial_metrics" in a.analysis_result:
-                metrics = a.analysis_result["financial_metrics"]
-                
-                # Extract income (handle nested structure)
-                income = 0
-                if "net_disposable_income" in metrics:
-                    ndi = metrics["net_disposable_income"]
-                    income = ndi.get("calculation", {}).get("net_income", 0)
-                
-                # Extract DSR (handle nested structure)
-                dsr = 0
-                if "debt_service_ratio" in metrics:
-                    dsr_data = metrics["debt_service_ratio"]
-                    dsr = dsr_data.get("value", 0)
-                
-                if income > 0 and dsr > 0:
-                    scatter_data.append({
-                        "income": income,
-                        "dsr": dsr,
-                        "status": a.final_decision or "Pending",
-                        "name": a.applicant_name or "Unknown",
-                        "id": a.application_id
-                    })
-        
-        # 2. Application Trends Over Time
-        from collections import defaultdict
-        date_stats = defaultdict(lambda: {"total": 0, "approved": 0, "rejected": 0})
-        
-        for a in apps:
-            date_key = a.created_at.strftime("%Y-%m-%d") if a.created_at else "Unknown"
-            date_stats[date_key]["total"] += 1
-            if a.final_decision == "Approved":
-                date_stats[date_key]["approved"] += 1
-            elif a.final_decision == "Rejected":
-                date_stats[date_key]["rejected"] += 1
-        
-        trend_data = [
-            {
-                "date": date,
-                "total": stats["total"],
-                "approved": stats["approved"],
-                "rejected": stats["rejected"],
-                "approval_rate": round((stats["approved"] / stats["total"] * 100), 1) if stats["total"] > 0 else 0
-            }
-            for date, stats in sorted(date_stats.items())
-        ]
-        
-        # 3. Risk Level Deep Dive
-        risk_analysis = {}
-        for risk_level in ["Low", "Medium", "High"]:
-            risk_apps = [a for a in apps if a.risk_level and a.risk_level.value == risk_level]
-            total_risk = len(risk_apps)
-            
-            if total_risk > 0:
-                approved_risk = len([a for a in risk_apps if a.final_decision == "Approved"])
-                rejected_risk = len([a for a in risk_apps if a.final_decision == "Rejected"])
-                pending_risk = total_risk - approved_risk - rejected_risk
-                
-                risk_analysis[risk_level] = {
-                    "total": total_risk,
-                    "approved": approved_risk,
-                    "rejected": rejected_risk,
-                    "pending": pending_risk,
-                    "approval_rate": round((approved_risk / total_risk * 100), 1)
-                }
-        
-        risk_breakdown = [
-            {
-                "risk_level": level,
-                "approved": data["approved"],
-                "rejected": data["rejected"],
-                "pending": data["pending"],
-                "approval_rate": data["approval_rate"]
-            }
-            for level, data in risk_analysis.items()
-        ]
-        
-        # Processing Time Analysis
-        time_ranges = {
-            "< 30s": 0,
-            "30-45s": 0,
-            "45-60s": 0,
-            "> 60s": 0
-        }
-        
-        for a in apps:
-            if a.processing_time:
-                if a.processing_time < 30:
-                    time_ranges["< 30s"] += 1
-                elif a.processing_time < 45:
-                    time_ranges["30-45s"] += 1
-                elif a.processing_time < 60:
-                    time_ranges["45-60s"] += 1
-                else:
-                    time_ranges["> 60s"] += 1
-        
-        processing_distribution = [
-            {"range": k, "count": v}
-            for k, v in time_ranges.items()
-        ]
-        
-        return {
-            "kpi": {
-                "total_applications": total,
-                "total_exposure": total_exposure,
-                "avg_risk_score": avg_score,
-                "approval_rate": approval_rate,
-                "avg_processing_time": avg_time_str,
-                "ai_human_agreement": ai_agreement
-            },
-            "charts": {
-                "score_distribution": score_dist,
-                "loan_composition": loan_composition,
-                "top_risk_flags": top_risk_flags,
-                "status_breakdown": status_chart
-            },
-            "overrides": sorted(overrides, key=lambda x: x["date"], reverse=True)[:5],
-            "advanced": {
-                "financial_scatter": scatter_data,
-                "application_trends": trend_data,
-                "risk_level_analysis": {
-                    "breakdown": risk_breakdown,
-                    "processing_time": processing_distribution
-                }
-            }
-        }
+    """Get aggregated analytics data for portfolio dashboard (computed in SQL)"""
+    return await run_in_threadpool(analytics_service.summary)
 
 
 @app.get("/api/application/{application_id}")
@@ -376,6 +195,12 @@ async def get_application(application_id: str):
         if not app:
             raise HTTPException(status_code=404, detail="Application not found")
 
+        # Document texts are stored separately; merged back so the response shape is unchanged
+        document_texts = document_store.load(application_id)
+        analysis_result = app.analysis_result
+        if analysis_result is not None and document_texts is not None:
+            analysis_result = {**analysis_result, "document_texts": document_texts}
+
         # Build file URLs for static access (PDF/Text originals)
         def build_file_url(path: Optional[str]) -> Optional[str]:
             if not path:
@@ -432,8 +257,8 @@ async def get_application(application_id: str):
             "risk_level": app.risk_level.value if app.risk_level else None,
             "final_decision": app.final_decision,
             "created_at": app.created_at.isoformat(),
-            "analysis_result": app.analysis_result,
-            "document_texts": app.analysis_result.get("document_texts") if app.analysis_result else None,
+            "analysis_result": analysis_result,
+            "document_texts": document_texts,
             "review_status": app.review_status.value if app.review_status else None,
             "ai_decision": app.ai_decision,
             "human_decision": app.human_decision,
@@ -458,9 +283,25 @@ async def get_application(application_id: str):
             "supporting_doc_2_url": supporting_doc_2_url,
             "supporting_doc_3_url": supporting_doc_3_url,
             "file_metadata": file_metadata,
+            "duplicate_of": app.duplicate_of,
+            "duplicate_matches": app.duplicate_matches or [],
         }
 
 
+@app.get("/api/application/{application_id}/transactions")
+async def get_application_transactions(application_id: str):
+    """Parsed bank-statement transactions of an application and the cash-flow metrics computed from them"""
+    statement = await run_in_threadpool(transaction_store.load, application_id)
+    if statement is None:
+        raise HTTPException(status_code=404, detail="No parsed bank statement for this application")
+    return {
+        "application_id": application_id,
+        "row_count": len(statement),
+        "cash_flow": statement_parser.cash_flow_metrics(statement),
+        "transactions": statement.records(),
+    }
+
+
 class CommentRequest(BaseModel):
     comment: str
 
@@ -498,6 +339,21 @@ async def toggle_highlight(application_id: str, request: dict):
         }
 
 
+def delete_applications(session, apps: List[Application]):
+    """
+    Delete applications together with the rows stored alongside them (caller commits)
+
+    Each row goes through session.delete() so the flush hooks keep the analytics
+    rollups in step and publish "deleted" status events; a bulk query delete skips them.
+    """
+    for app in apps:
+        session.delete(app)
+        document_store.delete(session, app.application_id)
+        analysis_field_index.delete(session, app.application_id)
+        duplicate_index.delete(session, app.application_id)
+        transaction_store.delete(session, app.application_id)
+
+
 @app.delete("/api/application/{application_id}")
 async def delete_application(application_id: str):
     print(f"Deleting {application_id}")
@@ -509,7 +365,7 @@ async def delete_application(application_id: str):
             statement = select(Application).where(Application.application_id == application_id)
             app = session.exec(statement).first()
             if app:
-                session.delete(app)
+                delete_applications(session, [app])
                 session.commit()
                 print(f"Successfully deleted {application_id}")
             else:
@@ -525,19 +381,83 @@ async def delete_application(application_id: str):
 
 @app.get("/api/status/{application_id}")
 async def get_status(application_id: str):
-    """Lightweight status endpoint for polling"""
+    """Lightweight status endpoint for polling (prefer /api/events/status to be pushed changes)"""
     with get_session() as session:
-        app_obj = session.query(Application).filter(Application.application_id == application_id).first()
-        if not app_obj:
+        row = session.query(*STATUS_COLUMNS).filter(Application.application_id == application_id).first()
+        if not row:
             raise HTTPException(status_code=404, detail="Application not found")
-        return {
-            "application_id": app_obj.application_id,
-            "status": app_obj.status.value if app_obj.status else None,
-            "risk_score": app_obj.risk_score or 0,
-            "risk_level": app_obj.risk_level.value if app_obj.risk_level else None,
-            "final_decision": app_obj.final_decision or app_obj.ai_decision or "Pending",
-            "review_status": app_obj.review_status.value if app_obj.review_status else None,
+        return status_snapshot(row)
+
+
+class BulkStatusRequest(BaseModel):
+    application_ids: Optional[List[str]] = None
+    batch_id: Optional[str] = None
+
+
+@app.post("/api/status/bulk")
+async def get_bulk_status(request: BulkStatusRequest):
+    """Status, pipeline stage and batch counters of many applications (by IDs or batch ID) in one query"""
+    try:
+        return await run_in_threadpool(batch_status.lookup, request.application_ids, request.batch_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/batch/{batch_id}/status")
+async def get_batch_status(batch_id: str):
+    """Status of every application registered by one /api/upload/batch call"""
+    result = await run_in_threadpool(batch_status.lookup, None, batch_id)
+    if not result["applications"]:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    result["batch"] = await run_in_threadpool(batch_registry.get, batch_id)  # Source file, counts, registration timing
+    return result
+
+
+@app.get("/api/events/status")
+async def status_events(ids: Optional[str] = None):
+    """
+    Multiplexed Server-Sent Events stream of application status transitions.
+
+    ids: comma-separated application IDs, or omitted / "all" for every application.
+    Each requested ID first gets a {"event": "snapshot", ...} with its current status,
+    then every committed change is pushed as {"event": "status" | "created" | "deleted", ...}.
+    """
+    wanted = None if not ids or ids.strip().lower() == "all" else {i.strip() for i in ids.split(",") if i.strip()}
+
+    def snapshot():
+        with get_session() as session:
+            rows = session.query(*STATUS_COLUMNS).filter(Application.application_id.in_(wanted)).all()
+            return [status_snapshot(row) for row in rows]
+
+    async def generate_sse():
+        def event(payload: dict) -> str:
+            return f"data: {json.dumps(payload)}\n\n"
+
+        # Subscribe before reading the snapshot so no transition falls in between
+        subscription = event_bus.subscribe(wanted)
+        try:
+            if wanted:
+                for payload in await run_in_threadpool(snapshot):
+                    yield event({"event": "snapshot", **payload})
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscription.queue.get(), timeout=Config().SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield event(payload)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        generate_sse(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
         }
+    )
 
 
 @app.get("/api/application/{application_id}/analyze-stream")
@@ -555,9 +475,8 @@ async def analyze_stream(application_id: str):
         if not app_obj:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        # Get stored document texts from analysis_result if available
-        analysis = app_obj.analysis_result or {}
-        doc_texts = analysis.get('document_texts', {})
+        # Get stored document texts if available
+        doc_texts = document_store.load(application_id) or {}
         
         application_form_text = doc_texts.get('application_form', '')
         bank_text = doc_texts.get('bank_statement', '')
@@ -565,58 +484,76 @@ async def analyze_stream(application_id: str):
         payslip_text = doc_texts.get('payslip', '')
         supporting_docs_texts = doc_texts.get('supporting_docs', [])
     
+    async def produce(queue: asyncio.Queue):
+        """Pump Gemini chunks into the queue as they arrive; None marks the end"""
+        try:
+            async for chunk in ai_engine.analyze_application_streaming(
+                application_form_text=application_form_text,
+                raw_text="",
+                bank_text=bank_text,
+                essay_text=essay_text,
+                payslip_text=payslip_text,
+                application_id=application_id,
+                supporting_docs_texts=supporting_docs_texts
+            ):
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(None)
+
     async def generate_sse():
-        """Generator function for SSE stream"""
+        """Generator function for SSE stream - forwards chunks and completed sections as they arrive"""
+        def event(payload: dict) -> str:
+            return f"data: {json.dumps(payload)}\n\n"
+
+        queue: asyncio.Queue = asyncio.Queue()
+        producer = asyncio.create_task(produce(queue))
         try:
             # Send initial event
-            yield f"data: {{\"status\": \"started\", \"message\": \"AI analysis starting...\"}}\n\n"
+            yield event({"status": "started", "message": "AI analysis starting..."})
             
-            # Run streaming analysis in thread pool
-            accumulated_json = ""
+            sections = JSONSectionStream()
             chunk_count = 0
             
-            def run_streaming():
-                return list(ai_engine.analyze_application_streaming(
-                    application_form_text=application_form_text,
-                    raw_text="",
-                    bank_text=bank_text,
-                    essay_text=essay_text,
-                    payslip_text=payslip_text,
-                    application_id=application_id,
-                    supporting_docs_texts=supporting_docs_texts
-                ))
-            
-            chunks = await run_in_threadpool(run_streaming)
-            
-            for chunk in chunks:
-                accumulated_json += chunk
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(queue.get(), timeout=Config().SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"  # Comment line keeps proxies from closing an idle stream
+                    continue
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                
                 chunk_count += 1
-                # Send progress update every few chunks
-                if chunk_count % 5 == 0:
-                    yield f"data: {{\"status\": \"streaming\", \"chunks\": {chunk_count}, \"length\": {len(accumulated_json)}}}\n\n"
+                yield event({"status": "streaming", "chunks": chunk_count, "length": len(sections.text) + len(chunk)})
+                for name, value in sections.feed(chunk):
+                    yield event({"status": "section", "section": name, "data": value})
             
             # Parse the complete JSON
-            import json
-            import re
-            
-            result_text = accumulated_json.strip()
+            result_text = sections.text.strip()
             result_text = re.sub(r'^```json\s*', '', result_text)
             result_text = re.sub(r'\s*```$', '', result_text)
             
             try:
                 result = json.loads(result_text)
                 # Send completed event with result
-                yield f"data: {{\"status\": \"completed\", \"result\": {json.dumps(result)}}}\n\n"
+                yield event({"status": "completed", "result": result})
             except json.JSONDecodeError as e:
-                yield f"data: {{\"status\": \"error\", \"message\": \"JSON parse error: {str(e)}\"}}\n\n"
+                yield event({"status": "error", "message": f"JSON parse error: {str(e)}"})
             
             yield "data: [DONE]\n\n"
             
         except Exception as e:
             import traceback
             traceback.print_exc()
-            yield f"data: {{\"status\": \"error\", \"message\": \"{str(e)}\"}}\n\n"
+            yield event({"status": "error", "message": str(e)})
             yield "data: [DONE]\n\n"
+        finally:
+            # Client disconnected or stream finished - stop consuming Gemini output
+            producer.cancel()
     
     return StreamingResponse(
         generate_sse(),
@@ -649,13 +586,34 @@ async def debug_risk_flags(application_id: str):
         }
 
 
+@retry_on_lock
+def set_application_status(
+    application_id: str,
+    status: Optional[ApplicationStatus] = None,
+    stage: Optional[ProcessingStage] = None,
+) -> bool:
+    """Update one application's status and/or pipeline stage in its own short transaction. Returns False if it does not exist."""
+    with get_session() as session:
+        app = session.query(Application).filter(Application.application_id == application_id).first()
+        if not app:
+            return False
+        if status is not None:
+            app.status = status
+        if stage is not None:
+            app.processing_stage = stage
+            app.stage_updated_at = datetime.utcnow()
+        session.add(app)
+    return True
+
+
 async def process_application_background(
     application_id: str,
     application_form_path: str,
     bank_statement_path: str,
     essay_path: str,
     payslip_path: str,
-    supporting_doc_paths: List[str] = []
+    supporting_doc_paths: List[str] = [],
+    content_hashes: Optional[dict] = None
 ):
     """Background task to process application with AI - extracts applicant info from Application Form
     
@@ -666,6 +624,7 @@ async def process_application_background(
         essay_path: Path to Loan Essay PDF
         payslip_path: Path to Payslip PDF
         supporting_doc_paths: List of paths to supporting documents
+        content_hashes: Document label -> SHA-256 recorded at upload, if known
     """
     print(f"\n{'='*60}")
     print(f"Starting analysis for {application_id}")
@@ -677,102 +636,53 @@ async def process_application_background(
     print(f"{'='*60}\n")
 
     try:
-        with get_session() as session:
-            app = session.query(Application).filter(Application.application_id == application_id).first()
-            if not app:
-                print(f"ERROR: Application {application_id} not found in database!")
-                return
-            app.status = ApplicationStatus.ANALYZING
-            session.add(app)
-            session.commit()
-            print("✓ Status updated to ANALYZING")
+        # Identical resubmission of an analysed application: reuse its result, skip extraction and the LLM
+        if await run_in_threadpool(duplicate_index.reuse_analysis, application_id):
+            return
+
+        if not await run_in_threadpool(
+            set_application_status, application_id, ApplicationStatus.ANALYZING, ProcessingStage.EXTRACTING
+        ):
+            print(f"ERROR: Application {application_id} not found in database!")
+            return
+        print("✓ Status updated to ANALYZING")
 
         await asyncio.sleep(2)
 
-        pdf_processor = PDFProcessor()
-        text_processor = TextProcessor()
+        # Extraction stage - bounded separately from the LLM stage.
+        # All documents of the application are extracted concurrently.
+        documents = {
+            "application_form": application_form_path,
+            "bank_statement": bank_statement_path,
+            "essay": essay_path,
+            "payslip": payslip_path,
+        }
+        for i, path in enumerate(supporting_doc_paths):
+            documents[f"supporting_doc_{i+1}"] = path
+
+        async with job_queue.extraction_slot:
+            extracted = await extraction_service.extract_documents(documents, content_hashes)
+            statement, cash_flow = await parse_bank_statement(bank_statement_path)
+        extraction_timings = extraction_service.timing_report(extracted)
+
+        def text_or_fallback(label: str, fallback: str) -> str:
+            doc = extracted[label]
+            return doc.text if doc.ok else fallback
+
+        application_form_text = text_or_fallback("application_form", "Application form extraction failed")
+        bank_text = text_or_fallback("bank_statement", "Bank statement extraction failed")
+        essay_text = text_or_fallback("essay", "Essay extraction failed")
+        payslip_text = text_or_fallback("payslip", "Payslip extraction failed")
+        supporting_docs_texts = [
+            text_or_fallback(f"supporting_doc_{i+1}", f"Supporting doc {i+1} extraction failed")
+            for i in range(len(supporting_doc_paths))
+        ]
 
         raw_text = ""
-        application_form_text = ""
-        bank_text = ""
-        essay_text = ""
-        payslip_text = ""
-
-        # Application Form (NEW - extract applicant info)
-        try:
-            print(f"Extracting application form from: {application_form_path}")
-            if application_form_path.endswith('.pdf'):
-                application_form_text = await run_in_threadpool(pdf_processor.extract_text, application_form_path)
-            else:
-                application_form_text = await run_in_threadpool(text_processor.extract_text, application_form_path)
-            
-            raw_text += f"\n\n=== APPLICATION FORM ===\n{application_form_text}"
-            print(f"✓ Application form extracted: {len(application_form_text)} characters")
-        except Exception as e:
-            print(f"⚠ Error extracting application form: {e}")
-            application_form_text = "Application form extraction failed"
-            raw_text += f"\n\n=== APPLICATION FORM ===\n{application_form_text}"
-
-        # Bank Statement
-        try:
-            print(f"Extracting bank statement from: {bank_statement_path}")
-            if bank_statement_path.endswith('.pdf'):
-                bank_text = await run_in_threadpool(pdf_processor.extract_text, bank_statement_path)
-            else:
-                bank_text = await run_in_threadpool(text_processor.extract_text, bank_statement_path)
-            
-            raw_text += f"\n\n=== BANK STATEMENT ===\n{bank_text}"
-            print(f"✓ Bank statement extracted: {len(bank_text)} characters")
-        except Exception as e:
-            print(f"⚠ Error extracting bank statement: {e}")
-            bank_text = "Bank statement extraction failed"
-            raw_text += f"\n\n=== BANK STATEMENT ===\n{bank_text}"
-
-        # Essay
-        try:
-            print(f"Extracting essay from: {essay_path}")
-            if essay_path.endswith('.pdf'):
-                essay_text = await run_in_threadpool(pdf_processor.extract_text, essay_path)
-            else:
-                essay_text = await run_in_threadpool(text_processor.extract_text, essay_path)
-            
-            raw_text += f"\n\n=== LOAN APPLICATION ESSAY ===\n{essay_text}"
-            print(f"✓ Essay extracted: {len(essay_text)} characters")
-        except Exception as e:
-            print(f"⚠ Error extracting essay: {e}")
-            essay_text = "Essay extraction failed"
-            raw_text += f"\n\n=== LOAN APPLICATION ESSAY ===\n{essay_text}"
-
-        # Payslip
-        try:
-            print(f"Extracting payslip from: {payslip_path}")
-            if payslip_path.endswith('.pdf'):
-                payslip_text = await run_in_threadpool(pdf_processor.extract_text, payslip_path)
-            else:
-                payslip_text = await run_in_threadpool(text_processor.extract_text, payslip_path)
-            
-            raw_text += f"\n\n=== PAYSLIP DOCUMENT ===\n{payslip_text}"
-            print(f"✓ Payslip extracted: {len(payslip_text)} characters")
-        except Exception as e:
-                print(f"⚠ Error extracting payslip: {e}")
-                payslip_text = "Payslip extraction failed"
-                raw_text += f"\n\n=== PAYSLIP DOCUMENT ===\n{payslip_text}"
-
-        # Supporting Documents
-        supporting_docs_texts = []
-        for i, path in enumerate(supporting_doc_paths):
-            try:
-                print(f"Extracting supporting doc {i+1} from: {path}")
-                if path.endswith('.pdf'):
-                    doc_text = await run_in_threadpool(pdf_processor.extract_text, path)
-                else:
-                    doc_text = await run_in_threadpool(text_processor.extract_text, path)
-                supporting_docs_texts.append(doc_text)
-                print(f"✓ Supporting doc {i+1} extracted: {len(doc_text)} characters")
-            except Exception as e:
-                print(f"⚠ Error extracting supporting doc {i+1}: {e}")
-                supporting_docs_texts.append(f"Supporting doc {i+1} extraction failed")
-        
+        raw_text += f"\n\n=== APPLICATION FORM ===\n{application_form_text}"
+        raw_text += f"\n\n=== BANK STATEMENT ===\n{bank_text}"
+        raw_text += f"\n\n=== LOAN APPLICATION ESSAY ===\n{essay_text}"
+        raw_text += f"\n\n=== PAYSLIP DOCUMENT ===\n{payslip_text}"
         raw_text += "\n\n=== SUPPORTING DOCUMENTS ===\n" + "\n".join(supporting_docs_texts)
 
         print(f"\nTotal raw text length: {len(raw_text)} characters")
@@ -780,66 +690,27 @@ async def process_application_background(
         result = None
         processing_start = datetime.utcnow()
         
-        # 1. Check Cache (Short transaction)
-        cached_result = None
-        with get_session() as session:
-            cached = session.query(AnalysisCache).filter(AnalysisCache.application_id == application_id).first()
-            if cached:
-                cached_result = cached.result_json
-        
-        if cached_result:
-            print("✓ Using cached result")
-            result = cached_result
-        elif ai_engine:
-            # 2. Run AI Analysis with UNLIMITED Retry (No DB transaction held)
-            MAX_RETRIES = 999  # Retry until success
-            RETRY_DELAY = 2  # seconds base delay
-            MAX_DELAY = 60   # max delay cap
-            last_error = None
-            
-            for attempt in range(1, MAX_RETRIES + 1):
-                try:
-                    print(f"⚡ Running AI analysis with Gemini... (Attempt {attempt})")
-                    # Pass application_form_text to AI for extraction
-                    # CRITICAL: Use run_in_threadpool to prevent blocking the main thread during heavy AI/Image processing
-                    result = await run_in_threadpool(
-                        ai_engine.analyze_application,
-                        application_form_text, 
-                        raw_text, 
-                        bank_text, 
-                        essay_text, 
-                        payslip_text, 
-                        application_id,
-                        application_form_path=application_form_path,
-                        supporting_docs_texts=supporting_docs_texts
-                    )
-                    print("✓ AI analysis completed (Gemini)")
-                    
-                    # 3. Cache Result (Short transaction)
-                    with get_session() as session:
-                        cache = AnalysisCache(application_id=application_id, result_json=result)
-                        session.add(cache)
-                        session.commit()
-                        print("✓ Result cached")
-                    break  # Success, exit retry loop
-                    
-                except Exception as e:
-                    last_error = e
-                    error_str = str(e).lower()
-                    print(f"❌ AI analysis failed (Attempt {attempt}): {e}")
-                    
-                    # Calculate wait time with exponential backoff, capped at MAX_DELAY
-                    wait_time = min(RETRY_DELAY * (2 ** (attempt - 1)), MAX_DELAY)
-                    
-                    # Longer wait for rate limit errors
-                    if '429' in error_str or 'rate limit' in error_str or 'quota' in error_str:
-                        wait_time = min(wait_time * 2, MAX_DELAY)
-                        print(f"🔄 Rate limit detected. Waiting {wait_time}s before retry...")
-                    else:
-                        print(f"🔄 Retrying in {wait_time}s...")
-                    
-                    await asyncio.sleep(wait_time)
-                    continue
+        # Identical prompts are served from the content-addressed analysis
+        # cache inside ai_engine.analyze_application. Rate limiting and retries
+        # of Gemini calls are handled by the shared llm_client scheduler; if it
+        # gives up on a transient error, the job queue retries the job later.
+        if ai_engine:
+            print("⚡ Running AI analysis with Gemini...")
+            await run_in_threadpool(set_application_status, application_id, stage=ProcessingStage.LLM_ANALYSIS)
+            result = await ai_engine.analyze_application(
+                application_form_text, 
+                raw_text, 
+                bank_text, 
+                essay_text, 
+                payslip_text, 
+                application_id,
+                application_form_path=application_form_path,
+                supporting_docs_texts=supporting_docs_texts
+            )
+            if cash_flow:
+                # Closing balance / debt from the parsed transaction table, not the LLM's reading of the text
+                result = ai_engine.apply_statement_cash_flow(result, cash_flow)
+            print("✓ AI analysis completed (Gemini)")
         else:
             if AI_ONLY_MODE:
                 print("🚫 AI-ONLY MODE: No API key configured - refusing to process")
@@ -847,7 +718,7 @@ async def process_application_background(
             else:
                 print("ℹ No Gemini API key configured")
                 print("🔄 Using document-based analysis...")
-                result = generate_mock_result("Unknown", raw_text, application_id, 50000, bank_text, essay_text, payslip_text, application_form_text)
+                result = generate_mock_result("Unknown", raw_text, application_id, 50000, bank_text, essay_text, payslip_text, application_form_text, cash_flow=cash_flow)
                 print("✓ Document-based analysis completed")
         
         # Calculate processing time
@@ -857,6 +728,7 @@ async def process_application_background(
 
         if not result:
             raise Exception("No analysis result generated!")
+        await run_in_threadpool(set_application_status, application_id, stage=ProcessingStage.SCORING)
 
         # Extract applicant info from AI response
         applicant_info = result.get('applicant_profile', {})
@@ -900,6 +772,7 @@ async def process_application_background(
         result['risk_score'] = risk_score
         result['risk_level'] = risk_level
         result['final_decision'] = final_decision
+        result['extraction_timings'] = extraction_timings
 
         print("\nExtracted Applicant Info:")
         print(f"  Name: {applicant_name}")
@@ -950,9 +823,18 @@ async def process_application_background(
                 app.risk_level = RiskLevel(rl_val)
                 app.final_decision = final_decision or "Review Required"
                 app.ai_decision = final_decision or "Review Required"
+                # Full document texts go to the compressed store, not the application row
+                document_texts = result.pop('document_texts', None)
                 app.analysis_result = result
+                document_store.save(session, application_id, document_texts)
+                transaction_store.save(session, application_id, statement, extracted["bank_statement"].content_hash)
+                analysis_field_index.apply(session, app)
+                # Hashes computed during extraction and the AI-extracted IC feed the duplicate index
+                duplicate_index.check(session, app, {label: doc.content_hash for label, doc in extracted.items()})
                 app.processing_time = processing_time
                 app.updated_at = datetime.utcnow()
+                app.processing_stage = ProcessingStage.COMPLETED
+                app.stage_updated_at = app.updated_at
                 app.decision_history = [{
                     "timestamp": datetime.utcnow().isoformat(),
                     "actor": "AI System",
@@ -967,18 +849,69 @@ async def process_application_background(
                 print(f"{'='*60}\n")
 
     except Exception as e:
+        if is_lock_error(e) or is_retryable(e):
+            # Transient (database locked / Gemini rate limit or 5xx after llm_client's own retries):
+            # the job queue re-queues the job with backoff and marks FAILED once attempts run out
+            print(f"⚠ Transient error processing {application_id}: {e}")
+            raise
         import traceback
         print("\n❌ CRITICAL ERROR in background processing:")
         print(f"Error: {e}")
         print(f"Traceback:\n{traceback.format_exc()}")
         print(f"{'='*60}\n")
-        with get_session() as session:
-            app = session.query(Application).filter(Application.application_id == application_id).first()
-            if app:
-                app.status = ApplicationStatus.FAILED
-                session.add(app)
-                session.commit()
-                print(f"Set application {application_id} status to FAILED")
+        if await run_in_threadpool(set_application_status, application_id, ApplicationStatus.FAILED, ProcessingStage.FAILED):
+            print(f"Set application {application_id} status to FAILED")
+
+
+async def parse_bank_statement(path: Optional[str]):
+    """
+    Transaction table and cash-flow metrics of a PDF bank statement
+
+    Returns:
+        (StatementTable, metrics dict), or (None, None) when the statement is not a PDF or has no readable table
+    """
+    if not path or not path.lower().endswith(".pdf"):
+        return None, None
+    try:
+        blocks = await extraction_service.extract_coordinates(path)  # Cached by content hash
+        statement = await run_in_threadpool(statement_parser.parse, blocks)
+    except Exception as e:
+        print(f"⚠ Bank statement table not parsed: {e}")
+        return None, None
+    cash_flow = statement_parser.cash_flow_metrics(statement)
+    if cash_flow is None:
+        print("ℹ No transaction table found in bank statement")
+        return None, None
+    print(f"✓ Bank statement: {len(statement)} rows, {cash_flow['months']} month(s), "
+          f"closing balance {cash_flow['closing_balance']}, {cash_flow['balance_mismatches']} balance mismatch(es)")
+    return statement, cash_flow
+
+
+async def run_application_job(application_id: str):
+    """Job queue handler - loads document paths from the application row and processes it"""
+    with get_session() as session:
+        app_obj = session.query(Application).filter(Application.application_id == application_id).first()
+        if not app_obj:
+            print(f"⚠ Job skipped: application {application_id} no longer exists")
+            return
+        application_form_path = app_obj.application_form_path or ''
+        bank_path = app_obj.bank_statement_path or ''
+        essay_path = app_obj.essay_path or ''
+        payslip_path = app_obj.payslip_path or ''
+        supporting_doc_paths = [
+            p for p in (app_obj.supporting_doc_1_path, app_obj.supporting_doc_2_path, app_obj.supporting_doc_3_path) if p
+        ]
+        content_hashes = dict(app_obj.document_hashes or {})  # Computed at upload - extraction skips re-hashing
+
+    await process_application_background(
+        application_id,
+        application_form_path,
+        bank_path,
+        essay_path,
+        payslip_path,
+        supporting_doc_paths,
+        content_hashes=content_hashes,
+    )
 
 
 @app.post("/api/upload")
@@ -993,287 +926,255 @@ async def upload_application(
 ):
     """Upload new loan application with 4 required documents + up to 3 supporting docs"""
     try:
-        # Generate application ID
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        application_id = f"APP-{timestamp}"
-        
-        # Create application folder
-        app_folder = UPLOAD_DIR / application_id
-        app_folder.mkdir(exist_ok=True)
-        
-        # Save Application Form (NEW)
-        application_form_path = app_folder / application_form.filename
-        with open(application_form_path, "wb") as buffer:
-            shutil.copyfileobj(application_form.file, buffer)
-        
-        # Save bank statement
-        bank_statement_path = app_folder / bank_statement.filename
-        with open(bank_statement_path, "wb") as buffer:
-            shutil.copyfileobj(bank_statement.file, buffer)
-        
-        # Save essay
-        essay_path = app_folder / essay.filename
-        with open(essay_path, "wb") as buffer:
-            shutil.copyfileobj(essay.file, buffer)
-
-        # Save payslip
-        payslip_path = app_folder / payslip.filename
-        with open(payslip_path, "wb") as buffer:
-            shutil.copyfileobj(payslip.file, buffer)
-        
-        # Save supporting documents (up to 3)
-        supporting_doc_paths = []
-        
-        if supporting_doc_1:
-            doc_path = app_folder / f"supporting_doc_1_{supporting_doc_1.filename}"
-            with open(doc_path, "wb") as buffer:
-                shutil.copyfileobj(supporting_doc_1.file, buffer)
-            supporting_doc_paths.append(str(doc_path))
-            
-        if supporting_doc_2:
-            doc_path = app_folder / f"supporting_doc_2_{supporting_doc_2.filename}"
-            with open(doc_path, "wb") as buffer:
-                shutil.copyfileobj(supporting_doc_2.file, buffer)
-            supporting_doc_paths.append(str(doc_path))
-            
-        if supporting_doc_3:
-            doc_path = app_folder / f"supporting_doc_3_{supporting_doc_3.filename}"
-            with open(doc_path, "wb") as buffer:
-                shutil.copyfileobj(supporting_doc_3.file, buffer)
-            supporting_doc_paths.append(str(doc_path))
+        # Generate application ID (time-ordered, unique across workers)
+        application_id = id_generator.application_id()
+        
+        # Stream all documents to the application folder concurrently; size/type
+        # limits are enforced while streaming and SHA-256 is computed in the same pass
+        stored = await upload_writer.save_all({
+            "application_form": (application_form, ""),
+            "bank_statement": (bank_statement, ""),
+            "essay": (essay, ""),
+            "payslip": (payslip, ""),
+            "supporting_doc_1": (supporting_doc_1, "supporting_doc_1_"),
+            "supporting_doc_2": (supporting_doc_2, "supporting_doc_2_"),
+            "supporting_doc_3": (supporting_doc_3, "supporting_doc_3_"),
+        }, UPLOAD_DIR / application_id)
+        # Supporting docs are packed into contiguous slots (uploading only 2 and 3 fills
+        # supporting_doc_1/2), so the hashes are keyed by the same slot as their path column
+        slots = {label: stored[label] for label in ("application_form", "bank_statement", "essay", "payslip")}
+        supporting_docs = [stored[label] for label in ("supporting_doc_1", "supporting_doc_2", "supporting_doc_3") if label in stored]
+        slots.update({f"supporting_doc_{i + 1}": f for i, f in enumerate(supporting_docs)})
         
         # Create application record (all fields will be filled by AI)
         with get_session() as session:
             app = Application(
                 application_id=application_id,
                 status=ApplicationStatus.PROCESSING,
-                application_form_path=str(application_form_path),
-                bank_statement_path=str(bank_statement_path),
-                essay_path=str(essay_path),
-                payslip_path=str(payslip_path),
-                supporting_doc_1_path=supporting_doc_paths[0] if len(supporting_doc_paths) > 0 else None,
-                supporting_doc_2_path=supporting_doc_paths[1] if len(supporting_doc_paths) > 1 else None,
-                supporting_doc_3_path=supporting_doc_paths[2] if len(supporting_doc_paths) > 2 else None,
+                application_form_path=slots["application_form"].path,
+                bank_statement_path=slots["bank_statement"].path,
+                essay_path=slots["essay"].path,
+                payslip_path=slots["payslip"].path,
+                supporting_doc_1_path=slots["supporting_doc_1"].path if "supporting_doc_1" in slots else None,
+                supporting_doc_2_path=slots["supporting_doc_2"].path if "supporting_doc_2" in slots else None,
+                supporting_doc_3_path=slots["supporting_doc_3"].path if "supporting_doc_3" in slots else None,
+                document_hashes={label: f.sha256 for label, f in slots.items()},
             )
             session.add(app)
+            # Indexed lookups of the new hashes / IC against earlier applications
+            duplicates = duplicate_index.check(session, app, app.document_hashes)
+            duplicate_of = app.duplicate_of
             session.commit()
         
-        # Use asyncio.create_task for truly concurrent background processing
-        # This allows the API to remain responsive while analysis runs
-        asyncio.create_task(
-            process_application_background(
-                application_id,
-                str(application_form_path),
-                str(bank_statement_path),
-                str(essay_path),
-                str(payslip_path),
-                supporting_doc_paths
-            )
-        )
+        # Queue durable background job - the worker pool bounds concurrency
+        # and a restart resumes the job instead of losing it
+        await run_in_threadpool(job_queue.enqueue, application_id)
         
         return {
             "success": True,
             "application_id": application_id,
+            "documents": {label: {"size": f.size, "sha256": f.sha256} for label, f in stored.items()},
+            "duplicate_of": duplicate_of,
+            "duplicates": duplicates,
             "message": "Application submitted for AI analysis (extracting applicant info from form)"
         }
         
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/upload/batch")
-async def upload_batch(
-    file: UploadFile = File(...),
-):
-    """Upload batch applications via CSV or ZIP"""
-    try:
-        # Save uploaded file
-        batch_path = UPLOAD_DIR / f"batch_{datetime.now().strftime('%Y%m%d%H%M%S')}_{file.filename}"
+def stage_csv_batch(batch_id: str, filename: str, source) -> List[Application]:
+    """
+    Save a CSV batch into the upload folder and build one Application per row (blocking; run in a threadpool)
+
+    Args:
+        batch_id: Batch the applications belong to (also prefixes the saved file name)
+        filename: Original file name
+        source: Binary file object of the upload, or the Path of a staged file (moved in place)
+    """
+    import csv
+    batch_path = UPLOAD_DIR / f"{batch_id}_{os.path.basename(filename)}"
+    if isinstance(source, Path):
+        shutil.move(str(source), batch_path)  # A rename when staging shares the volume
+    else:
         with open(batch_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        processed_count = 0
-        
+            shutil.copyfileobj(source, buffer)
+
+    applications = []
+    with open(batch_path, 'r', encoding='utf-8') as csvfile:
+        reader = csv.DictReader(csvfile)
+        for row in reader:
+            # Expected columns: loan_type, ic_number, applicant_name, requested_amount, bank_statement_path, essay_path
+            applications.append(Application(
+                application_id=id_generator.application_id(),
+                applicant_name=row.get('applicant_name', 'Batch Upload'),
+                applicant_ic=row.get('ic_number', 'N/A'),
+                loan_type=LoanType(row.get('loan_type', 'Personal Loan')),
+                requested_amount=float(row.get('requested_amount', 50000)),
+                status=ApplicationStatus.PROCESSING,
+                batch_id=batch_id,
+                bank_statement_path=row.get('bank_statement_path'),
+                essay_path=row.get('essay_path'),
+            ))
+    return applications
+
+
+async def ingest_batch(filename: str, source) -> dict:
+    """
+    Register and enqueue every applicant of a CSV or ZIP batch
+
+    Args:
+        filename: Original file name (its extension selects CSV or ZIP handling)
+        source: Binary file object of the upload, or the Path of a staged file (moved / read in place)
+    """
+    try:
+        config = Config()
+        started = time.perf_counter()
+        batch_id = id_generator.batch_id()
+
         # Handle CSV files
-        if file.filename.endswith('.csv'):
-            import csv
-            with open(batch_path, 'r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    # Expected columns: loan_type, ic_number, applicant_name, requested_amount, bank_statement_path, essay_path
-                    timestamp = datetime.now().strftime("%Y%m%d%H%M%S") + str(processed_count)
-                    app_id = f"APP-{timestamp}"
-                    
-                    with get_session() as session:
-                        app = Application(
-                            application_id=app_id,
-                            applicant_name=row.get('applicant_name', 'Batch Upload'),
-                            applicant_ic=row.get('ic_number', 'N/A'),
-                            loan_type=LoanType(row.get('loan_type', 'Personal Loan')),
-                            requested_amount=float(row.get('requested_amount', 50000)),
-                            status=ApplicationStatus.PROCESSING,
-                            bank_statement_path=row.get('bank_statement_path'),
-                            essay_path=row.get('essay_path'),
-                        )
-                        session.add(app)
-                        session.commit()
-                    
-                    # Use asyncio.create_task for concurrent background processing
-                    asyncio.create_task(
-                        process_application_background(
-                            app_id,
-                            row.get('loan_type', 'Personal Loan'),
-                            row.get('bank_statement_path'),
-                            row.get('essay_path')
-                        )
-                    )
-                    processed_count += 1
-        
-        # Handle ZIP files
-        elif file.filename.endswith('.zip'):
+        if filename.endswith('.csv'):
+            # Staging the file and parsing every row is blocking I/O, so it runs off the event loop
+            applications = await run_in_threadpool(stage_csv_batch, batch_id, filename, source)
+            app_ids = [app.application_id for app in applications]
+
+            # One batch record + chunked bulk insert, then one enqueue transaction per chunk
+            registration = await run_in_threadpool(batch_registry.register, batch_id, filename, "csv", applications)
+            await run_in_threadpool(duplicate_index.check_many, {app_id: {} for app_id in app_ids})  # IC matches
+            for offset in range(0, len(app_ids), config.BATCH_INSERT_CHUNK):
+                await run_in_threadpool(job_queue.enqueue_many, app_ids[offset:offset + config.BATCH_INSERT_CHUNK])
+        
+        # Handle ZIP files - streamed member by member from the upload itself
+        elif filename.endswith('.zip'):
             import zipfile
-            
-            # Extract ZIP to a temporary location
-            extract_root = UPLOAD_DIR / f"temp_zip_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            extract_root.mkdir(exist_ok=True)
-            
-            with zipfile.ZipFile(batch_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_root)
-            
-            # Group files by folder (Applicant)
-            applicants_data = {}
-            
-            for root, dirs, files in os.walk(extract_root):
-                # Skip the root folder itself if it just contains other folders
-                if root == str(extract_root):
-                    continue
-                    
-                folder_name = os.path.basename(root)
-                if folder_name.startswith("__MACOSX"): continue
-                
-                # Initialize applicant data
-                if folder_name not in applicants_data:
-                    applicants_data[folder_name] = {
-                        "files": [],
-                        "form": None,
-                        "bank": None,
-                        "essay": None,
-                        "payslip": None,
-                        "supporting": []
-                    }
-                
-                for filename in files:
-                    if filename.startswith("._"): continue # Skip Mac metadata
-                    
-                    file_path = os.path.join(root, filename)
-                    lower_name = filename.lower()
-                    
-                    # Smart Matching Logic - Enhanced for Tolerance
-                    # Check for Payslip (pay, slip, salary, gaji, income, wages)
-                    if any(k in lower_name for k in ["payslip", "pay slip", "salary", "gaji", "income", "wages", "slip", "pay"]):
-                        applicants_data[folder_name]["payslip"] = file_path
-                    
-                    # Check for Bank Statement (statement, bank, account, transaction, history, penyata)
-                    elif any(k in lower_name for k in ["bank", "statement", "account", "transaction", "history", "penyata", "txn"]):
-                        applicants_data[folder_name]["bank"] = file_path
-                        
-                    # Check for Application Form (form, application, borang, apply)
-                    elif any(k in lower_name for k in ["form", "application", "borang", "apply", "app"]):
-                        applicants_data[folder_name]["form"] = file_path
-                        
-                    # Check for Loan Essay (essay, purpose, reason, letter, proposal, explanation)
-                    elif any(k in lower_name for k in ["essay", "purpose", "reason", "letter", "proposal", "explanation", "tujuan"]):
-                        applicants_data[folder_name]["essay"] = file_path
-                        
-                    else:
-                        # Treat as supporting doc if we have space
-                        if len(applicants_data[folder_name]["supporting"]) < 3:
-                            applicants_data[folder_name]["supporting"].append(file_path)
-
-            # Process each identified applicant
-            for name, docs in applicants_data.items():
-                # Minimum requirement: Application Form + Bank Statement (or whatever logic you prefer)
-                # The user said "inside there will be 4+ documents", so we try to get all 4
-                
-                # Generate new Application ID
-                timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                # Add a small random suffix to avoid collision in fast loops
-                import random
-                suffix = random.randint(1000, 9999)
-                app_id = f"APP-{timestamp}{suffix}"
-                
-                # Create specific upload folder for this app
-                app_upload_dir = UPLOAD_DIR / app_id
-                app_upload_dir.mkdir(exist_ok=True)
-                
-                # Helper to move file and return new path
-                def move_file(src_path):
-                    if not src_path: return None
-                    dst_name = os.path.basename(src_path)
-                    dst_path = app_upload_dir / dst_name
-                    shutil.move(src_path, dst_path)
-                    return str(dst_path)
-
-                # Move files
-                form_path = move_file(docs["form"])
-                bank_path = move_file(docs["bank"])
-                essay_path = move_file(docs["essay"])
-                payslip_path = move_file(docs["payslip"])
-                
-                supp_paths = []
-                for sp in docs["supporting"]:
-                    supp_paths.append(move_file(sp))
-                
-                # Pad supporting docs to 3
-                while len(supp_paths) < 3:
-                    supp_paths.append(None)
 
-                # Create DB Record
-                with get_session() as session:
-                    app = Application(
+            with zipfile.ZipFile(source) as archive:
+                folders = zip_ingestor.plan(archive)
+                app_ids = [id_generator.application_id() for _ in folders]
+
+                # Final file paths are known from the central directory, so every
+                # applicant is registered up front in a few bulk transactions
+                applications = []
+                for folder, app_id in zip(folders, app_ids):
+                    paths = zip_ingestor.target_paths(folder, UPLOAD_DIR / app_id)
+                    supp_paths = paths["supporting"] + [None] * (3 - len(paths["supporting"]))
+                    applications.append(Application(
                         application_id=app_id,
-                        applicant_name=name.replace("_", " "), # Use folder name as initial applicant name
+                        applicant_name=folder.name.replace("_", " "), # Use folder name as initial applicant name
                         status=ApplicationStatus.PROCESSING,
-                        application_form_path=form_path,
-                        bank_statement_path=bank_path,
-                        essay_path=essay_path,
-                        payslip_path=payslip_path,
+                        batch_id=batch_id,
+                        application_form_path=paths["form"],
+                        bank_statement_path=paths["bank"],
+                        essay_path=paths["essay"],
+                        payslip_path=paths["payslip"],
                         supporting_doc_1_path=supp_paths[0],
                         supporting_doc_2_path=supp_paths[1],
                         supporting_doc_3_path=supp_paths[2]
-                    )
-                    session.add(app)
-                    session.commit()
-                
-                # Use asyncio.create_task for concurrent background processing
-                asyncio.create_task(
-                    process_application_background(
-                        app_id,
-                        form_path,
-                        bank_path,
-                        essay_path,
-                        payslip_path,
-                        [p for p in supp_paths if p] # Pass only valid paths
-                    )
-                )
-                processed_count += 1
-            
-            # Cleanup temp extraction folder
-            try:
-                shutil.rmtree(extract_root)
-            except:
-                pass
-        
+                    ))
+                registration = await run_in_threadpool(batch_registry.register, batch_id, filename, "zip", applications)
+
+                # Stream each applicant's files into its upload folder; finished folders are
+                # queued in groups (at most every BATCH_ENQUEUE_INTERVAL) so workers start on
+                # the first applicants while later folders are still unpacking
+                pending, queued, last_enqueue = {}, 0, 0.0
+                try:
+                    for folder, app_id in zip(folders, app_ids):
+                        pending[app_id] = await run_in_threadpool(zip_ingestor.write_folder, archive, folder, UPLOAD_DIR / app_id)
+                        if time.monotonic() - last_enqueue >= config.BATCH_ENQUEUE_INTERVAL:
+                            await run_in_threadpool(duplicate_index.check_many, pending)
+                            await run_in_threadpool(job_queue.enqueue_many, list(pending))
+                            queued += len(pending)
+                            pending, last_enqueue = {}, time.monotonic()
+                    await run_in_threadpool(duplicate_index.check_many, pending)
+                    await run_in_threadpool(job_queue.enqueue_many, list(pending))
+                except Exception:
+                    # Registered applicants that never got a job would stay PROCESSING forever
+                    await run_in_threadpool(batch_registry.mark_failed, app_ids[queued:])
+                    raise
+        else:
+            raise HTTPException(status_code=400, detail="Batch upload must be a .csv or .zip file")
+
+        processed_count = registration["application_count"]
+        ingest_seconds = round(time.perf_counter() - started, 2)
+        await run_in_threadpool(batch_registry.finish, batch_id, ingest_seconds=ingest_seconds)
         return {
             "success": True,
+            "batch_id": batch_id,
             "processed_count": processed_count,
+            "registration_ms": registration["registration_ms"],
+            "ingest_seconds": ingest_seconds,
             "message": f"Batch upload successful: {processed_count} applications queued"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Batch upload failed: {str(e)}")
 
 
+@app.post("/api/upload/batch")
+async def upload_batch(
+    file: UploadFile = File(...),
+):
+    """Upload batch applications via CSV or ZIP; the returned batch_id tracks them via /api/batch/{batch_id}/status"""
+    return await ingest_batch(file.filename, file.file)
+
+
+# Resumable batch uploads: init -> PUT chunks at offsets (parallel, retryable) -> finalize
+class UploadSessionRequest(BaseModel):
+    filename: str
+    size: int
+    sha256: Optional[str] = None  # Verified at finalize when given
+
+
+@app.post("/api/upload/batch/sessions")
+async def create_upload_session(request: UploadSessionRequest):
+    """Open a resumable batch upload; the response gives upload_id, chunk_size and total_chunks"""
+    try:
+        return await run_in_threadpool(resumable_uploads.create, request.filename, request.size, request.sha256)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.get("/api/upload/batch/sessions/{upload_id}")
+async def get_upload_session(upload_id: str):
+    """Progress of a resumable upload; 'missing' lists the chunk indexes still to send"""
+    try:
+        return await run_in_threadpool(resumable_uploads.status, upload_id)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.put("/api/upload/batch/sessions/{upload_id}")
+async def put_upload_chunk(upload_id: str, request: Request, offset: int = Query(..., ge=0)):
+    """Raw request body = the chunk starting at offset (a multiple of chunk_size); chunks may arrive in parallel"""
+    try:
+        return await resumable_uploads.write_chunk(upload_id, offset, request.stream())
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+
+
+@app.post("/api/upload/batch/sessions/{upload_id}/finalize")
+async def finalize_upload_session(upload_id: str):
+    """Verify every chunk arrived and ingest the assembled file in place, like /api/upload/batch"""
+    try:
+        staged_path = await run_in_threadpool(resumable_uploads.finalize, upload_id)
+        filename = await run_in_threadpool(resumable_uploads.filename, upload_id)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    try:
+        result = await ingest_batch(filename, staged_path)
+    except Exception:
+        # Keep the chunks so the client can finalize again (a CSV already moved out is gone)
+        if not await run_in_threadpool(resumable_uploads.release, upload_id):
+            await run_in_threadpool(resumable_uploads.discard, upload_id)
+        raise
+    await run_in_threadpool(resumable_uploads.discard, upload_id)
+    return {**result, "upload_id": upload_id}
+
+
 ## Duplicate status endpoint removed (using the lightweight polling version above)
 
 # Pydantic model for verify request
@@ -1673,20 +1574,21 @@ async def send_email_notification(
 async def navigate_application(application_id: str, direction: str = "next"):
     """Get previous or next application ID for navigation"""
     with get_session() as session:
-        current_app = session.query(Application).filter(Application.application_id == application_id).first()
+        # Only (created_at, application_id) is read, so both lookups are served by one covering index
+        current_app = session.query(Application.created_at).filter(Application.application_id == application_id).first()
         
         if not current_app:
             raise HTTPException(status_code=404, detail="Application not found")
         
         if direction == "next":
-            next_app = session.query(Application).filter(
+            next_app = session.query(Application.application_id).filter(
                 Application.created_at < current_app.created_at
             ).order_by(Application.created_at.desc()).first()
             
             if next_app:
                 return {"application_id": next_app.application_id}
         else:  # previous
-            prev_app = session.query(Application).filter(
+            prev_app = session.query(Application.application_id).filter(
                 Application.created_at > current_app.created_at
             ).order_by(Application.created_at.asc()).first()
             
@@ -1724,7 +1626,7 @@ async def get_application_stats():
 
 # === LOAN-SPECIFIC SCORING FUNCTIONS ===
 
-def calculate_business_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown):
+def calculate_business_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown, cash_flow=None):
     """Micro-Business Loan specific scoring - focuses on business viability and cash flow"""
     
     # Business Experience & Planning
@@ -1746,7 +1648,7 @@ def calculate_business_loan_score(text_lower, bank_text, essay_text, payslip_tex
     
     # Business Debt Service Ability
     if requested_amount > 0:
-        estimated_monthly_revenue = extract_income_from_text(bank_text, payslip_text)
+        estimated_monthly_revenue = extract_income_from_text(bank_text, payslip_text, cash_flow)
         if estimated_monthly_revenue > 0:
             debt_service_ratio = (requested_amount * 0.1) / estimated_monthly_revenue  # Assume 10% interest
             if debt_service_ratio < 0.3:
@@ -1765,7 +1667,7 @@ def calculate_business_loan_score(text_lower, bank_text, essay_text, payslip_tex
     
     return base_score
 
-def calculate_personal_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown):
+def calculate_personal_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown, cash_flow=None):
     """Personal Loan specific scoring - focuses on income stability and personal finance management"""
     
     # Income Stability
@@ -1794,7 +1696,7 @@ def calculate_personal_loan_score(text_lower, bank_text, essay_text, payslip_tex
     
     # Personal Debt-to-Income Analysis
     if requested_amount > 0:
-        monthly_income = extract_income_from_text(bank_text, payslip_text)
+        monthly_income = extract_income_from_text(bank_text, payslip_text, cash_flow)
         if monthly_income > 0:
             monthly_payment = requested_amount / 60  # Assume 5-year term
             dti_ratio = monthly_payment / monthly_income
@@ -1807,7 +1709,7 @@ def calculate_personal_loan_score(text_lower, bank_text, essay_text, payslip_tex
     
     return base_score
 
-def calculate_car_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown):
+def calculate_car_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown, cash_flow=None):
     """Car Loan specific scoring - focuses on asset value and transportation need"""
     
     # Vehicle Purpose & Need
@@ -1841,7 +1743,7 @@ def calculate_car_loan_score(text_lower, bank_text, essay_text, payslip_text, re
         breakdown.append({"category": "Maintenance Awareness", "points": 5, "reason": "Understanding of vehicle ownership costs", "type": "positive"})
     
     # Car Loan Income Verification
-    monthly_income = extract_income_from_text(bank_text, payslip_text)
+    monthly_income = extract_income_from_text(bank_text, payslip_text, cash_flow)
     if monthly_income > 0 and requested_amount > 0:
         car_affordability = (requested_amount / 84) / monthly_income  # 7-year term
         if car_affordability < 0.3:
@@ -1853,7 +1755,7 @@ def calculate_car_loan_score(text_lower, bank_text, essay_text, payslip_text, re
     
     return base_score
 
-def calculate_housing_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown):
+def calculate_housing_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, breakdown, cash_flow=None):
     """Housing Loan specific scoring - most comprehensive evaluation for largest loan amounts"""
     
     # Housing Need & Family Situation
@@ -1880,7 +1782,7 @@ def calculate_housing_loan_score(text_lower, bank_text, essay_text, payslip_text
         breakdown.append({"category": "Employment Stability", "points": 15, "reason": f"Strong job security indicators", "type": "positive"})
     
     # Housing Loan Affordability (Most Critical)
-    monthly_income = extract_income_from_text(bank_text, payslip_text)
+    monthly_income = extract_income_from_text(bank_text, payslip_text, cash_flow)
     if monthly_income > 0 and requested_amount > 0:
         monthly_mortgage = (requested_amount * 0.045) / 12  # Assume 4.5% interest
         housing_ratio = monthly_mortgage / monthly_income
@@ -1922,8 +1824,8 @@ def calculate_default_loan_score(text_lower, bank_text, essay_text, payslip_text
     
     return base_score
 
-def extract_income_from_text(bank_text, payslip_text):
-    """Extract estimated monthly income from documents"""
+def extract_income_from_text(bank_text, payslip_text, cash_flow=None):
+    """Extract estimated monthly income from documents (cash_flow: parsed bank statement metrics, if any)"""
     import re
     
     # Try to extract from payslip first
@@ -1942,7 +1844,11 @@ def extract_income_from_text(bank_text, payslip_text):
             except:
                 continue
     
-    # Fallback to bank statement analysis
+    # Parsed statement table: salary credits (or all credits) per month
+    if cash_flow and cash_flow.get('monthly_income'):
+        return cash_flow['monthly_income']
+
+    # Fallback to bank statement text
     deposit_pattern = r'rm\s*([0-9,]+)'
     deposits = re.findall(deposit_pattern, bank_text.lower())
     if deposits:
@@ -2386,7 +2292,8 @@ def generate_mock_result(
     bank_text: str = "",
     essay_text: str = "",
     payslip_text: str = "",
-    application_form_text: str = ""
+    application_form_text: str = "",
+    cash_flow: Optional[dict] = None
 ) -> dict:
     """Comprehensive loan-specific scoring system based on actual document analysis
     Now includes applicant info extraction from Application Form"""
@@ -2434,13 +2341,13 @@ def generate_mock_result(
     
     # Apply loan-specific scoring
     if loan_clean_type == "Micro-Business":
-        base_score = calculate_business_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown)
+        base_score = calculate_business_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown, cash_flow)
     elif loan_clean_type == "Personal":
-        base_score = calculate_personal_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown)
+        base_score = calculate_personal_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown, cash_flow)
     elif loan_clean_type == "Car":
-        base_score = calculate_car_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown)
+        base_score = calculate_car_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown, cash_flow)
     elif loan_clean_type == "Housing":
-        base_score = calculate_housing_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown)
+        base_score = calculate_housing_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown, cash_flow)
     else:
         # Default comprehensive scoring for unknown loan types
         base_score = calculate_default_loan_score(text_lower, bank_text, essay_text, payslip_text, requested_amount, base_score, detailed_score_breakdown)
@@ -2514,6 +2421,7 @@ def generate_mock_result(
             "claim_vs_reality": claim_vs_reality
         },
         "key_risk_flags": key_risk_flags,
+        "bank_statement_analysis": cash_flow,
         "essay_insights": [],
         "behavioral_insights": [],
         "ai_reasoning_log": [
@@ -2551,43 +2459,12 @@ async def retry_application(application_id: str):
             raise HTTPException(status_code=404, detail="Application not found")
         if app_obj.status != ApplicationStatus.FAILED:
             raise HTTPException(status_code=400, detail="Application is not in FAILED state")
-        # Cache required attributes before session closes
-        application_form_path = app_obj.application_form_path
-        bank_path = app_obj.bank_statement_path or ''
-        essay_path_local = app_obj.essay_path
-        payslip_path_local = app_obj.payslip_path
-        
-        supporting_doc_paths = []
-        if app_obj.supporting_doc_1_path: supporting_doc_paths.append(app_obj.supporting_doc_1_path)
-        if app_obj.supporting_doc_2_path: supporting_doc_paths.append(app_obj.supporting_doc_2_path)
-        if app_obj.supporting_doc_3_path: supporting_doc_paths.append(app_obj.supporting_doc_3_path)
-        
         app_obj.status = ApplicationStatus.PROCESSING
         app_obj.updated_at = datetime.utcnow()
         session.add(app_obj)
         session.commit()
 
-    # Schedule background task on current event loop
-    try:
-        loop = asyncio.get_event_loop()
-        loop.create_task(process_application_background(
-            application_id,
-            application_form_path,
-            bank_path,
-            essay_path_local,
-            payslip_path_local,
-            supporting_doc_paths
-        ))
-    except RuntimeError:
-        # If no running loop, fallback to asyncio.run (blocking) – rare in FastAPI
-        asyncio.run(process_application_background(
-            application_id,
-            application_form_path,
-            bank_path,
-            essay_path_local,
-            payslip_path_local,
-            supporting_doc_paths
-        ))
+    await run_in_threadpool(job_queue.enqueue, application_id)
 
     return {"success": True, "status": "Processing", "message": "Retry scheduled"}
 
@@ -2635,9 +2512,9 @@ async def copilot_ask(request: CopilotRequest):
                 "sources": []
             }
         
-        # Get document texts from analysis
+        # Get document texts from the document store
         analysis = app.analysis_result
-        doc_texts = analysis.get("document_texts", {})
+        doc_texts = document_store.load(request.application_id) or {}
         applicant_profile = analysis.get("applicant_profile", {})
         
         # Build context from the 4 documents
@@ -2729,7 +2606,7 @@ INSTRUCTIONS:
 
 Answer:"""
             
-            response = model.generate_content(copilot_prompt)
+            response = await llm_client.generate(model, copilot_prompt)
             answer = response.text
             
             # Extract sources mentioned in the answer
@@ -2917,9 +2794,7 @@ async def get_database_stats():
         total_logs = session.query(AuditLog).count()
         
         # Get database file size
-        db_path = "trustlens.db"
-        db_size = os.path.getsize(db_path) if os.path.exists(db_path) else 0
-        db_size_mb = db_size / (1024 * 1024)
+        db_size_mb = database_size_bytes() / (1024 * 1024)
         
         # Get last backup time (mock for now)
         last_backup = datetime.utcnow()
@@ -2936,6 +2811,48 @@ async def get_database_stats():
         }
 
 
+@app.get("/api/extraction-cache/stats")
+async def get_extraction_cache_stats():
+    """Get extraction cache size and hit/miss counters"""
+    from extraction_cache import extraction_cache
+    return await run_in_threadpool(extraction_cache.stats)
+
+
+@app.get("/api/analysis-cache/stats")
+async def get_analysis_cache_stats():
+    """Get LLM analysis cache entries per prompt version and hit/miss counters"""
+    from analysis_cache import analysis_cache
+    return await run_in_threadpool(analysis_cache.stats)
+
+
+@app.get("/api/llm/stats")
+async def get_llm_stats():
+    """Get Gemini scheduler counters (in-flight calls, retries, 429s, tokens used)"""
+    return llm_client.stats()
+
+
+@app.get("/api/events/stats")
+async def get_event_stats():
+    """Get status event bus counters (open subscriptions, events published, events dropped)"""
+    return event_bus.stats()
+
+
+@app.delete("/api/analysis-cache")
+async def invalidate_analysis_cache(prompt_version: Optional[str] = None):
+    """Invalidate cached analyses for a prompt version (default: every version except the current one)"""
+    from analysis_cache import analysis_cache
+    from models import AuditLog
+    
+    deleted = await run_in_threadpool(analysis_cache.invalidate, prompt_version)
+    with get_session() as session:
+        session.add(AuditLog(
+            user="Admin",
+            action="Invalidated Analysis Cache",
+            details=f"Deleted {deleted} cached analyses (prompt version: {prompt_version or 'all outdated'})"
+        ))
+    return {"success": True, "deleted_count": deleted}
+
+
 @app.get("/api/export/applications")
 async def export_applications():
     """Export all applications as CSV"""
@@ -2999,13 +2916,11 @@ async def clear_test_data():
     from database import get_session
     
     with get_session() as session:
-        count = session.query(Application).filter(
+        apps = session.query(Application).filter(
             Application.status.in_([ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING])
-        ).count()
-        
-        session.query(Application).filter(
-            Application.status.in_([ApplicationStatus.PROCESSING, ApplicationStatus.ANALYZING])
-        ).delete()
+        ).all()
+        count = len(apps)
+        delete_applications(session, apps)
         
         # Add audit log
         log = AuditLog(
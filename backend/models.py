@@ -3,9 +3,14 @@ Database models for TrustLens AI
 """
 from typing import Optional, List
 from datetime import datetime
-from sqlmodel import SQLModel, Field, Column, JSON
+from sqlmodel import SQLModel, Field, Column, JSON, LargeBinary
+from sqlalchemy import Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
 from enum import Enum
 
+# JSON documents are stored as JSONB on PostgreSQL (indexable with GIN), plain JSON text on SQLite
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
 
 class LoanType(str, Enum):
     MICRO_BUSINESS = "Micro-Business Loan"
@@ -23,6 +28,17 @@ class ApplicationStatus(str, Enum):
     FAILED = "Failed"
 
 
+class ProcessingStage(str, Enum):
+    """Pipeline stage of a queued/running application (finer than ApplicationStatus)"""
+    QUEUED = "Queued"
+    EXTRACTING = "Extracting"
+    AWAITING_LLM = "Awaiting LLM"  # No longer set; kept so older rows still load
+    LLM_ANALYSIS = "LLM Analysis"
+    SCORING = "Scoring"
+    COMPLETED = "Completed"
+    FAILED = "Failed"
+
+
 class RiskLevel(str, Enum):
     LOW = "Low"
     MEDIUM = "Medium"
@@ -37,6 +53,14 @@ class ReviewStatus(str, Enum):
 
 class Application(SQLModel, table=True):
     """Main application table"""
+    # Composite indexes for list filters + keyset order, navigation and analytics group-bys
+    __table_args__ = (
+        Index("ix_application_status_created_at", "status", "created_at", "id"),
+        Index("ix_application_review_status_created_at", "review_status", "created_at", "id"),
+        Index("ix_application_highlighted_created_at", "highlighted", "created_at", "id"),
+        Index("ix_application_created_at_application_id", "created_at", "application_id"),
+        Index("ix_application_risk_level_final_decision", "risk_level", "final_decision"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     application_id: str = Field(index=True, unique=True)
     # Applicant info extracted from Application Form by AI
@@ -44,13 +68,13 @@ class Application(SQLModel, table=True):
     applicant_ic: Optional[str] = None
     loan_type: Optional[LoanType] = None
     requested_amount: Optional[float] = None
-    status: ApplicationStatus = ApplicationStatus.PROCESSING
+    status: ApplicationStatus = Field(default=ApplicationStatus.PROCESSING, index=True)
     risk_score: Optional[int] = None
-    risk_level: Optional[RiskLevel] = None
-    final_decision: Optional[str] = None
+    risk_level: Optional[RiskLevel] = Field(default=None, index=True)
+    final_decision: Optional[str] = Field(default=None, index=True)
     
     # Human Verification Fields
-    review_status: ReviewStatus = ReviewStatus.AI_PENDING
+    review_status: ReviewStatus = Field(default=ReviewStatus.AI_PENDING, index=True)
     ai_decision: Optional[str] = None  # Store original AI decision
     human_decision: Optional[str] = None  # Human override decision
     reviewed_by: Optional[str] = None
@@ -58,9 +82,12 @@ class Application(SQLModel, table=True):
     override_reason: Optional[str] = None
     comment: Optional[str] = None
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     processing_time: Optional[float] = None  # Processing time in seconds
+    processing_stage: Optional[ProcessingStage] = Field(default=None, index=True)
+    stage_updated_at: Optional[datetime] = None
+    batch_id: Optional[str] = Field(default=None, index=True)  # Set for applications registered by /api/upload/batch
     
     # Store file paths (4 required documents)
     application_form_path: Optional[str] = None  # NEW: Application Form PDF
@@ -72,12 +99,25 @@ class Application(SQLModel, table=True):
     supporting_doc_1_path: Optional[str] = None
     supporting_doc_2_path: Optional[str] = None
     supporting_doc_3_path: Optional[str] = None
+    document_hashes: Optional[dict] = Field(default=None, sa_column=Column(JSONType))  # Document label -> SHA-256, computed at upload
+    
+    # Duplicate detection (duplicate_index.py)
+    applicant_ic_normalized: Optional[str] = Field(default=None, index=True)  # Digits of applicant_ic
+    duplicate_of: Optional[str] = Field(default=None, index=True)  # Analysed application with the identical document set
+    duplicate_matches: Optional[List[dict]] = Field(default=None, sa_column=Column(JSONType))  # Shared documents / IC with other applications
     
     # AI Analysis Results (JSON)
-    analysis_result: Optional[dict] = Field(default=None, sa_column=Column(JSON))
+    analysis_result: Optional[dict] = Field(default=None, sa_column=Column(JSONType))
+    
+    # Hot analysis_result fields, copied out at analysis time for indexed filtering/sorting
+    loan_type_label: Optional[str] = Field(default=None, index=True)  # applicant_profile.loan_type as extracted by AI
+    debt_service_ratio: Optional[float] = Field(default=None, index=True)  # financial_metrics.debt_service_ratio.value (%)
+    net_income: Optional[float] = Field(default=None, index=True)  # financial_metrics.net_disposable_income.calculation.net_income
+    net_disposable_income: Optional[float] = Field(default=None, index=True)  # financial_metrics.net_disposable_income.value
+    hot_fields_version: int = Field(default=0)  # analysis_fields.HOT_FIELDS_VERSION the columns were filled with
     
     # Decision Audit History (JSON array)
-    decision_history: Optional[List[dict]] = Field(default_factory=list, sa_column=Column(JSON))
+    decision_history: Optional[List[dict]] = Field(default_factory=list, sa_column=Column(JSONType))
     
     # Decision Locking Fields
     decision_locked: bool = Field(default=False)  # Prevents further changes once locked
@@ -94,12 +134,153 @@ class Application(SQLModel, table=True):
     highlighted: bool = Field(default=False)  # User-marked as important/highlighted
 
 
+class ApplicationRiskFlag(SQLModel, table=True):
+    """One AI risk flag of an application (key_risk_flags), for indexed filtering by flag"""
+    __table_args__ = (Index("ix_applicationriskflag_flag_application_id", "flag", "application_id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    application_id: str = Field(index=True)
+    flag: str = Field(index=True)
+    severity: Optional[str] = Field(default=None, index=True)
+    document_source: Optional[str] = None
+
+
+class DocumentFingerprint(SQLModel, table=True):
+    """SHA-256 of one document of an application, for duplicate lookups by content hash"""
+    __table_args__ = (Index("ix_documentfingerprint_content_hash_application_id", "content_hash", "application_id"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    application_id: str = Field(index=True)
+    label: str  # Document label (bank_statement, payslip, supporting_doc_1, ...)
+    content_hash: str
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ApplicationDocumentTexts(SQLModel, table=True):
+    """Extracted document texts of an application, zlib-compressed JSON kept out of analysis_result"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    application_id: str = Field(index=True, unique=True)
+    compressed: bytes = Field(sa_column=Column(LargeBinary))  # zlib(JSON {"bank_statement": ..., "essay": ..., ...})
+    raw_bytes: int = Field(default=0)  # Size of the uncompressed JSON
+    compressed_bytes: int = Field(default=0)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class ApplicationTransactions(SQLModel, table=True):
+    """Bank-statement transactions of an application as compressed NumPy columns (statement_parser)"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    application_id: str = Field(index=True, unique=True)
+    columns: bytes = Field(sa_column=Column(LargeBinary))  # np.savez_compressed: date, description, debit, credit, balance
+    row_count: int = Field(default=0)
+    period_start: Optional[datetime] = None
+    period_end: Optional[datetime] = None
+    parser_version: Optional[str] = None
+    content_hash: Optional[str] = Field(default=None, index=True)  # SHA-256 of the statement file that was parsed
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
 class AnalysisCache(SQLModel, table=True):
-    """Cache for AI analysis to avoid re-processing"""
+    """Cache for AI analysis, keyed by prompt content so identical document sets reuse one Gemini call"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cache_key: Optional[str] = Field(default=None, index=True, unique=True)  # SHA-256 of prompt + model + generation config
+    prompt_version: Optional[str] = Field(default=None, index=True)  # prompts_optimized.PROMPT_VERSION
+    llm_model: Optional[str] = None  # Gemini model that produced the result
+    application_id: Optional[str] = Field(default=None, index=True)  # Application that produced the result
+    result_json: dict = Field(sa_column=Column(JSONType))
+    hit_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_accessed_at: Optional[datetime] = Field(default=None, index=True)  # LRU eviction order
+    expires_at: Optional[datetime] = None  # TTL
+
+
+class ExtractionCacheEntry(SQLModel, table=True):
+    """Extracted document output keyed by file content hash, shared across applications"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cache_key: str = Field(index=True, unique=True)  # "<sha256>:<extractor_version>:<kind>"
+    content_hash: str = Field(index=True)  # SHA-256 of the uploaded file
+    extractor_version: str
+    kind: str  # 'text' (extract_text) or 'coordinates' (extract_with_coordinates)
+    payload: dict = Field(sa_column=Column(JSONType))  # {"value": <text or list of blocks>}
+    size_bytes: int = Field(default=0)
+    hit_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    last_accessed_at: datetime = Field(default_factory=datetime.utcnow, index=True)  # LRU eviction order
+
+
+class UploadBatch(SQLModel, table=True):
+    """One /api/upload/batch call: source file, applicant count and registration timing"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    batch_id: str = Field(unique=True, index=True)
+    source_filename: Optional[str] = None
+    source_type: str  # 'csv' or 'zip'
+    application_count: int = Field(default=0)
+    registration_ms: Optional[float] = None  # Time to insert every application row of the batch
+    ingest_seconds: Optional[float] = None  # Whole upload: parsing, file streaming, registration and enqueueing
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    DONE = "Done"
+    FAILED = "Failed"
+
+
+class ProcessingJob(SQLModel, table=True):
+    """Durable queue entry for background application processing"""
     id: Optional[int] = Field(default=None, primary_key=True)
     application_id: str = Field(index=True)
-    result_json: dict = Field(sa_column=Column(JSON))
+    status: JobStatus = Field(default=JobStatus.QUEUED, index=True)
+    attempts: int = Field(default=0)  # Number of times a worker claimed this job
+    lease_owner: Optional[str] = None  # Worker currently holding the job
+    lease_expires_at: Optional[datetime] = None  # Job can be reclaimed after this time
+    run_after: Optional[datetime] = None  # Retry backoff: a queued job is not claimed before this time
+    last_error: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class AnalyticsRollup(SQLModel, table=True):
+    """Portfolio metrics pre-aggregated per day x loan type x risk level x decision"""
+    __table_args__ = (UniqueConstraint("day", "loan_type", "risk_level", "final_decision"),)
+    id: Optional[int] = Field(default=None, primary_key=True)
+    day: str = Field(index=True)  # YYYY-MM-DD of Application.created_at
+    loan_type: str = ""  # "" = not set (dimensions are never NULL so the unique key holds)
+    risk_level: str = ""
+    final_decision: str = ""
+    applications: int = Field(default=0)
+    requested_amount_sum: float = Field(default=0.0)
+    risk_score_sum: int = Field(default=0)
+    risk_score_count: int = Field(default=0)
+    processing_time_sum: float = Field(default=0.0)
+    processing_time_count: int = Field(default=0)
+    reviewed: int = Field(default=0)  # Human verified or overridden
+    agreements: int = Field(default=0)  # Reviewed with ai_decision == human_decision
+    review_required: int = Field(default=0)  # status == Review Required
+    in_progress: int = Field(default=0)  # status Processing / Analyzing
+    # Risk score histogram
+    score_0_20: int = Field(default=0)
+    score_21_40: int = Field(default=0)
+    score_41_60: int = Field(default=0)
+    score_61_80: int = Field(default=0)
+    score_81_100: int = Field(default=0)
+    # Processing time histogram
+    time_under_30: int = Field(default=0)
+    time_30_45: int = Field(default=0)
+    time_45_60: int = Field(default=0)
+    time_over_60: int = Field(default=0)
+
+
+class RiskFlagRollup(SQLModel, table=True):
+    """Occurrences of each AI risk flag across the portfolio"""
+    id: Optional[int] = Field(default=None, primary_key=True)
+    flag: str = Field(index=True, unique=True)
+    occurrences: int = Field(default=0, index=True)
+
+
+class ApplicationRollupState(SQLModel, table=True):
+    """What each application currently contributes to the rollups, so changes can be applied as deltas"""
+    application_id: str = Field(primary_key=True)
+    contribution: dict = Field(sa_column=Column(JSONType))  # Dimensions + measures (see analytics_rollup.contribution)
+    risk_flags: List[str] = Field(default_factory=list, sa_column=Column(JSONType))
 
 
 class RiskPolicy(SQLModel, table=True):
@@ -128,6 +309,7 @@ class RiskPolicy(SQLModel, table=True):
 
 class AuditLog(SQLModel, table=True):
     """System audit trail for tracking all important actions"""
+    __table_args__ = (Index("ix_auditlog_application_id_timestamp", "application_id", "timestamp"),)
     id: Optional[int] = Field(default=None, primary_key=True)
     timestamp: datetime = Field(default_factory=datetime.utcnow, index=True)
     user: str = Field(default="System")  # Officer name/ID
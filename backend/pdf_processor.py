@@ -2,10 +2,24 @@
 PDF processing utilities using PyMuPDF with OCR fallback
 """
 import fitz  # PyMuPDF
-from typing import Tuple, List, Dict
-import io
+from typing import Tuple, List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 
+from config import Config
+
+# Bump whenever extraction output changes so cached results are not reused
+EXTRACTOR_VERSION = "3"
+
+# Text standing in for content that could not be extracted (processing error, page
+# that could not be rendered/OCR'd, or OCR unavailable); output containing it is incomplete
+PROCESSING_ERROR_PREFIX = "PDF_PROCESSING_ERROR"
+PLACEHOLDER_MARKERS = (PROCESSING_ERROR_PREFIX, "Document content detected - Image format", " - Image Format\n")
+
+
+def ocr_placeholder(page_num: int) -> List[str]:
+    return [f"[Page {page_num + 1}: Document content detected - Image format]"]
+
 
 class PDFProcessor:
     """Process PDF documents and extract text"""
@@ -21,74 +35,177 @@ class PDFProcessor:
         Returns:
             Extracted text or meaningful placeholder
         """
+        return PDFProcessor.extract_text_with_status(file_path)[0]
+    
+    @staticmethod
+    def extract_text_with_status(file_path: str) -> Tuple[str, bool]:
+        """
+        Extract text like extract_text() and report whether it is complete
+        
+        Returns:
+            (text, complete) - complete is False when any page fell back to a placeholder
+            or processing failed, so the text must not be cached
+        """
+        complete = True
         try:
-            doc = fitz.open(file_path)
+            page_lines = PDFProcessor.scan_pages(file_path)
+            ocr_pages = PDFProcessor.pages_needing_ocr(page_lines)
+            
+            if ocr_pages:
+                print(f"🔍 OCR required for {len(ocr_pages)}/{len(page_lines)} pages")
+                config = Config()
+                # MuPDF is not thread-safe, so pages are rendered here one by one;
+                # Tesseract runs as a subprocess and can OCR several pages at once
+                with fitz.open(file_path) as doc, ThreadPoolExecutor(
+                    max_workers=max(1, min(len(ocr_pages), config.OCR_THREADS))
+                ) as pool:
+                    futures = {}
+                    for page_num in ocr_pages:
+                        try:
+                            image = PDFProcessor.render_for_ocr(doc[page_num])
+                        except Exception as render_e:
+                            print(f"⚠ OCR failed for page {page_num + 1}: {render_e}")
+                            page_lines[page_num] = ocr_placeholder(page_num)
+                            complete = False
+                            continue
+                        futures[page_num] = pool.submit(PDFProcessor.ocr_image, image, page_num, file_path)
+                    for page_num, future in futures.items():
+                        page_lines[page_num], ocr_ok = future.result()
+                        complete = complete and ocr_ok
+            
             text_content = []
-            has_images = False
+            for lines in page_lines:
+                text_content.extend(lines)
+            return PDFProcessor.join_pages(text_content), complete
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # First, try direct text extraction
+        except Exception as e:
+            print(f"❌ PDF Processing Error: {str(e)}")
+            # Return meaningful error that can still be analyzed
+            return f"{PROCESSING_ERROR_PREFIX}: {str(e)}", False
+    
+    @staticmethod
+    def scan_pages(file_path: str) -> List[Optional[List[str]]]:
+        """
+        Read the text layer of every page in one pass
+        
+        Args:
+            file_path: Path to PDF file
+            
+        Returns:
+            Per page: cleaned text lines, or None for image-only pages that need OCR
+        """
+        page_lines = []
+        with fitz.open(file_path) as doc:
+            for page in doc:
                 text = page.get_text()
-                
                 if text.strip():
-                    # Text found, use it
-                    lines = text.split('\n')
-                    cleaned_lines = [line.strip() for line in lines if line.strip()]
-                    text_content.extend(cleaned_lines)
+                    page_lines.append(PDFProcessor._clean_lines(text))
+                elif page.get_images():
+                    page_lines.append(None)  # Likely a scanned page
                 else:
-                    # Check if page has images (likely scanned document)
-                    image_list = page.get_images()
-                    if image_list:
-                        has_images = True
-                        # Try OCR if available
-                        try:
-                            import pytesseract
-                            # Convert page to image
-                            pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))  # 2x zoom for better OCR
-                            img_data = pix.pil_tobytes("PNG")
-                            image = Image.open(io.BytesIO(img_data))
-                            
-                            # OCR the image
-                            ocr_text = pytesseract.image_to_string(image)
-                            if ocr_text.strip():
-                                lines = ocr_text.split('\n')
-                                cleaned_lines = [line.strip() for line in lines if line.strip()]
-                                text_content.extend(cleaned_lines)
-                                print(f"✓ OCR extracted {len(ocr_text)} characters from page {page_num + 1}")
-                            
-                        except ImportError:
-                            print(f"⚠ OCR not available for image-based page {page_num + 1}")
-                            # Create meaningful placeholder that can be analyzed
-                            file_name = file_path.split('\\')[-1].lower()
-                            if 'bank' in file_name:
-                                text_content.append("BANK STATEMENT - Image Format\nTransaction History Present\nAccount Balance Information Available\nMultiple Transactions Recorded")
-                            elif 'payslip' in file_name or 'salary' in file_name:
-                                text_content.append("PAYSLIP DOCUMENT - Image Format\nSalary Information Present\nEmployment Details Available\nDeduction Information Included")
-                            elif 'essay' in file_name:
-                                text_content.append("LOAN APPLICATION ESSAY - Image Format\nApplication Purpose Stated\nPersonal Financial Information\nLoan Justification Provided")
-                            else:
-                                text_content.append(f"DOCUMENT PAGE {page_num + 1} - Image Format\nContent Present but requires OCR processing")
-                        except Exception as ocr_e:
-                            print(f"⚠ OCR failed for page {page_num + 1}: {ocr_e}")
-                            # Meaningful fallback
-                            text_content.append(f"[Page {page_num + 1}: Document content detected - Image format]")
+                    page_lines.append([])
+        return page_lines
+    
+    @staticmethod
+    def pages_needing_ocr(page_lines: List[Optional[List[str]]]) -> List[int]:
+        """Zero-based indexes of pages scan_pages() marked for OCR"""
+        return [page_num for page_num, lines in enumerate(page_lines) if lines is None]
+    
+    @staticmethod
+    def ocr_page(file_path: str, page_num: int) -> Tuple[List[str], bool]:
+        """
+        Render and OCR a single page.
+        Self-contained so it can run in a worker process.
+        
+        Args:
+            file_path: Path to PDF file
+            page_num: Zero-based page index
             
-            doc.close()
+        Returns:
+            (cleaned OCR text lines or a placeholder if OCR is unavailable, whether OCR succeeded)
+        """
+        try:
+            with fitz.open(file_path) as doc:
+                image = PDFProcessor.render_for_ocr(doc[page_num])
+        except Exception as render_e:
+            print(f"⚠ OCR failed for page {page_num + 1}: {render_e}")
+            return ocr_placeholder(page_num), False
+        return PDFProcessor.ocr_image(image, page_num, file_path)
+    
+    @staticmethod
+    def ocr_dpi(page) -> int:
+        """
+        Pick the render resolution for a scanned page
+        
+        Matches the resolution of the largest embedded scan (rendering above it
+        only adds pixels Tesseract has to process), clamped to OCR_MIN_DPI..OCR_MAX_DPI
+        and to the OCR_MAX_MEGAPIXELS budget for oversized pages.
+        """
+        config = Config()
+        width_in = max(page.rect.width / 72, 0.01)
+        height_in = max(page.rect.height / 72, 0.01)
+        
+        native_dpi = 0.0
+        for image in page.get_images(full=True):
+            img_width, img_height = image[2], image[3]
+            native_dpi = max(native_dpi, min(img_width / width_in, img_height / height_in))
+        
+        dpi = min(max(native_dpi or config.OCR_MIN_DPI, config.OCR_MIN_DPI), config.OCR_MAX_DPI)
+        budget_dpi = (config.OCR_MAX_MEGAPIXELS * 1_000_000 / (width_in * height_in)) ** 0.5
+        return max(72, int(min(dpi, budget_dpi)))
+    
+    @staticmethod
+    def render_for_ocr(page) -> Image.Image:
+        """Render a page straight from the raw grayscale pixel buffer (no PNG encode/decode)"""
+        pix = page.get_pixmap(dpi=PDFProcessor.ocr_dpi(page), colorspace=fitz.csGRAY, alpha=False)
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    
+    @staticmethod
+    def ocr_image(image: Image.Image, page_num: int, file_path: str) -> Tuple[List[str], bool]:
+        """OCR a rendered page, falling back to a placeholder that can still be analyzed. Returns (lines, OCR succeeded)."""
+        text_content = []
+        try:
+            import pytesseract
             
-            # Join and return
-            result = '\n'.join(text_content)
-            if result:
-                print(f"✓ PDF text extraction completed: {len(result)} characters total")
-            else:
-                print("⚠ No text content extracted from PDF")
-            return result
+            # OCR the image
+            ocr_text = pytesseract.image_to_string(image)
+            if ocr_text.strip():
+                text_content.extend(PDFProcessor._clean_lines(ocr_text))
+                print(f"✓ OCR extracted {len(ocr_text)} characters from page {page_num + 1}")
             
-        except Exception as e:
-            print(f"❌ PDF Processing Error: {str(e)}")
-            # Return meaningful error that can still be analyzed
-            return f"PDF_PROCESSING_ERROR: {str(e)}"
+        except ImportError:
+            print(f"⚠ OCR not available for image-based page {page_num + 1}")
+            # Create meaningful placeholder that can be analyzed
+            file_name = file_path.split('\\')[-1].lower()
+            if 'bank' in file_name:
+                text_content.append("BANK STATEMENT - Image Format\nTransaction History Present\nAccount Balance Information Available\nMultiple Transactions Recorded")
+            elif 'payslip' in file_name or 'salary' in file_name:
+                text_content.append("PAYSLIP DOCUMENT - Image Format\nSalary Information Present\nEmployment Details Available\nDeduction Information Included")
+            elif 'essay' in file_name:
+                text_content.append("LOAN APPLICATION ESSAY - Image Format\nApplication Purpose Stated\nPersonal Financial Information\nLoan Justification Provided")
+            else:
+                text_content.append(f"DOCUMENT PAGE {page_num + 1} - Image Format\nContent Present but requires OCR processing")
+            return text_content, False
+        except Exception as ocr_e:
+            print(f"⚠ OCR failed for page {page_num + 1}: {ocr_e}")
+            # Meaningful fallback
+            return ocr_placeholder(page_num), False
+        
+        return text_content, True
+    
+    @staticmethod
+    def join_pages(text_content: List[str]) -> str:
+        """Join extracted lines into the final document text"""
+        result = '\n'.join(text_content)
+        if result:
+            print(f"✓ PDF text extraction completed: {len(result)} characters total")
+        else:
+            print("⚠ No text content extracted from PDF")
+        return result
+    
+    @staticmethod
+    def _clean_lines(text: str) -> List[str]:
+        return [line.strip() for line in text.split('\n') if line.strip()]
     
     @staticmethod
     def extract_with_coordinates(file_path: str) -> List[Dict]:
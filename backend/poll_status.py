@@ -1,18 +1,21 @@
-import time, requests, sys
+import json, requests, sys
 
 app_id = sys.argv[1] if len(sys.argv) > 1 else None
 if not app_id:
     print('Usage: python poll_status.py <APPLICATION_ID>'); sys.exit(1)
 
-url = f'http://localhost:8000/api/status/{app_id}'
-for i in range(30):  # up to ~60s (2s interval)
-    r = requests.get(url)
-    if r.status_code != 200:
-        print('Status error', r.status_code, r.text); time.sleep(2); continue
-    data = r.json()
-    print(f"[{i}] status={data.get('status')} score={data.get('risk_score')} decision={data.get('final_decision')} risk={data.get('risk_level')} review={data.get('review_status')}")
-    if data.get('status') not in ('Processing','Analyzing'):
-        print('Done.'); break
-    time.sleep(2)
-else:
+# Status changes are pushed over SSE instead of polling /api/status every 2s
+url = f'http://localhost:8000/api/events/status?ids={app_id}'
+try:
+    with requests.get(url, stream=True, timeout=(5, 60)) as r:  # Give up if the server goes silent for 60s
+        if r.status_code != 200:
+            print('Status error', r.status_code, r.text); sys.exit(1)
+        for i, line in enumerate(l for l in r.iter_lines(decode_unicode=True) if l and l.startswith('data: ')):
+            data = json.loads(line[len('data: '):])
+            if data.get('event') == 'deleted':
+                print('Application deleted.'); break
+            print(f"[{i}] status={data.get('status')} score={data.get('risk_score')} decision={data.get('final_decision')} risk={data.get('risk_level')} review={data.get('review_status')}")
+            if data.get('status') not in ('Processing','Analyzing'):
+                print('Done.'); break
+except requests.exceptions.ReadTimeout:
     print('Timeout waiting for completion.')
@@ -3,6 +3,9 @@ InsightLoan AI - Optimized Risk Assessment System
 BALANCED, CONSISTENT, and EFFICIENT Assessment
 """
 
+# Bump when prompt wording or scoring rules change - invalidates cached analyses
+PROMPT_VERSION = "2.0"
+
 BASE_SYSTEM_PROMPT = """
 ### INSIGHTLOAN RISK ASSESSMENT SYSTEM (v2.0 Optimized)
 
@@ -1,7 +1,7 @@
 import asyncio
 from sqlmodel import create_engine, Session
 from models import Application
-from main import process_application_background, LoanType
+from main import run_application_job
 
 DB_URL = 'sqlite:///trustlens.db'
 engine = create_engine(DB_URL, echo=False)
@@ -15,13 +15,8 @@ def main(app_id: str):
     if not app:
         print('Application not found:', app_id); return
     print('Reprocessing', app.application_id)
-    asyncio.run(process_application_background(
-        app.application_id,
-        app.loan_type.value if hasattr(app.loan_type,'value') else app.loan_type,
-        app.bank_statement_path or '',
-        app.essay_path,
-        app.payslip_path
-    ))
+    # Unchanged documents are served from the extraction cache (no PDF/OCR work)
+    asyncio.run(run_application_job(app.application_id))
 
 if __name__ == '__main__':
     import sys
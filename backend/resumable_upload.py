@@ -0,0 +1,220 @@
+"""
+Resumable chunked uploads for large batch archives
+A client opens an upload session with the file's name and size, PUTs fixed-size
+chunks at their byte offsets (in any order, several at once, retrying only the
+chunks that failed) and finalizes when every chunk has arrived. Chunks are written
+in place into a preallocated staging file, so finalize hands that same file to
+batch ingestion without copying it again.
+
+Staging layout (Config.UPLOAD_STAGING_DIR, outside the public /uploads mount):
+    <upload_id>/meta.json       filename, size, chunk size, optional SHA-256
+    <upload_id>/data            the file being assembled
+    <upload_id>/chunks/<index>  marker written after a chunk is fully on disk
+    <upload_id>/finalized       created atomically by the one finalize that wins
+Sessions live on disk, so any API process sharing the directory can serve any chunk.
+"""
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from config import Config
+from id_generator import id_generator
+from upload_writer import UploadRejected
+
+BATCH_EXTENSIONS = (".zip", ".csv")
+WRITE_BUFFER = 1024 * 1024  # Request body pieces are gathered up to this size per disk write
+
+
+class ResumableUploadStore:
+    """Upload sessions backed by a staging directory"""
+
+    def __init__(self):
+        self.config = Config()
+        self.root = Path(self.config.UPLOAD_STAGING_DIR)
+
+    def _dir(self, upload_id: str) -> Path:
+        folder = self.root / os.path.basename(upload_id)
+        if not upload_id or not (folder / "meta.json").exists():
+            raise UploadRejected(f"Upload session {upload_id} not found", 404)
+        return folder
+
+    def _meta(self, upload_id: str) -> Dict[str, Any]:
+        return json.loads((self._dir(upload_id) / "meta.json").read_text())
+
+    def create(self, filename: str, size: int, sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Open an upload session and preallocate its staging file
+
+        Raises:
+            UploadRejected: Not a .zip/.csv file (415) or larger than MAX_BATCH_UPLOAD_SIZE (413)
+
+        Returns:
+            Session status, including upload_id, chunk_size and total_chunks
+        """
+        name = os.path.basename(filename or "")
+        if not name.lower().endswith(BATCH_EXTENSIONS):
+            raise UploadRejected("Batch upload must be a .csv or .zip file", 415)
+        if size <= 0:
+            raise UploadRejected("size must be positive", 400)
+        if size > self.config.MAX_BATCH_UPLOAD_SIZE:
+            raise UploadRejected(f"Batch file exceeds the {self.config.MAX_BATCH_UPLOAD_SIZE / (1024 ** 3):g}GB limit", 413)
+
+        upload_id = id_generator.ulid()
+        folder = self.root / upload_id
+        (folder / "chunks").mkdir(parents=True)
+        with open(folder / "data", "wb") as f:
+            f.truncate(size)
+        meta = {
+            "upload_id": upload_id,
+            "filename": name,
+            "size": size,
+            "chunk_size": self.config.UPLOAD_CHUNK_SIZE,
+            "sha256": sha256.lower() if sha256 else None,
+            "created_at": time.time(),
+        }
+        (folder / "meta.json").write_text(json.dumps(meta))
+        return self.status(upload_id)
+
+    def status(self, upload_id: str) -> Dict[str, Any]:
+        """Received and missing chunk indexes of a session - what a resuming client still has to send"""
+        folder = self._dir(upload_id)
+        meta = self._meta(upload_id)
+        total = -(-meta["size"] // meta["chunk_size"])
+        received = sorted(int(name) for name in os.listdir(folder / "chunks"))
+        received_set = set(received)
+        return {
+            "upload_id": upload_id,
+            "filename": meta["filename"],
+            "size": meta["size"],
+            "chunk_size": meta["chunk_size"],
+            "total_chunks": total,
+            "received_chunks": len(received),
+            "received_bytes": sum(self._chunk_length(meta, index) for index in received),
+            "missing": [index for index in range(total) if index not in received_set],
+            "finalized": (folder / "finalized").exists(),
+        }
+
+    @staticmethod
+    def _chunk_length(meta: Dict[str, Any], index: int) -> int:
+        return min(meta["chunk_size"], meta["size"] - index * meta["chunk_size"])
+
+    async def write_chunk(self, upload_id: str, offset: int, body: AsyncIterator[bytes]) -> Dict[str, Any]:
+        """
+        Write one chunk at its offset; re-sending a chunk simply overwrites it
+
+        Raises:
+            UploadRejected: Unknown session (404), finalized (409), misaligned offset or wrong length (400)
+        """
+        folder = self._dir(upload_id)
+        meta = self._meta(upload_id)
+        if (folder / "finalized").exists():
+            raise UploadRejected("Upload already finalized", 409)
+        if offset < 0 or offset >= meta["size"] or offset % meta["chunk_size"]:
+            raise UploadRejected(f"offset must be a multiple of {meta['chunk_size']} below {meta['size']}", 400)
+        index = offset // meta["chunk_size"]
+        expected = self._chunk_length(meta, index)
+
+        def write(position: int, data: bytes):
+            with open(folder / "data", "r+b") as f:
+                f.seek(position)
+                f.write(data)
+
+        received, buffer = 0, bytearray()
+        async for piece in body:
+            received += len(piece)
+            if received > expected:
+                raise UploadRejected(f"Chunk {index} must be {expected} bytes", 400)
+            buffer += piece
+            if len(buffer) >= WRITE_BUFFER:
+                await run_in_threadpool(write, offset + received - len(buffer), bytes(buffer))
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(write, offset + received - len(buffer), bytes(buffer))
+        if received != expected:
+            raise UploadRejected(f"Chunk {index} must be {expected} bytes, got {received}", 400)
+
+        (folder / "chunks" / str(index)).touch()
+        return {"upload_id": upload_id, "chunk": index, "bytes": received}
+
+    def finalize(self, upload_id: str) -> Path:
+        """
+        Claim a complete session for ingestion
+
+        Raises:
+            UploadRejected: Chunks missing or finalize already claimed (409), SHA-256 mismatch (422)
+
+        Returns:
+            Path of the assembled file (ingest it in place, then discard() the session,
+            or release() it if ingestion failed so finalize can be retried)
+        """
+        status = self.status(upload_id)
+        if status["missing"]:
+            raise UploadRejected(f"{len(status['missing'])} chunk(s) still missing", 409)
+        folder = self._dir(upload_id)
+        try:
+            (folder / "finalized").mkdir()  # Atomic - exactly one concurrent finalize proceeds
+        except FileExistsError:
+            raise UploadRejected("Upload already finalized", 409)
+
+        expected = self._meta(upload_id)["sha256"]
+        if expected:
+            digest = hashlib.sha256()
+            with open(folder / "data", "rb") as f:
+                for chunk in iter(lambda: f.read(WRITE_BUFFER), b""):
+                    digest.update(chunk)
+            if digest.hexdigest() != expected:
+                (folder / "finalized").rmdir()
+                raise UploadRejected("SHA-256 of the assembled file does not match", 422)
+        return folder / "data"
+
+    def release(self, upload_id: str) -> bool:
+        """
+        Undo a finalize claim after ingestion failed, keeping the chunks for a retry
+
+        Returns:
+            True if the session can be finalized again, False if the assembled file is gone
+        """
+        folder = self._dir(upload_id)
+        if not (folder / "data").exists():
+            return False
+        try:
+            (folder / "finalized").rmdir()
+        except FileNotFoundError:
+            pass
+        return True
+
+    def filename(self, upload_id: str) -> str:
+        return self._meta(upload_id)["filename"]
+
+    def discard(self, upload_id: str):
+        shutil.rmtree(self.root / os.path.basename(upload_id), ignore_errors=True)
+
+    def cleanup_expired(self) -> int:
+        """Remove sessions older than UPLOAD_SESSION_TTL_HOURS. Returns the number removed."""
+        if not self.root.exists():
+            return 0
+        cutoff = time.time() - self.config.UPLOAD_SESSION_TTL_HOURS * 3600
+        expired: List[str] = []
+        for folder in self.root.iterdir():
+            meta_path = folder / "meta.json"
+            try:
+                created_at = json.loads(meta_path.read_text())["created_at"] if meta_path.exists() else folder.stat().st_mtime
+            except (OSError, ValueError, KeyError):
+                created_at = folder.stat().st_mtime
+            if created_at < cutoff:
+                expired.append(folder.name)
+        for upload_id in expired:
+            self.discard(upload_id)
+        if expired:
+            print(f"✓ Removed {len(expired)} expired upload session(s)")
+        return len(expired)
+
+
+# Singleton instance
+resumable_uploads = ResumableUploadStore()
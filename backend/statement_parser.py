@@ -0,0 +1,417 @@
+"""
+Deterministic bank-statement transaction parser
+Turns the positioned text spans of a PDF statement (PDFProcessor.extract_with_coordinates)
+into columns - date, description, debit, credit, balance - held as NumPy arrays:
+  - spans are grouped into visual rows by page and vertical position
+  - a header row ("Date ... Debit ... Credit ... Balance") fixes the column
+    positions; every later row is split into columns by x-position
+  - dates without a year ("02/01") take it from the nearest heading or period line
+  - wrapped descriptions are joined to the transaction above, and amounts that
+    overflow into the description are recovered from the running balance
+Cash-flow metrics are then vectorized computations over those columns instead of
+figures read back from the LLM or the largest "RM" amount in the raw text.
+"""
+import calendar
+import re
+from dataclasses import dataclass
+from datetime import date as Date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+PARSER_VERSION = "1"
+ROW_TOLERANCE = 3.0  # Spans whose vertical centers are this close (pt) share a row
+INDENT = 10.0  # A wrapped description line starts at least this far right of the row's date
+
+COLUMN_KEYWORDS = {
+    "date": ("date", "tarikh"),
+    "description": ("description", "desc", "particulars", "details", "transaction", "keterangan", "butiran"),
+    "debit": ("debit", "debits", "withdrawal", "withdrawals", "dr", "pengeluaran"),
+    "credit": ("credit", "credits", "deposit", "deposits", "cr", "simpanan"),
+    "amount": ("amount", "amt", "amaun", "jumlah"),
+    "balance": ("balance", "baki"),
+}
+AMOUNT_COLUMNS = ("debit", "credit", "amount", "balance")
+
+SALARY_KEYWORDS = ("salary", "gaji", "payroll", "wages")
+DEBT_KEYWORDS = (
+    "loan", "pinjaman", "ptptn", "installment", "instalment", "ansuran", "credit card", "kad kredit",
+    "hire purchase", "mortgage", "financing", "bnpl", "atome", "spaylater", "repayment",
+)
+BALANCE_MARKERS = ("opening balance", "closing balance", "balance b/f", "balance c/f", "baki awal", "baki akhir")
+TOTAL_RE = re.compile(r"^(?:monthly |grand |sub-?)?(?:total|jumlah)\b", re.IGNORECASE)  # Summary rows repeat the sums
+
+MONTHS = {name: i for i, name in enumerate(calendar.month_abbr) if name}
+MONTHS.update({name: i for i, name in enumerate(calendar.month_name) if name})
+MONTHS = {name.lower(): i for name, i in MONTHS.items()}
+MONTH_PATTERN = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+DATE_RE = re.compile(
+    r"^\s*(?:"
+    r"(?P<y1>\d{4})-(?P<m1>\d{1,2})-(?P<d1>\d{1,2})"
+    r"|(?P<d2>\d{1,2})[/.-](?P<m2>\d{1,2})(?:[/.-](?P<y2>\d{2,4}))?"
+    rf"|(?P<d3>\d{{1,2}})[\s-](?P<m3>{MONTH_PATTERN})\.?(?:[\s-](?P<y3>\d{{2,4}}))?"
+    r")(?=\s|$)",
+    re.IGNORECASE,
+)
+YEAR_RE = re.compile(rf"(?:\b(?:{MONTH_PATTERN})\.?,?\s+|\d{{1,2}}[/.-]\d{{1,2}}[/.-])((?:19|20)\d{{2}})\b", re.IGNORECASE)
+AMOUNT_RE = re.compile(
+    r"^(?P<sign>[+-])?\s*(?:RM|MYR)?\s*(?P<open>\()?\s*(?P<value>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s*"
+    r"(?P<close>\))?\s*(?P<suffix>CR|DR|-|\+)?$",
+    re.IGNORECASE,
+)
+TRAILING_AMOUNT_RE = re.compile(
+    r"\s+((?:[+-]\s*)?(?:RM|MYR)?\s*\(?\d{1,3}(?:,\d{3})*(?:\.\d+)?\)?(?:\s*(?:CR|DR))?)\s*$",
+    re.IGNORECASE,
+)
+EMPTY_CELLS = {"", "-", "–", "—", "nil"}
+
+
+@dataclass
+class StatementTable:
+    """Columns of parsed transactions (one entry per statement row, in statement order)"""
+    date: np.ndarray  # datetime64[D]
+    description: np.ndarray  # str
+    debit: np.ndarray  # float64, 0 when the row has no debit
+    credit: np.ndarray  # float64, 0 when the row has no credit
+    balance: np.ndarray  # float64, NaN when the row shows no balance
+
+    COLUMNS = ("date", "description", "debit", "credit", "balance")
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Rows as JSON-ready dicts (for API responses)"""
+        return [
+            {
+                "date": str(d),
+                "description": str(desc),
+                "debit": float(dr),
+                "credit": float(cr),
+                "balance": None if np.isnan(bal) else float(bal),
+            }
+            for d, desc, dr, cr, bal in zip(self.date, self.description, self.debit, self.credit, self.balance)
+        ]
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """Signed value of an amount cell ("1,250.00", "-RM 28.50", "(100.00)", "300.00 DR"), None if empty"""
+    text = (text or "").strip()
+    if text.lower() in EMPTY_CELLS:
+        return None
+    match = AMOUNT_RE.match(text)
+    if not match:
+        return None
+    value = float(match.group("value").replace(",", ""))
+    suffix = (match.group("suffix") or "").upper()
+    if match.group("sign") == "-" or suffix in ("DR", "-") or (match.group("open") and match.group("close")):
+        return -value
+    return value
+
+
+def _explicit_sign(text: str) -> bool:
+    """Whether an amount says on its own which direction it goes"""
+    text = text.strip()
+    return text[:1] in "+-(" or text.upper().endswith(("CR", "DR", "-", "+"))
+
+
+def _column_names(text: str) -> List[Tuple[str, str]]:
+    """(column, heading word) pairs named in a header cell"""
+    names = []
+    for word in re.findall(r"[a-z]+", text.lower()):
+        for name, keywords in COLUMN_KEYWORDS.items():
+            if word in keywords and name not in [n for n, _ in names]:
+                names.append((name, word))
+                break
+    return names
+
+
+def _month_end_safe(year: int, month: int, day: int) -> Date:
+    """Date with the day clamped to the month ("29/02/2025" -> 2025-02-28)"""
+    return Date(year, month, min(day, calendar.monthrange(year, month)[1]))
+
+
+class BankStatementParser:
+    """Parses positioned statement text into a StatementTable and derives cash-flow metrics"""
+
+    @staticmethod
+    def _rows(blocks: List[Dict]) -> List[List[Dict]]:
+        """Spans grouped into visual rows, top to bottom and left to right"""
+        spans = sorted(
+            (b for b in blocks if b.get("text", "").strip()),
+            key=lambda b: (b["page"], (b["bbox"][1] + b["bbox"][3]) / 2, b["bbox"][0]),
+        )
+        rows: List[List[Dict]] = []
+        row_page, row_center = None, None
+        for span in spans:
+            center = (span["bbox"][1] + span["bbox"][3]) / 2
+            if rows and span["page"] == row_page and center - row_center <= ROW_TOLERANCE:
+                rows[-1].append(span)
+            else:
+                rows.append([span])
+                row_page, row_center = span["page"], center
+        return [sorted(row, key=lambda b: b["bbox"][0]) for row in rows]
+
+    @staticmethod
+    def _header(row: List[Dict]) -> Optional[List[Tuple[str, float]]]:
+        """(column, x-center) pairs if the row is a table header, else None"""
+        text = " ".join(span["text"] for span in row)
+        names = [name for name, _ in _column_names(text)]
+        if re.search(r"\d", text) or "date" not in names or not any(name in names for name in AMOUNT_COLUMNS):
+            return None  # Headings are words only; "Statement Date: 31/03/2025 ... Balance" is not a header
+        columns = []
+        for span in row:
+            x0, x1 = span["bbox"][0], span["bbox"][2]
+            headings = _column_names(span["text"])
+            for name, word in headings:
+                center = (x0 + x1) / 2
+                if len(headings) > 1:
+                    # Several headings in one span: place each at its share of the span's width
+                    center = x0 + (x1 - x0) * span["text"].lower().find(word) / len(span["text"])
+                if name not in [c[0] for c in columns]:
+                    columns.append((name, center))
+        return sorted(columns, key=lambda c: c[1])
+
+    @staticmethod
+    def _date(text: str, year: Optional[int]) -> Tuple[Optional[Date], str, bool]:
+        """Leading date of a row, the rest of its text, and whether the date named its year"""
+        match = DATE_RE.match(text)
+        if not match:
+            return None, text, False
+        parts = match.groupdict()
+        try:
+            if parts["y1"]:
+                y, m, d = int(parts["y1"]), int(parts["m1"]), int(parts["d1"])
+            elif parts["d2"]:
+                d, m, shown = int(parts["d2"]), int(parts["m2"]), parts["y2"]
+            else:
+                d, m, shown = int(parts["d3"]), MONTHS[parts["m3"].lower()], parts["y3"]
+            explicit = bool(parts["y1"]) or len(shown or "") in (2, 4)  # "01/10/202" (cut off) uses the heading's year
+            if not parts["y1"]:
+                y = (int(shown) + (2000 if len(shown) == 2 else 0)) if explicit else year
+            if y is None or not 1 <= m <= 12 or not 1 <= d <= 31:
+                return None, text, False
+            return _month_end_safe(y, m, d), text[match.end():].strip(), explicit
+        except (ValueError, KeyError):
+            return None, text, False
+
+    def parse(self, blocks: List[Dict], default_year: Optional[int] = None) -> StatementTable:
+        """
+        Parse the transaction tables of a statement
+
+        Args:
+            blocks: Text spans with page and bbox, as from PDFProcessor.extract_with_coordinates
+            default_year: Year for day/month dates when the statement never names one (default: this year)
+
+        Returns:
+            StatementTable (empty if no transaction table was found)
+        """
+        dates: List[Date] = []
+        descriptions: List[str] = []
+        debits: List[float] = []
+        credits: List[float] = []
+        balances: List[float] = []
+
+        columns: Optional[List[Tuple[str, float]]] = None
+        year = default_year or Date.today().year
+        last_balance: Optional[float] = None
+        last_row_x0: Optional[float] = None
+        last_row_page: Optional[int] = None
+
+        for row in self._rows(blocks):
+            text = " ".join(span["text"].strip() for span in row)
+            header = self._header(row)
+            if header:
+                columns = header
+                continue
+            if columns is None:
+                found = YEAR_RE.search(text)
+                if found:
+                    year = int(found.group(1))
+                continue
+
+            # Column boundaries: midpoints between neighbouring header centers
+            names = [name for name, _ in columns]
+            bounds = [(a[1] + b[1]) / 2 for a, b in zip(columns, columns[1:])]
+            first_amount = next((i for i, name in enumerate(names) if name in AMOUNT_COLUMNS), len(names))
+            amounts_start = bounds[first_amount - 1] if first_amount > 0 else float("-inf")
+
+            leading, cells = [], {}
+            for span in row:
+                center = (span["bbox"][0] + span["bbox"][2]) / 2
+                if center < amounts_start or (not leading and self._date(span["text"], year)[0] is not None):
+                    leading.append(span["text"].strip())
+                    continue
+                name = names[sum(center >= b for b in bounds)]
+                cells.setdefault(name, []).append(span["text"].strip())
+            leading_text = " ".join(leading).strip()
+            values = {name: parse_amount(" ".join(parts)) for name, parts in cells.items() if name in AMOUNT_COLUMNS}
+
+            row_date, description, explicit_year = self._date(leading_text, year)
+            if row_date is None:
+                found = YEAR_RE.search(text)
+                if found:
+                    year = int(found.group(1))
+                elif (descriptions and not values and row[0]["page"] == last_row_page
+                      and row[0]["bbox"][0] > last_row_x0 + INDENT):
+                    descriptions[-1] = f"{descriptions[-1]} {leading_text}".strip()
+                continue
+            if explicit_year:
+                year = row_date.year
+            elif dates and (dates[-1] - row_date).days > 180:
+                # Day/month dates crossing into January
+                year += 1
+                row_date = _month_end_safe(year, row_date.month, row_date.day)
+
+            if TOTAL_RE.match(description):
+                continue
+            marker = any(m in description.lower() for m in BALANCE_MARKERS)
+            if marker:
+                values = {"balance": values.get("balance")}  # Opening/closing rows may show the month's totals too
+
+            debit = abs(values["debit"]) if values.get("debit") is not None else 0.0
+            credit = abs(values["credit"]) if values.get("credit") is not None else 0.0
+            balance = values.get("balance")
+            if values.get("amount") is not None:
+                if values["amount"] < 0:
+                    debit = -values["amount"]
+                else:
+                    credit = values["amount"]
+
+            # Amounts that spilled into the description column ("... Fixed Deposit 5,000")
+            if not debit and not credit and not marker:
+                full_description, shown_balance = description, balance
+                trailing = []
+                while True:
+                    match = TRAILING_AMOUNT_RE.search(description)
+                    if not match or parse_amount(match.group(1)) is None:
+                        break
+                    trailing.insert(0, match.group(1))
+                    description = description[:match.start()].strip()
+                if balance is None and len(trailing) >= 2:
+                    balance = parse_amount(trailing.pop())
+                for raw in trailing[-1:]:
+                    value = parse_amount(raw)
+                    if _explicit_sign(raw):
+                        debit, credit = (-value, 0.0) if value < 0 else (0.0, value)
+                    elif balance is not None and last_balance is not None and abs(abs(balance - last_balance) - value) < 0.01:
+                        debit, credit = (value, 0.0) if balance < last_balance else (0.0, value)
+                if not debit and not credit:
+                    description, balance = full_description, shown_balance  # Trailing number was part of the text
+                if not debit and not credit and balance is not None and last_balance is not None \
+                        and abs(balance - last_balance) >= 0.01:
+                    # Amount missing entirely: the running balance says what moved
+                    delta = round(balance - last_balance, 2)
+                    debit, credit = (-delta, 0.0) if delta < 0 else (0.0, delta)
+
+            if not debit and not credit and balance is None:
+                continue  # A dated line without any figure ("Check 1001 12-05") is not a transaction
+            dates.append(row_date)
+            descriptions.append(description)
+            debits.append(debit)
+            credits.append(credit)
+            balances.append(np.nan if balance is None else balance)
+            if balance is not None:
+                last_balance = balance
+            last_row_x0 = row[0]["bbox"][0]
+            last_row_page = row[0]["page"]
+
+        return StatementTable(
+            date=np.array(dates, dtype="datetime64[D]"),
+            description=np.array(descriptions, dtype=str),
+            debit=np.array(debits, dtype=np.float64),
+            credit=np.array(credits, dtype=np.float64),
+            balance=np.array(balances, dtype=np.float64),
+        )
+
+    @staticmethod
+    def _contains(lowered: np.ndarray, keywords: Tuple[str, ...]) -> np.ndarray:
+        mask = np.zeros(len(lowered), dtype=bool)
+        for keyword in keywords:
+            mask |= np.char.find(lowered, keyword) >= 0
+        return mask
+
+    def cash_flow_metrics(self, table: StatementTable) -> Optional[Dict[str, Any]]:
+        """
+        Cash-flow figures of a parsed statement, computed over whole columns
+
+        Returns:
+            Metrics dict, or None for an empty table
+        """
+        if len(table) == 0:
+            return None
+        debit, credit, balance = table.debit, table.credit, table.balance
+        lowered = np.char.lower(table.description.astype(str))
+        markers = self._contains(lowered, BALANCE_MARKERS)
+        moving = ((debit > 0) | (credit > 0)) & ~markers
+
+        months, month_index = np.unique(table.date.astype("datetime64[M]"), return_inverse=True)
+        month_count = len(months)
+        credit_by_month = np.bincount(month_index, weights=credit, minlength=month_count)
+        debit_by_month = np.bincount(month_index, weights=debit, minlength=month_count)
+
+        # Closing balance of each month: balance on its last row that shows one
+        has_balance = ~np.isnan(balance)
+        balance_rows = np.flatnonzero(has_balance)
+        last_row = np.full(month_count, -1)
+        np.maximum.at(last_row, month_index[balance_rows], balance_rows)
+        closing_by_month = np.where(last_row >= 0, balance[np.maximum(last_row, 0)], np.nan)
+
+        # Balance continuity: each shown balance must equal the previous one plus the movements between them
+        running = np.cumsum(credit - debit)
+        expected = np.diff(running[balance_rows])
+        actual = np.diff(balance[balance_rows])
+        mismatches = int(np.count_nonzero(np.abs(actual - expected) > 0.01))
+
+        salary = moving & (credit > 0) & self._contains(lowered, SALARY_KEYWORDS)
+        debt = moving & (debit > 0) & self._contains(lowered, DEBT_KEYWORDS)
+        salary_total = float(credit[salary].sum())
+        debt_total = float(debit[debt].sum())
+        total_credit = float(credit.sum())
+
+        opening_balance = None
+        if balance_rows.size:
+            first = balance_rows[0]
+            opening_balance = float(balance[first] - credit[first] + debit[first])
+
+        def money(value) -> Optional[float]:
+            return None if value is None or np.isnan(value) else round(float(value), 2)
+
+        return {
+            "parser_version": PARSER_VERSION,
+            "period_start": str(table.date.min()),
+            "period_end": str(table.date.max()),
+            "months": month_count,
+            "transaction_count": int(moving.sum()),
+            "total_credit": money(total_credit),
+            "total_debit": money(debit.sum()),
+            "net_cash_flow": money(total_credit - debit.sum()),
+            "average_monthly_credit": money(credit_by_month.mean()),
+            "average_monthly_debit": money(debit_by_month.mean()),
+            "opening_balance": money(opening_balance),
+            "closing_balance": money(balance[balance_rows[-1]]) if balance_rows.size else None,
+            "average_closing_balance": money(np.nanmean(closing_by_month)) if balance_rows.size else None,
+            "lowest_balance": money(np.nanmin(balance)) if balance_rows.size else None,
+            "monthly_salary": money(salary_total / month_count) if salary_total else None,
+            "monthly_income": money((salary_total or total_credit) / month_count),
+            "monthly_debt_repayments": money(debt_total / month_count),
+            "debt_transactions": [str(d) for d in np.unique(table.description[debt])],
+            "balance_mismatches": mismatches,
+            "monthly": [
+                {
+                    "month": str(month),
+                    "credit": money(credit_by_month[i]),
+                    "debit": money(debit_by_month[i]),
+                    "closing_balance": money(closing_by_month[i]),
+                }
+                for i, month in enumerate(months)
+            ],
+        }
+
+
+# Singleton instance
+statement_parser = BankStatementParser()
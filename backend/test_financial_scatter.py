@@ -0,0 +1,75 @@
+"""
+Test the sampled income vs DSR scatter (no server needed)
+Seeds a throwaway SQLite database where only some applications have a point (the rest
+failed or are still processing) and checks that the sample holds min(total, cap)
+points, spread from the oldest to the newest qualifying application.
+
+Usage: python test_financial_scatter.py
+"""
+import os
+import sys
+import tempfile
+from dataclasses import replace
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+WORKDIR = tempfile.mkdtemp(prefix="trustlens_scatter_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/test.db"
+sys.path.insert(0, BACKEND)
+
+import models  # noqa: E402,F401
+import database  # noqa: E402
+import analytics_service  # noqa: E402
+from analytics_service import AnalyticsService  # noqa: E402
+from config import Config  # noqa: E402
+from models import Application, ApplicationStatus  # noqa: E402
+
+database.init_db()
+failures = []
+
+
+def seed(count: int, qualifies) -> list:
+    """count applications; those where qualifies(i) have income and DSR. Returns the qualifying IDs in order."""
+    with database.get_session() as session:
+        for app in session.query(Application).all():
+            session.delete(app)
+        session.flush()  # Deletes before the inserts reuse the same application IDs
+        for i in range(1, count + 1):
+            has_point = qualifies(i)
+            session.add(Application(
+                application_id=f"APP-{i:03d}",
+                status=ApplicationStatus.APPROVED if has_point else ApplicationStatus.FAILED,
+                final_decision="Approved" if has_point else None,
+                net_income=3000.0 + i if has_point else None,
+                debt_service_ratio=30.0 if has_point else None,
+            ))
+        session.commit()
+    return [f"APP-{i:03d}" for i in range(1, count + 1) if qualifies(i)]
+
+
+def check(label: str, count: int, qualifies, max_points: int):
+    expected_ids = seed(count, qualifies)
+    analytics_service.Config = lambda: replace(Config(), ANALYTICS_SCATTER_MAX_POINTS=max_points)
+    with database.get_session() as session:
+        ids = [point["id"] for point in AnalyticsService._financial_scatter(session)]
+    expected_size = min(len(expected_ids), max_points)
+    problems = []
+    if len(ids) != expected_size:
+        problems.append(f"{len(ids)} points, expected {expected_size}")
+    if ids and ids[-1] != expected_ids[-1]:
+        problems.append(f"newest point {ids[-1]}, expected {expected_ids[-1]}")
+    if ids != sorted(ids) or not set(ids) <= set(expected_ids):
+        problems.append("points are not ordered qualifying applications")
+    if problems:
+        failures.append(label)
+    print(f"{'❌' if problems else '✅'} {label}: {len(ids)} points {ids[:2]}…{ids[-2:]}"
+          + (f" ({'; '.join(problems)})" if problems else ""))
+
+
+if __name__ == "__main__":
+    check("even ids qualify, cap 5", 40, lambda i: i % 2 == 0, 5)
+    check("odd ids qualify, cap 5", 40, lambda i: i % 2 == 1, 5)
+    check("every third id qualifies, cap 7", 100, lambda i: i % 3 == 0, 7)
+    check("fewer points than the cap", 40, lambda i: i % 2 == 0, 50)
+    check("cap equals total", 40, lambda i: i % 2 == 0, 20)
+    print(f"\n{'✅ All checks passed' if not failures else f'❌ {len(failures)} check(s) failed'}")
+    sys.exit(1 if failures else 0)
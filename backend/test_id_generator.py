@@ -0,0 +1,84 @@
+"""
+Concurrency test for the application ID generator (no server needed)
+Generates IDs from many threads and several processes at once and checks that
+every ID is unique, well-formed, time-ordered, and strictly increasing per thread.
+
+Usage: python test_id_generator.py [--threads 8] [--processes 4] [--per-worker 50000]
+"""
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+
+from id_generator import CROCKFORD_BASE32, ULID_LENGTH, id_generator
+
+
+def generate(count: int):
+    return [id_generator.application_id() for _ in range(count)]
+
+
+def threaded(threads: int, per_thread: int):
+    """IDs from several threads of one process; returns (per-thread lists, seconds)"""
+    results = [None] * threads
+    barrier = threading.Barrier(threads)
+
+    def worker(index: int):
+        barrier.wait()
+        results[index] = generate(per_thread)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.start()
+    for worker_thread in workers:
+        worker_thread.join()
+    return results, time.perf_counter() - start
+
+
+def check(label: str, batches, seconds: float) -> bool:
+    ids = [i for batch in batches for i in batch]
+    unique = len(set(ids)) == len(ids)
+    well_formed = all(
+        i.startswith("APP-") and len(i) == 4 + ULID_LENGTH and all(c in CROCKFORD_BASE32 for c in i[4:]) for i in ids
+    )
+    increasing = all(all(a < b for a, b in zip(batch, batch[1:])) for batch in batches)
+    rate = len(ids) / seconds if seconds else float("inf")
+    print(f"{label}: {len(ids):,} IDs in {seconds:.2f}s ({rate:,.0f}/s)")
+    print(f"  {'✅' if unique else '❌'} unique   {'✅' if well_formed else '❌'} well-formed   "
+          f"{'✅' if increasing else '❌'} strictly increasing per worker")
+    return unique and well_formed and increasing
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency test for application IDs")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--per-worker", type=int, default=50_000)
+    args = parser.parse_args()
+
+    ok = True
+    before_ms = int(time.time() * 1000)
+    batches, seconds = threaded(args.threads, args.per_worker)
+    ok &= check(f"{args.threads} threads", batches, seconds)
+
+    # Embedded timestamp must match the wall clock
+    encoded_ms = id_generator.timestamp_ms(batches[0][0])
+    in_range = before_ms <= encoded_ms <= int(time.time() * 1000)
+    print(f"  {'✅' if in_range else '❌'} embedded timestamp matches generation time")
+    ok &= in_range
+
+    # Forked workers (like uvicorn/gunicorn workers) must not continue the parent's sequence
+    id_generator.application_id()
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    start = time.perf_counter()
+    with context.Pool(args.processes) as pool:
+        batches = pool.map(generate, [args.per_worker] * args.processes)
+    ok &= check(f"{args.processes} processes", batches, time.perf_counter() - start)
+
+    print("\n✅ ID generator OK" if ok else "\n❌ ID generator FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
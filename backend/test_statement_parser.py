@@ -0,0 +1,170 @@
+"""
+Tests for the bank-statement parser on small synthetic statements (no server needed)
+Covers debit/credit/balance columns, a signed amount column, wrapped (multi-line)
+descriptions, summary rows, and day/month dates that take their year from the
+statement period or cross into January. One statement is rendered to a real PDF so
+the span geometry comes from PDFProcessor.extract_with_coordinates.
+
+Usage: python test_statement_parser.py
+"""
+import os
+import sys
+import tempfile
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from pdf_processor import PDFProcessor
+from statement_parser import StatementTable, parse_amount, statement_parser
+
+FONT_SIZE = 9
+failures = []
+
+
+def check(label: str, actual, expected):
+    """Record one expectation; floats compare to the cent, arrays element-wise"""
+    if isinstance(actual, np.ndarray):
+        actual = actual.tolist()
+    if isinstance(expected, float) and actual is not None:
+        ok = abs(actual - expected) < 0.005
+    elif isinstance(expected, (list, tuple)):
+        ok = list(actual) == list(expected)
+    else:
+        ok = actual == expected
+    if not ok:
+        failures.append(label)
+    print(f"{'✅' if ok else '❌'} {label}: {actual!r}" + ("" if ok else f" (expected {expected!r})"))
+
+
+def blocks(rows, page: int = 1):
+    """Text spans for rows of (y, [(x, text), ...]), sized like a 9pt font"""
+    return [
+        {"page": page, "text": text, "bbox": (x, y - FONT_SIZE, x + len(text) * FONT_SIZE * 0.5, y + 2)}
+        for y, cells in rows
+        for x, text in cells
+    ]
+
+
+# Debit / credit / balance columns with an opening balance, a wrapped description and a total row
+DEBIT_CREDIT_ROWS = [
+    (60, [(50, "Statement Period: 01/03/2025 - 30/04/2025")]),
+    (100, [(50, "Date"), (120, "Description"), (350, "Debit"), (420, "Credit"), (500, "Balance")]),
+    (120, [(50, "01/03/2025"), (120, "Opening Balance"), (500, "1,000.00")]),
+    (135, [(50, "02/03/2025"), (120, "Salary ACME Sdn Bhd"), (420, "4,500.00"), (500, "5,500.00")]),
+    (147, [(130, "March payroll")]),
+    (162, [(50, "05/03/2025"), (120, "PTPTN Loan Repayment"), (350, "300.00"), (500, "5,200.00")]),
+    (177, [(50, "10/04/2025"), (120, "Grocery Store"), (350, "200.00"), (500, "5,000.00")]),
+    (192, [(50, "15/04/2025"), (120, "Car Loan Instalment"), (350, "900.00"), (500, "4,100.00")]),
+    (207, [(50, "30/04/2025"), (120, "Total"), (350, "1,400.00"), (420, "4,500.00")]),
+]
+
+
+def check_debit_credit(table: StatementTable, source: str):
+    print(f"\n--- Debit/credit columns ({source}) ---")
+    check("rows", len(table), 5)
+    check("dates", table.date.astype(str), ["2025-03-01", "2025-03-02", "2025-03-05", "2025-04-10", "2025-04-15"])
+    check("wrapped description joined", str(table.description[1]), "Salary ACME Sdn Bhd March payroll")
+    check("debit column", table.debit, [0.0, 0.0, 300.0, 200.0, 900.0])
+    check("credit column", table.credit, [0.0, 4500.0, 0.0, 0.0, 0.0])
+    check("balance column", table.balance, [1000.0, 5500.0, 5200.0, 5000.0, 4100.0])
+
+    metrics = statement_parser.cash_flow_metrics(table)
+    check("months", metrics["months"], 2)
+    check("transaction_count", metrics["transaction_count"], 4)
+    check("total_credit", metrics["total_credit"], 4500.0)
+    check("total_debit", metrics["total_debit"], 1400.0)
+    check("net_cash_flow", metrics["net_cash_flow"], 3100.0)
+    check("opening_balance", metrics["opening_balance"], 1000.0)
+    check("closing_balance", metrics["closing_balance"], 4100.0)
+    check("lowest_balance", metrics["lowest_balance"], 1000.0)
+    check("monthly_salary", metrics["monthly_salary"], 2250.0)
+    check("monthly_debt_repayments", metrics["monthly_debt_repayments"], 600.0)
+    check("balance_mismatches", metrics["balance_mismatches"], 0)
+    check("monthly closing balances", [m["closing_balance"] for m in metrics["monthly"]], [5200.0, 4100.0])
+
+
+def test_debit_credit_columns():
+    check_debit_credit(statement_parser.parse(blocks(DEBIT_CREDIT_ROWS)), "synthetic spans")
+
+
+def test_debit_credit_pdf():
+    """The same statement drawn into a PDF and read back with PyMuPDF"""
+    folder = tempfile.mkdtemp(prefix="statement_")
+    path = os.path.join(folder, "statement.pdf")
+    with fitz.open() as doc:
+        page = doc.new_page()
+        for y, cells in DEBIT_CREDIT_ROWS:
+            for x, text in cells:
+                page.insert_text((x, y), text, fontsize=FONT_SIZE)
+        doc.save(path)
+    check_debit_credit(statement_parser.parse(PDFProcessor.extract_with_coordinates(path)), "rendered PDF")
+
+
+def test_signed_amount_column():
+    print("\n--- Signed amount column, no balance column ---")
+    table = statement_parser.parse(blocks([
+        (100, [(50, "DATE"), (150, "DESC"), (400, "AMOUNT")]),
+        (120, [(50, "2025-11-01"), (150, "Salary Payment"), (400, "+RM 4,800.00")]),
+        (135, [(50, "03 Nov 2025"), (150, "Coffee"), (400, "-RM 28.50")]),
+        (150, [(50, "10 Nov 2025"), (150, "Card reversal fee"), (400, "(100.00)")]),
+        (165, [(50, "5 Dec"), (150, "Credit Card Payment"), (400, "250.00 DR")]),
+        (180, [(50, "20 Dec"), (150, "Transfer In"), (400, "1,000.00 CR")]),
+    ]))
+    check("rows", len(table), 5)
+    check("dates (year carried from earlier rows)", table.date.astype(str),
+          ["2025-11-01", "2025-11-03", "2025-11-10", "2025-12-05", "2025-12-20"])
+    check("debit column", table.debit, [0.0, 28.5, 100.0, 250.0, 0.0])
+    check("credit column", table.credit, [4800.0, 0.0, 0.0, 0.0, 1000.0])
+    check("balance column is empty", bool(np.isnan(table.balance).all()), True)
+
+    metrics = statement_parser.cash_flow_metrics(table)
+    check("total_credit", metrics["total_credit"], 5800.0)
+    check("total_debit", metrics["total_debit"], 378.5)
+    check("monthly_salary", metrics["monthly_salary"], 2400.0)
+    check("monthly_debt_repayments", metrics["monthly_debt_repayments"], 125.0)
+    check("closing_balance", metrics["closing_balance"], None)
+    check("monthly credit", [m["credit"] for m in metrics["monthly"]], [4800.0, 1000.0])
+
+
+def test_date_formats():
+    print("\n--- Day/month dates, year rollover, two-digit years ---")
+    table = statement_parser.parse(blocks([
+        (60, [(50, "Statement for Dec 2024")]),
+        (100, [(50, "Date"), (120, "Particulars"), (350, "Withdrawal"), (430, "Deposit"), (510, "Balance")]),
+        (120, [(50, "28/12"), (120, "Rent"), (350, "1,200.00"), (510, "800.00")]),
+        (135, [(50, "02/01"), (120, "Gaji Januari"), (430, "3,000.00"), (510, "3,800.00")]),
+        (150, [(50, "15-01-25"), (120, "Bill Payment"), (350, "150.00"), (510, "3,650.00")]),
+        (165, [(50, "29.02.2025"), (120, "Interest"), (430, "1.50"), (510, "3,651.50")]),
+    ]))
+    check("dates", table.date.astype(str), ["2024-12-28", "2025-01-02", "2025-01-15", "2025-02-28"])
+    metrics = statement_parser.cash_flow_metrics(table)
+    check("months", metrics["months"], 3)
+    check("monthly_salary ('gaji')", metrics["monthly_salary"], 1000.0)
+    check("balance_mismatches", metrics["balance_mismatches"], 0)
+
+
+def test_parse_amount():
+    print("\n--- Amount cells ---")
+    for text, expected in [
+        ("1,250.00", 1250.0), ("-RM 28.50", -28.5), ("+RM 4,800.00", 4800.0), ("(100.00)", -100.0),
+        ("300.00 DR", -300.0), ("300.00 CR", 300.0), ("MYR 12", 12.0), ("-", None), ("", None), ("n/a", None),
+    ]:
+        check(f"parse_amount({text!r})", parse_amount(text), expected)
+
+
+def test_no_table():
+    print("\n--- Text without a transaction table ---")
+    table = statement_parser.parse(blocks([(100, [(50, "Dear customer, your statement is attached.")])]))
+    check("rows", len(table), 0)
+    check("metrics", statement_parser.cash_flow_metrics(table), None)
+
+
+if __name__ == "__main__":
+    test_debit_credit_columns()
+    test_debit_credit_pdf()
+    test_signed_amount_column()
+    test_date_formats()
+    test_parse_amount()
+    test_no_table()
+    print(f"\n{'✅ All checks passed' if not failures else f'❌ {len(failures)} check(s) failed'}")
+    sys.exit(1 if failures else 0)
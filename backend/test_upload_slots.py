@@ -0,0 +1,80 @@
+"""
+Regression test: document hashes follow the packed supporting-doc slots (no server needed)
+Uploading only supporting_doc_2 and supporting_doc_3 stores them in supporting_doc_1/2_path,
+so document_hashes must pair each *_path column with the SHA-256 of the file it points to.
+Runs against a throwaway SQLite database and upload folder.
+
+Usage: python test_upload_slots.py
+"""
+import hashlib
+import os
+import sys
+import tempfile
+
+BACKEND = os.path.dirname(os.path.abspath(__file__))
+WORKDIR = tempfile.mkdtemp(prefix="trustlens_slots_")
+os.environ["DATABASE_URL"] = f"sqlite:///{WORKDIR}/test.db"
+os.chdir(WORKDIR)
+sys.path.insert(0, BACKEND)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import database  # noqa: E402
+from models import Application  # noqa: E402
+
+database.init_db()
+import main  # noqa: E402
+
+
+def pdf(name: str) -> tuple:
+    content = f"%PDF-1.4\n% {name}\n".encode()
+    return name, content, "application/pdf"
+
+
+def main_test() -> bool:
+    files = {
+        "application_form": pdf("form.pdf"),
+        "bank_statement": pdf("bank.pdf"),
+        "essay": pdf("essay.pdf"),
+        "payslip": pdf("payslip.pdf"),
+        "supporting_doc_2": pdf("s2.pdf"),
+        "supporting_doc_3": pdf("s3.pdf"),
+    }
+    response = TestClient(main.app).post("/api/upload", files=files)
+    if response.status_code != 200:
+        print(f"❌ Upload failed: {response.status_code} {response.text}")
+        return False
+    application_id = response.json()["application_id"]
+
+    with database.get_session() as session:
+        app = session.query(Application).filter(Application.application_id == application_id).first()
+        columns = {
+            "application_form": app.application_form_path,
+            "bank_statement": app.bank_statement_path,
+            "essay": app.essay_path,
+            "payslip": app.payslip_path,
+            "supporting_doc_1": app.supporting_doc_1_path,
+            "supporting_doc_2": app.supporting_doc_2_path,
+            "supporting_doc_3": app.supporting_doc_3_path,
+        }
+        hashes = dict(app.document_hashes or {})
+
+    ok = True
+    if columns["supporting_doc_3"] is not None or "supporting_doc_3" in hashes:
+        print("❌ supporting_doc_3 slot should be empty after packing")
+        ok = False
+    for label, path in columns.items():
+        if path is None:
+            continue
+        with open(path, "rb") as f:
+            actual = hashlib.sha256(f.read()).hexdigest()
+        if hashes.get(label) != actual:
+            print(f"❌ {label}: hash does not match {os.path.basename(path)}")
+            ok = False
+        else:
+            print(f"✅ {label}: {os.path.basename(path)}")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main_test() else 1)
@@ -0,0 +1,75 @@
+"""
+Columnar store for parsed bank-statement transactions
+Each application's statement table (statement_parser.StatementTable) is kept as one
+compressed NumPy archive in ApplicationTransactions - five typed columns instead of
+rows of JSON - so cash-flow metrics load it in one read and compute over whole arrays.
+"""
+import io
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+
+from database import get_session
+from models import ApplicationTransactions
+from statement_parser import PARSER_VERSION, StatementTable
+
+
+class TransactionStore:
+    """Save/load/delete statement tables keyed by application ID"""
+
+    @staticmethod
+    def _pack(table: StatementTable) -> bytes:
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **table.columns())
+        return buffer.getvalue()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> StatementTable:
+        with np.load(io.BytesIO(blob), allow_pickle=False) as archive:
+            return StatementTable(**{name: archive[name] for name in StatementTable.COLUMNS})
+
+    def save(self, session, application_id: str, table: Optional[StatementTable], content_hash: Optional[str] = None):
+        """
+        Store (or replace) an application's transactions inside the caller's transaction
+
+        Args:
+            session: Open session that also writes the analysis result
+            application_id: Application the statement belongs to
+            table: Parsed statement; None or empty removes any stored table, so a
+                reprocessed statement that no longer parses never serves stale rows
+            content_hash: SHA-256 of the parsed statement file
+        """
+        if table is None or len(table) == 0:
+            self.delete(session, application_id)
+            return
+        row = session.query(ApplicationTransactions).filter(
+            ApplicationTransactions.application_id == application_id
+        ).first()
+        if row is None:
+            row = ApplicationTransactions(application_id=application_id, columns=b"")
+        row.columns = self._pack(table)
+        row.row_count = len(table)
+        row.period_start = table.date.min().astype("datetime64[s]").astype(datetime)
+        row.period_end = table.date.max().astype("datetime64[s]").astype(datetime)
+        row.parser_version = PARSER_VERSION
+        row.content_hash = content_hash
+        row.updated_at = datetime.utcnow()
+        session.add(row)
+
+    def load(self, application_id: str) -> Optional[StatementTable]:
+        """Transactions of one application, or None if none were stored"""
+        with get_session() as session:
+            blob = session.query(ApplicationTransactions.columns).filter(
+                ApplicationTransactions.application_id == application_id
+            ).scalar()
+        return self._unpack(blob) if blob is not None else None
+
+    def delete(self, session, application_id: str):
+        session.query(ApplicationTransactions).filter(
+            ApplicationTransactions.application_id == application_id
+        ).delete(synchronize_session=False)
+
+
+# Singleton instance
+transaction_store = TransactionStore()
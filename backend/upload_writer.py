@@ -0,0 +1,135 @@
+"""
+Streaming upload writer with size/type limits and incremental SHA-256
+Each UploadFile is copied to disk in fixed-size chunks on a worker thread, never on
+the event loop. The extension is checked before any byte is read, the size limit
+(Config.MAX_FILE_SIZE) is enforced while streaming so oversized files are rejected
+at the first chunk over the limit, and the SHA-256 digest is computed in the
+same pass for dedup and extraction caching. save_all() writes an application's
+documents concurrently and removes everything it wrote if any file is rejected.
+"""
+import asyncio
+import hashlib
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from config import Config
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadRejected(ValueError):
+    """An uploaded file breaks the size or type limits"""
+
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code  # 413 (too large) or 415 (unsupported type)
+
+
+@dataclass
+class StoredFile:
+    """A file written by UploadWriter"""
+    label: str
+    path: str
+    size: int
+    sha256: str
+
+
+class UploadWriter:
+    """Writes UploadFiles to disk in chunks, enforcing limits and hashing as it goes"""
+
+    def __init__(self):
+        self.config = Config()
+
+    def check_type(self, label: str, filename: Optional[str]) -> str:
+        """Safe basename of an upload, or UploadRejected (415) for a disallowed extension"""
+        name = os.path.basename(filename or "")
+        if not name or not name.lower().endswith(tuple(self.config.ALLOWED_EXTENSIONS)):
+            allowed = ", ".join(self.config.ALLOWED_EXTENSIONS)
+            raise UploadRejected(f"{label}: '{name or filename}' is not an allowed file type ({allowed})", 415)
+        return name
+
+    def _too_large(self, label: str) -> UploadRejected:
+        return UploadRejected(f"{label}: file exceeds the {self.config.MAX_FILE_SIZE / (1024 * 1024):g}MB limit", 413)
+
+    def _copy(self, label: str, upload: UploadFile, target: Path) -> StoredFile:
+        digest = hashlib.sha256()
+        size = 0
+        limit = self.config.MAX_FILE_SIZE
+        source = upload.file
+        source.seek(0)
+        try:
+            with open(target, "wb") as out:
+                while True:
+                    chunk = source.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > limit:
+                        raise self._too_large(label)
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
+        return StoredFile(label=label, path=str(target), size=size, sha256=digest.hexdigest())
+
+    async def save(self, label: str, upload: UploadFile, target: Path) -> StoredFile:
+        """
+        Stream one upload to target
+
+        Raises:
+            UploadRejected: Larger than MAX_FILE_SIZE
+        """
+        if upload.size is not None and upload.size > self.config.MAX_FILE_SIZE:
+            # Known up front from the multipart part - reject without reading it
+            raise self._too_large(label)
+        return await run_in_threadpool(self._copy, label, upload, target)
+
+    async def save_all(self, uploads: Dict[str, Tuple[Optional[UploadFile], str]], folder: Path) -> Dict[str, StoredFile]:
+        """
+        Validate and write several uploads concurrently
+
+        Args:
+            uploads: label -> (UploadFile or None, filename prefix); None uploads are skipped
+            folder: Destination folder (created if needed)
+
+        Raises:
+            UploadRejected: Any file breaks the limits; no file is left behind
+
+        Returns:
+            label -> StoredFile
+        """
+        targets: Dict[str, Tuple[UploadFile, Path]] = {}
+        for label, (upload, prefix) in uploads.items():
+            if upload is None:
+                continue
+            target = folder / f"{prefix}{self.check_type(label, upload.filename)}"  # Bad types fail before any write
+            if any(target == other for _, other in targets.values()):
+                target = folder / f"{label}_{target.name}"  # Same filename under two labels
+            targets[label] = (upload, target)
+
+        folder.mkdir(parents=True, exist_ok=True)
+        results = await asyncio.gather(
+            *[self.save(label, upload, target) for label, (upload, target) in targets.items()],
+            return_exceptions=True,
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            for stored in results:
+                if isinstance(stored, StoredFile):
+                    Path(stored.path).unlink(missing_ok=True)
+            try:
+                folder.rmdir()  # Only succeeds if nothing else lives there
+            except OSError:
+                pass
+            raise errors[0]
+        return {stored.label: stored for stored in results}
+
+
+# Singleton instance
+upload_writer = UploadWriter()
@@ -99,17 +99,8 @@ export function NewApplicationModal({ onUploadSuccess }: { onUploadSuccess?: ()
 
     setLoading(true)
     try {
-      const formData = new FormData()
-      formData.append("file", batchFile)
-
-      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/upload/batch`, {
-        method: "POST",
-        body: formData,
-      })
-
-      if (!response.ok) throw new Error("Batch upload failed")
-      
-      const result = await response.json()
+      // Chunked, resumable upload - a dropped connection only re-sends the failed chunks
+      const result = await api.uploadBatchResumable(batchFile)
       
       setOpen(false)
       setBatchFile(null)
@@ -74,6 +74,37 @@ export interface ApplicationDetail {
     loan_essay?: { filename: string; size_bytes: number; mime_type: string } | null;
     payslip?: { filename: string; size_bytes: number; mime_type: string } | null;
   };
+  // Duplicate Detection Fields
+  duplicate_of?: string | null;
+  duplicate_matches?: Array<{
+    type: 'document' | 'ic';
+    application_id: string;
+    document?: string;
+    matched_document?: string;
+  }>;
+}
+
+export interface StatementTransactions {
+  application_id: string;
+  row_count: number;
+  cash_flow: Record<string, unknown> | null;
+  transactions: { date: string; description: string; debit: number; credit: number; balance: number | null }[];
+}
+
+export interface BulkStatus {
+  batch_id: string | null;
+  applications: { application_id: string; status: string; stage: string | null; stage_updated_at: string | null; batch_id: string | null; risk_score: number; risk_level: string | null; final_decision: string; review_status: string | null }[];
+  missing: string[];
+  summary: {
+    total: number;
+    completed: number;
+    failed: number;
+    in_progress: number;
+    percent_complete: number;
+    done: boolean;
+    by_stage: Record<string, number>;
+    by_status: Record<string, number>;
+  };
 }
 
 export const api = {
@@ -89,6 +120,13 @@ export const api = {
     return response.json();
   },
 
+  async getApplicationTransactions(id: string): Promise<StatementTransactions | null> {
+    const response = await fetch(`${API_BASE_URL}/api/application/${id}/transactions`);
+    if (response.status === 404) return null;
+    if (!response.ok) throw new Error('Failed to fetch transactions');
+    return response.json();
+  },
+
   async uploadApplication(formData: FormData): Promise<{ success: boolean; application_id: string; message: string }> {
     try {
       const response = await fetch(`${API_BASE_URL}/api/upload`, {
@@ -114,6 +152,82 @@ export const api = {
     return response.json();
   },
 
+  /**
+   * Subscribe to pushed status changes instead of polling getStatus.
+   * Pass application IDs, or 'all' for every application. Returns an unsubscribe function.
+   */
+  subscribeStatus(
+    ids: string[] | 'all',
+    onEvent: (event: { event: 'snapshot' | 'status' | 'created' | 'deleted'; application_id: string; status?: string; stage?: string | null; batch_id?: string | null; risk_score?: number; risk_level?: string | null; final_decision?: string; review_status?: string | null }) => void
+  ): () => void {
+    const query = ids === 'all' ? 'all' : ids.map(encodeURIComponent).join(',');
+    const source = new EventSource(`${API_BASE_URL}/api/events/status?ids=${query}`);
+    source.onmessage = (message) => onEvent(JSON.parse(message.data));
+    return () => source.close();
+  },
+
+  async getBulkStatus(selector: { application_ids: string[] } | { batch_id: string }): Promise<BulkStatus> {
+    const response = await fetch(`${API_BASE_URL}/api/status/bulk`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(selector),
+    });
+    if (!response.ok) throw new Error('Failed to fetch bulk status');
+    return response.json();
+  },
+
+  /**
+   * Upload a batch CSV/ZIP through a resumable session: chunks are sent in parallel at their
+   * offsets and failed chunks are retried, then the server ingests the assembled file.
+   * Pass an existing uploadId to resume an interrupted upload.
+   */
+  async uploadBatchResumable(
+    file: File,
+    options: { parallel?: number; retries?: number; uploadId?: string; onProgress?: (sentBytes: number, totalBytes: number) => void } = {}
+  ): Promise<{ success: boolean; batch_id: string; processed_count: number; upload_id: string; message: string }> {
+    const { parallel = 4, retries = 3, onProgress } = options;
+    const base = `${API_BASE_URL}/api/upload/batch/sessions`;
+
+    const opened = options.uploadId
+      ? await fetch(`${base}/${options.uploadId}`)
+      : await fetch(base, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ filename: file.name, size: file.size }),
+        });
+    if (!opened.ok) throw new Error(`Failed to open upload session (${opened.status}): ${await opened.text()}`);
+    const session: { upload_id: string; chunk_size: number; size: number; missing: number[] } = await opened.json();
+
+    const pending = [...session.missing];
+    let sent = session.size - pending.reduce((total, index) => total + Math.min(session.chunk_size, session.size - index * session.chunk_size), 0);
+    onProgress?.(sent, session.size);
+
+    const sendChunk = async (index: number) => {
+      const offset = index * session.chunk_size;
+      const chunk = file.slice(offset, offset + session.chunk_size);
+      for (let attempt = 0; ; attempt++) {
+        try {
+          const response = await fetch(`${base}/${session.upload_id}?offset=${offset}`, { method: 'PUT', body: chunk });
+          if (response.ok) break;
+          if (response.status < 500 || attempt >= retries) throw new Error(`Chunk ${index} failed (${response.status}): ${await response.text()}`);
+        } catch (error) {
+          if (attempt >= retries) throw error;
+        }
+        await new Promise((resolve) => setTimeout(resolve, 500 * 2 ** attempt));
+      }
+      sent += chunk.size;
+      onProgress?.(sent, session.size);
+    };
+    const worker = async () => {
+      for (let index = pending.shift(); index !== undefined; index = pending.shift()) await sendChunk(index);
+    };
+    await Promise.all(Array.from({ length: Math.max(1, parallel) }, worker));
+
+    const response = await fetch(`${base}/${session.upload_id}/finalize`, { method: 'POST' });
+    if (!response.ok) throw new Error(`Batch upload failed (${response.status}): ${await response.text()}`);
+    return response.json();
+  },
+
   async deleteApplication(applicationId: string): Promise<void> {
     try {
       await fetch(`${API_BASE_URL}/api/application/${applicationId}`, { method: 'DELETE' });
@@ -142,7 +256,7 @@ export const api = {
    */
   subscribeToAnalysis(
     applicationId: string,
-    onProgress: (data: { status: string; chunks?: number; length?: number; message?: string }) => void,
+    onProgress: (data: { status: string; chunks?: number; length?: number; message?: string; section?: string; data?: unknown }) => void,
     onComplete: (result: Record<string, unknown>) => void,
     onError: (error: string) => void
   ): () => void {